@@ -1,18 +1,336 @@
-from flask import Flask, request, jsonify
+from flask import (
+    Blueprint, Flask, Response, request, jsonify, abort, stream_with_context, g, has_app_context,
+    has_request_context, current_app, request_started, request_finished
+)
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime, date, time
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import create_engine, event as sa_event
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from werkzeug.security import check_password_hash, generate_password_hash
+from blinker import Namespace
+from auth import InvalidToken, TokenSigner
+from cache import ResponseCache, SQLiteCacheStore
+from checkin import CheckinGate, WriteBehindQueue
+from jobs import JobRunner
+from livefeed import ChangeBus, TooManySubscribers, sse_frame
+from metrics import MetricsRegistry, RequestTrace, SamplingProfiler
+from ratings import RATING_COUNT_COLUMNS, RATINGS, RatingHistogram, rating_trend
+from sharding import ShardRouter
+from datetime import datetime, date, time, timedelta
+from time import perf_counter
+from urllib.parse import urlencode
+import base64
+import collections
+import click
+import csv
+import functools
+import heapq
+import io
+import itertools
 import json
+import logging
 import os
+import re
+import threading
 
-app = Flask(__name__)
-
-# Database Configuration
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(basedir, "campus_events.db")}'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = 'your-secret-key-here'
 
-db = SQLAlchemy(app)
+class RoutingSession(FlaskSession):
+    """Session that runs statements on the shard the current request was routed to, if any"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            shard = g.get('shard')
+            if shard is not None:
+                return shard.engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+# The extension is bound to an application by create_app(); importing this
+# module creates no app and opens no database
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+bp = Blueprint('unibuzz', __name__, cli_group=None)
+
+# Placeholder secret: anyone who has read this file can sign tokens with it
+DEFAULT_SECRET_KEY = 'your-secret-key-here'
+
+def default_config():
+    """Settings read from the environment; create_app(config) overrides any of them"""
+    return {
+        # Database Configuration
+        'SQLALCHEMY_DATABASE_URI': os.environ.get(
+            'DATABASE_URL', f'sqlite:///{os.path.join(basedir, "campus_events.db")}'
+        ),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'SECRET_KEY': os.environ.get('SECRET_KEY', DEFAULT_SECRET_KEY),
+        
+        # Auth: POST /auth/login issues tokens signed with SECRET_KEY that expire
+        # after AUTH_TOKEN_TTL seconds. With AUTH_REQUIRED every route but login
+        # needs one; the last AUTH_TOKEN_CACHE_SIZE verified tokens skip the HMAC.
+        # AUTH_REQUIRED refuses to start without a SECRET_KEY of its own.
+        'AUTH_REQUIRED': os.environ.get('AUTH_REQUIRED', '0') == '1',
+        'AUTH_TOKEN_TTL': int(os.environ.get('AUTH_TOKEN_TTL', 8 * 3600)),
+        'AUTH_TOKEN_CACHE_SIZE': int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 4096)),
+        
+        # Optional sharding: with SHARDS_DIR set, each college's events and
+        # participation live in their own SQLite file there, and the database
+        # above becomes the directory of colleges, students and event ids
+        'SHARDS_DIR': os.environ.get('SHARDS_DIR'),
+        
+        # Storage profile: pragmas applied to every new SQLite connection
+        'SQLITE_PRAGMAS': {
+            # Takes effect on new databases, and on existing ones after `flask archive --vacuum`
+            'auto_vacuum': os.environ.get('SQLITE_AUTO_VACUUM', 'INCREMENTAL'),
+            'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+            'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+            'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)),  # negative means KiB, so 64 MB
+            'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+            'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # milliseconds
+            'temp_store': os.environ.get('SQLITE_TEMP_STORE', 'MEMORY')
+        },
+        
+        # Gate check-in: accepted scans are written in batches by a background thread.
+        # A batch failing CHECKIN_MAX_ATTEMPTS times is written scan by scan, and the
+        # scans that still fail are logged and dropped.
+        'CHECKIN_FLUSH_INTERVAL': float(os.environ.get('CHECKIN_FLUSH_INTERVAL', 0.5)),
+        'CHECKIN_BATCH_SIZE': int(os.environ.get('CHECKIN_BATCH_SIZE', 200)),
+        'CHECKIN_MAX_ATTEMPTS': int(os.environ.get('CHECKIN_MAX_ATTEMPTS', 5)),
+        # An event's in-memory gate sets are dropped once it is Completed or Cancelled,
+        # or after CHECKIN_GATE_IDLE_TIMEOUT seconds without a scan
+        'CHECKIN_GATE_IDLE_TIMEOUT': float(os.environ.get('CHECKIN_GATE_IDLE_TIMEOUT', 3600)),
+        
+        # Background report jobs: finished results are kept, and handed out again
+        # for identical requests, for REPORT_JOB_TTL seconds. A job still marked
+        # running after REPORT_JOB_TIMEOUT seconds is taken to be abandoned.
+        'REPORT_JOB_WORKERS': int(os.environ.get('REPORT_JOB_WORKERS', 2)),
+        'REPORT_JOB_TTL': float(os.environ.get('REPORT_JOB_TTL', 600)),
+        'REPORT_JOB_POLL_INTERVAL': float(os.environ.get('REPORT_JOB_POLL_INTERVAL', 2)),
+        'REPORT_JOB_TIMEOUT': float(os.environ.get('REPORT_JOB_TIMEOUT', 900)),
+        
+        # Response cache for the event and report GET routes. Writes invalidate
+        # it as they commit; with several server processes, point
+        # RESPONSE_CACHE_DB at a SQLite file they share so that one process's
+        # writes reach the others' caches. RESPONSE_CACHE_TTL bounds the age
+        # of any entry.
+        'RESPONSE_CACHE_ENABLED': os.environ.get('RESPONSE_CACHE_ENABLED', '1') == '1',
+        'RESPONSE_CACHE_SIZE': int(os.environ.get('RESPONSE_CACHE_SIZE', 1024)),
+        'RESPONSE_CACHE_MAX_BYTES': int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+        'RESPONSE_CACHE_TTL': float(os.environ.get('RESPONSE_CACHE_TTL', 300)),
+        'RESPONSE_CACHE_DB': os.environ.get('RESPONSE_CACHE_DB'),
+        
+        # Live activity feed (GET /events/<id>/stream): each event keeps its last
+        # LIVE_FEED_HISTORY messages for reconnecting clients, and idle streams
+        # get a keepalive, and a counts refresh if they changed, every
+        # LIVE_FEED_HEARTBEAT seconds. Each open stream holds a server thread.
+        'LIVE_FEED_HISTORY': int(os.environ.get('LIVE_FEED_HISTORY', 256)),
+        'LIVE_FEED_HEARTBEAT': float(os.environ.get('LIVE_FEED_HEARTBEAT', 15)),
+        'LIVE_FEED_MAX_SUBSCRIBERS': int(os.environ.get('LIVE_FEED_MAX_SUBSCRIBERS', 500)),
+        
+        # Archival: `flask archive` moves the participation rows of Completed and
+        # Cancelled events older than this many days into the archive tables
+        'ARCHIVE_AFTER_DAYS': int(os.environ.get('ARCHIVE_AFTER_DAYS', 365)),
+        
+        # Instrumentation: requests slower than SLOW_REQUEST_MS are logged with their
+        # slowest statements; with PROFILER_ENABLED, ?profile=1 returns a sampled
+        # stack profile of the request instead of its response
+        'SLOW_REQUEST_MS': float(os.environ.get('SLOW_REQUEST_MS', 500)),
+        'PROFILER_ENABLED': os.environ.get('PROFILER_ENABLED', '0') == '1',
+        'PROFILER_INTERVAL': float(os.environ.get('PROFILER_INTERVAL', 0.001))
+    }
+
+def configure_engines(config):
+    """Fill in pool options and the read bind for the configured database.
+    
+    List and report endpoints read through a separate read-only engine, so
+    with WAL they never wait on the write connection. In-memory databases
+    cannot be shared between engines or pooled, and keep a single default
+    engine. Options already present in the config are left alone.
+    """
+    database_uri = config['SQLALCHEMY_DATABASE_URI']
+    if database_uri in ('sqlite://', 'sqlite:///') or ':memory:' in database_uri:
+        return
+    
+    config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', -1)),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '0') == '1'
+    })
+    config.setdefault('SQLALCHEMY_BINDS', {
+        'read': {
+            **config['SQLALCHEMY_ENGINE_OPTIONS'],
+            'url': os.environ.get('READ_DATABASE_URL', database_uri),
+            'pool_size': int(os.environ.get('DB_READ_POOL_SIZE', 10)),
+            'max_overflow': int(os.environ.get('DB_READ_MAX_OVERFLOW', 20))
+        }
+    })
+
+def apply_sqlite_pragmas(engine, pragmas, read_only=False):
+    """Apply the storage profile to every connection the engine opens"""
+    if engine.dialect.name != 'sqlite':
+        return
+    
+    @sa_event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        # pysqlite only opens a transaction right before the first INSERT or
+        # UPDATE, so earlier reads would not be part of it; SQLAlchemy emits
+        # BEGIN itself instead (see begin_transaction below)
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            # Setting auto_vacuum waits for the write lock, even when it is unchanged, and only
+            # matters to the connection that creates the file: read connections skip it
+            if read_only and name == 'auto_vacuum':
+                continue
+            cursor.execute(f'PRAGMA {name}={value}')
+        if read_only:
+            cursor.execute('PRAGMA query_only=ON')
+        cursor.close()
+    
+    @sa_event.listens_for(engine, 'begin')
+    def begin_transaction(connection):
+        # Write transactions take the write lock up front, so read-modify-write
+        # updates of the rollups are serialized and wait on busy_timeout rather
+        # than failing when another writer commits first. Reads that are not
+        # part of a write go through read_execute/read_rows and never take it.
+        connection.exec_driver_sql('BEGIN' if read_only else 'BEGIN IMMEDIATE')
+
+def make_shard_engines(app, registry, url):
+    """Write and read-only engines for one shard, set up like the app's own"""
+    options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    read_options = {
+        key: value for key, value in app.config['SQLALCHEMY_BINDS'].get('read', options).items() if key != 'url'
+    }
+    engine = create_engine(url, **options)
+    read_engine = create_engine(url, **read_options)
+    for shard_engine, read_only in ((engine, False), (read_engine, True)):
+        apply_sqlite_pragmas(shard_engine, app.config['SQLITE_PRAGMAS'], read_only=read_only)
+        instrument_engine(shard_engine, registry)
+    return engine, read_engine
+
+slow_request_logger = logging.getLogger('unibuzz.slow_requests')
+
+def instrument_engine(engine, registry):
+    """Time every statement the engine runs and charge it to the current request"""
+    @sa_event.listens_for(engine, 'before_cursor_execute')
+    def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        context.statement_started = perf_counter()
+    
+    @sa_event.listens_for(engine, 'after_cursor_execute')
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        duration = perf_counter() - context.statement_started
+        trace = g.get('request_trace') if has_request_context() else None
+        if trace is not None:
+            trace.add(statement, duration)
+        else:
+            registry.record_background_sql(duration)
+
+class AppState:
+    """Per-application metrics, token signer, shard router, gate check-in state, report job runner, response cache and live feed, kept in app.extensions['unibuzz']"""
+    
+    def __init__(self, app):
+        self.metrics = MetricsRegistry()
+        self.token_signer = TokenSigner(
+            app.config['SECRET_KEY'], ttl=app.config['AUTH_TOKEN_TTL'], cache_size=app.config['AUTH_TOKEN_CACHE_SIZE']
+        )
+        self.shard_router = None
+        if app.config['SHARDS_DIR']:
+            self.shard_router = ShardRouter(
+                app.config['SHARDS_DIR'],
+                functools.partial(make_shard_engines, app, self.metrics),
+                lookup_event_college
+            )
+        self.checkin_gate = CheckinGate(load_checkin_sets, idle_timeout=app.config['CHECKIN_GATE_IDLE_TIMEOUT'])
+        self.checkin_queue = WriteBehindQueue(
+            functools.partial(flush_checkins, app),
+            interval=app.config['CHECKIN_FLUSH_INTERVAL'],
+            batch_size=app.config['CHECKIN_BATCH_SIZE'],
+            max_attempts=app.config['CHECKIN_MAX_ATTEMPTS'],
+            on_written=self.checkin_gate.confirm_scans,
+            on_dropped=self.checkin_gate.drop_scans
+        )
+        self.report_jobs = JobRunner(
+            functools.partial(claim_report_job, app),
+            functools.partial(run_report_job, app),
+            workers=app.config['REPORT_JOB_WORKERS'],
+            poll_interval=app.config['REPORT_JOB_POLL_INTERVAL']
+        )
+        self.response_cache = None
+        if app.config['RESPONSE_CACHE_ENABLED']:
+            self.response_cache = ResponseCache(
+                max_entries=app.config['RESPONSE_CACHE_SIZE'],
+                max_bytes=app.config['RESPONSE_CACHE_MAX_BYTES'],
+                ttl=app.config['RESPONSE_CACHE_TTL'],
+                store=SQLiteCacheStore(app.config['RESPONSE_CACHE_DB']) if app.config['RESPONSE_CACHE_DB'] else None
+            )
+        self.live_feed = ChangeBus(
+            history=app.config['LIVE_FEED_HISTORY'],
+            max_subscribers=app.config['LIVE_FEED_MAX_SUBSCRIBERS']
+        )
+
+def app_state():
+    """State of the application handling the current request or CLI command"""
+    return current_app.extensions['unibuzz']
+
+def start_request_trace(sender, **extra):
+    g.request_trace = RequestTrace()
+    if sender.config['PROFILER_ENABLED'] and request.args.get('profile') == '1':
+        g.request_profiler = SamplingProfiler(threading.get_ident(), sender.config['PROFILER_INTERVAL']).start()
+
+@bp.after_app_request
+def return_request_profile(response):
+    """Swap the response for the collapsed stack profile when ?profile=1 was sampled"""
+    profiler = g.pop('request_profiler', None)
+    if profiler is None:
+        return response
+    profiler.stop()
+    return Response(profiler.collapsed(), mimetype='text/plain', headers={
+        'X-Profile-Samples': str(profiler.samples),
+        'X-Profiled-Status': str(response.status_code)
+    })
+
+def finish_request_trace(sender, response, **extra):
+    # Streamed bodies are produced after this point, so their latency covers
+    # the query and the first chunk only
+    profiler = g.pop('request_profiler', None)
+    if profiler is not None:
+        profiler.stop()
+    trace = g.pop('request_trace', None)
+    if trace is None:
+        return
+    
+    duration = perf_counter() - trace.started
+    route = request.url_rule.rule if request.url_rule else '<unmatched>'
+    sender.extensions['unibuzz'].metrics.record_request(request.method, route, response.status_code, duration, trace)
+    
+    if duration * 1000 >= sender.config['SLOW_REQUEST_MS']:
+        slowest = ''.join(
+            f'\n  {seconds * 1000:8.1f} ms  {" ".join(statement.split())}'
+            for seconds, statement in trace.slowest()
+        )
+        slow_request_logger.warning(
+            'Slow request %s %s [%s]: %.1f ms, %d SQL statements in %.1f ms%s',
+            request.method, request.full_path.rstrip('?'), response.status_code, duration * 1000,
+            trace.statement_count, trace.sql_time * 1000, slowest
+        )
+
+def get_read_engine():
+    """Engine for read-only queries: the routed shard's, else the read bind or the write engine"""
+    shard = g.get('shard') if has_app_context() else None
+    return shard.read_engine if shard is not None else directory_read_engine()
+
+def directory_read_engine():
+    """Read engine of the main database, which is the directory when sharded"""
+    return db.engines.get('read', db.engine)
+
+def read_execute(statement, params=None):
+    """Execute a read-only statement on the read engine"""
+    return db.session.execute(statement, params, bind_arguments={'bind': get_read_engine()})
+
+def read_rows(statement, params=None):
+    """Execute a read-only column select on the read engine, skipping ORM row loading"""
+    return db.session.connection(bind_arguments={'bind': get_read_engine()}).execute(statement, params)
 
 # Models
 class College(db.Model):
@@ -31,8 +349,11 @@ class Student(db.Model):
     name = db.Column(db.String(255), nullable=False)
     srn = db.Column(db.String(50), nullable=False, unique=True)
     email = db.Column(db.String(255), nullable=False, unique=True)
+    password_hash = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (db.Index('ix_students_college_id', 'college_id'),)
+    
     registrations = db.relationship('Registration', backref='student', lazy=True, cascade='all, delete-orphan')
     attendance = db.relationship('Attendance', backref='student', lazy=True, cascade='all, delete-orphan')
     feedback = db.relationship('Feedback', backref='student', lazy=True, cascade='all, delete-orphan')
@@ -48,8 +369,17 @@ class Event(db.Model):
     time = db.Column(db.Time, nullable=False)
     venue = db.Column(db.String(255), nullable=False)
     status = db.Column(db.String(20), default='Active')
+    capacity = db.Column(db.Integer)  # seats; NULL means unlimited
     resources = db.Column(db.Text)  # JSON string
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    archived_at = db.Column(db.DateTime)  # set when its participation rows moved to the archive tables
+    
+    # Listing filters on status (and optionally type) and pages by (date, time, id)
+    __table_args__ = (
+        db.Index('ix_events_status_date_time', 'status', 'date', 'time'),
+        db.Index('ix_events_type_status_date_time', 'type', 'status', 'date', 'time'),
+        db.Index('ix_events_college_id', 'college_id'),
+    )
     
     registrations = db.relationship('Registration', backref='event', lazy=True, cascade='all, delete-orphan')
     attendance = db.relationship('Attendance', backref='event', lazy=True, cascade='all, delete-orphan')
@@ -62,7 +392,10 @@ class Registration(db.Model):
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
     registered_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    __table_args__ = (db.UniqueConstraint('event_id', 'student_id', name='unique_event_student_registration'),)
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'student_id', name='unique_event_student_registration'),
+        db.Index('ix_registrations_student_event', 'student_id', 'event_id'),
+    )
 
 class Attendance(db.Model):
     __tablename__ = 'attendance'
@@ -71,7 +404,10 @@ class Attendance(db.Model):
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
     attended_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    __table_args__ = (db.UniqueConstraint('event_id', 'student_id', name='unique_event_student_attendance'),)
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'student_id', name='unique_event_student_attendance'),
+        db.Index('ix_attendance_student_event', 'student_id', 'event_id'),
+    )
 
 class Feedback(db.Model):
     __tablename__ = 'feedback'
@@ -84,40 +420,1258 @@ class Feedback(db.Model):
     
     __table_args__ = (
         db.UniqueConstraint('event_id', 'student_id', name='unique_event_student_feedback'),
-        db.CheckConstraint('rating >= 1 AND rating <= 5', name='check_rating_range')
+        db.CheckConstraint('rating >= 1 AND rating <= 5', name='check_rating_range'),
+        db.Index('ix_feedback_student_event', 'student_id', 'event_id'),
+    )
+
+class WaitlistEntry(db.Model):
+    """A student waiting for a seat at a full event; seats go out in id order"""
+    __tablename__ = 'waitlist'
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # ix_waitlist_event_id holds (event_id, id), the order the queue is served in
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'student_id', name='unique_event_student_waitlist'),
+        db.Index('ix_waitlist_event_id', 'event_id'),
+        db.Index('ix_waitlist_student_event', 'student_id', 'event_id'),
+    )
+
+# Participation rows of archived events, moved out of the live tables by
+# `flask archive`. Keyed by (event_id, student_id) without a rowid, they take
+# less space than the live tables, and the live tables' b-trees stay small.
+class ArchivedRegistration(db.Model):
+    __tablename__ = 'registrations_archive'
+    event_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    student_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    registered_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_registrations_archive_student_id', 'student_id'),
+        {'sqlite_with_rowid': False},
+    )
+
+class ArchivedAttendance(db.Model):
+    __tablename__ = 'attendance_archive'
+    event_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    student_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    attended_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_attendance_archive_student_id', 'student_id'),
+        {'sqlite_with_rowid': False},
+    )
+
+class ArchivedFeedback(db.Model):
+    __tablename__ = 'feedback_archive'
+    event_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    student_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    rating = db.Column(db.Integer, nullable=False)
+    comment = db.Column(db.Text)
+    created_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_feedback_archive_student_id', 'student_id'),
+        {'sqlite_with_rowid': False},
+    )
+
+ARCHIVE_MODELS = {Registration: ArchivedRegistration, Attendance: ArchivedAttendance, Feedback: ArchivedFeedback}
+
+# Report rollups, kept up to date by the write endpoints and rebuilt by
+# `flask rebuild-rollups`
+class EventStats(db.Model):
+    """Per-event counters"""
+    __tablename__ = 'event_stats'
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), primary_key=True)
+    registrations_count = db.Column(db.Integer, nullable=False, default=0)
+    attendance_count = db.Column(db.Integer, nullable=False, default=0)
+    feedback_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    # Feedback count per rating, the event's rating histogram
+    rating_1_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_2_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_3_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_4_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_5_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (db.Index('ix_event_stats_registrations', 'registrations_count'),)
+
+class FeedbackDailyStats(db.Model):
+    """Per-event rating histogram of the feedback given on each day"""
+    __tablename__ = 'feedback_daily_stats'
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), primary_key=True, autoincrement=False)
+    day = db.Column(db.Date, primary_key=True)
+    rating_1_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_2_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_3_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_4_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_5_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.Index('ix_feedback_daily_stats_day', 'day'),
+        {'sqlite_with_rowid': False},
+    )
+
+class StudentStats(db.Model):
+    """Per-student participation counters"""
+    __tablename__ = 'student_stats'
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), primary_key=True)
+    registrations_count = db.Column(db.Integer, nullable=False, default=0)
+    attendance_count = db.Column(db.Integer, nullable=False, default=0)
+    feedback_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (db.Index('ix_student_stats_attendance', 'attendance_count'),)
+
+class EventTypeStats(db.Model):
+    """Per-event-type totals"""
+    __tablename__ = 'event_type_stats'
+    type = db.Column(db.String(100), primary_key=True)
+    events_count = db.Column(db.Integer, nullable=False, default=0)
+    registrations_count = db.Column(db.Integer, nullable=False, default=0)
+    attendance_count = db.Column(db.Integer, nullable=False, default=0)
+    feedback_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+
+class MonthlyStats(db.Model):
+    """Per-month totals, split by event status"""
+    __tablename__ = 'monthly_stats'
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    status = db.Column(db.String(20), primary_key=True)
+    events_count = db.Column(db.Integer, nullable=False, default=0)
+    registrations_count = db.Column(db.Integer, nullable=False, default=0)
+    attendance_count = db.Column(db.Integer, nullable=False, default=0)
+    feedback_count = db.Column(db.Integer, nullable=False, default=0)
+
+# Directory of a sharded deployment: the college whose shard holds each event.
+# Event ids are allocated here, so they stay unique across shards.
+class EventDirectory(db.Model):
+    __tablename__ = 'event_directory'
+    event_id = db.Column(db.Integer, primary_key=True)
+    college_id = db.Column(db.Integer, nullable=False)
+
+class ReportJob(db.Model):
+    """A report computed in the background; its result is kept until expires_at"""
+    __tablename__ = 'report_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    report = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text, nullable=False)  # canonical JSON, so identical requests compare equal
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done or failed
+    result = db.Column(db.Text)  # JSON document served as is
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_report_jobs_report_params', 'report', 'params'),
+        db.Index('ix_report_jobs_status', 'status'),
+        db.Index('ix_report_jobs_expires_at', 'expires_at'),
+        # Ids of deleted jobs are never handed out again, so a client polling an
+        # expired job gets a 404 rather than someone else's report
+        {'sqlite_autoincrement': True},
+    )
+
+class SchemaMigration(db.Model):
+    """Migrations that have been applied to this database"""
+    __tablename__ = 'schema_migrations'
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Schema migrations
+# db.create_all() only creates missing tables, so anything added to an existing
+# table (indexes, columns, triggers) also needs an entry here. Each migration
+# runs inside the session's transaction and must be idempotent: on a fresh
+# database create_all has already done the work. Migrations replay in order
+# against the schema of their own time, so the rollups, which read and write
+# columns and tables of later migrations, are rebuilt only by the last
+# migration that changes them (8).
+def create_model_indexes(*models):
+    connection = db.session.connection()
+    for model in models:
+        for index in model.__table__.indexes:
+            index.create(connection, checkfirst=True)
+
+def create_model_tables(*models):
+    """Create new tables, with their indexes, on a database created before they existed"""
+    connection = db.session.connection()
+    for model in models:
+        model.__table__.create(connection, checkfirst=True)
+
+def add_missing_columns(model, *names):
+    """ALTER TABLE ... ADD COLUMN for each of the model's `names` columns the table does not have yet"""
+    table = model.__tablename__
+    existing = {row.name for row in db.session.execute(db.text(f'PRAGMA table_info({table})'))}
+    for name in names:
+        if name in existing:
+            continue
+        column = model.__table__.columns[name]
+        column_type = column.type.compile(dialect=db.session.get_bind().dialect)
+        db.session.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}'))
+
+# Full-text index over events. It is an external-content FTS5 table, so it
+# stores only the index; triggers keep it in sync with every write to events.
+EVENTS_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        title, description, venue, type,
+        content='events', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts(rowid, title, description, venue, type)
+        VALUES (new.id, new.title, new.description, new.venue, new.type);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, description, venue, type)
+        VALUES ('delete', old.id, old.title, old.description, old.venue, old.type);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE OF title, description, venue, type ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, description, venue, type)
+        VALUES ('delete', old.id, old.title, old.description, old.venue, old.type);
+        INSERT INTO events_fts(rowid, title, description, venue, type)
+        VALUES (new.id, new.title, new.description, new.venue, new.type);
+    END""",
+]
+
+def create_events_search_index():
+    for statement in EVENTS_FTS_DDL:
+        db.session.execute(db.text(statement))
+    rebuild_events_search_index()
+
+def rebuild_events_search_index():
+    """Re-index every event from the events table"""
+    db.session.execute(db.text("INSERT INTO events_fts(events_fts) VALUES ('rebuild')"))
+    mark_changed('events')
+
+MIGRATIONS = [
+    (1, 'secondary indexes for participation lookups and event listing',
+     lambda: create_model_indexes(Event, Student, Registration, Attendance, Feedback)),
+    (2, 'report rollups per event, student, event type and month',
+     lambda: (create_model_tables(EventStats, StudentStats, EventTypeStats, MonthlyStats),
+              create_model_indexes(EventStats, StudentStats))),
+    (3, 'full-text search index over events', create_events_search_index),
+    (4, 'event capacity and waitlist',
+     lambda: (add_missing_columns(Event, 'capacity'), create_model_tables(WaitlistEntry))),
+    (5, 'background report jobs', lambda: create_model_tables(ReportJob)),
+    (6, 'archive tables for participation rows of old events',
+     lambda: (add_missing_columns(Event, 'archived_at'), create_model_tables(*ARCHIVE_MODELS.values()))),
+    (7, 'student passwords for token login', lambda: add_missing_columns(Student, 'password_hash')),
+    (8, 'feedback rating histograms per event and per day',
+     lambda: (add_missing_columns(EventStats, *RATING_COUNT_COLUMNS), create_model_tables(FeedbackDailyStats),
+              rebuild_report_rollups())),
+]
+
+def apply_migrations():
+    """Apply pending migrations in order; returns the versions applied"""
+    applied = set(db.session.scalars(db.select(SchemaMigration.version)))
+    newly_applied = []
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        migrate()
+        db.session.execute(sqlite_insert(SchemaMigration).values(
+            version=version, name=name, applied_at=datetime.utcnow()
+        ).on_conflict_do_nothing())
+        db.session.commit()
+        newly_applied.append(version)
+    if newly_applied:
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+    return newly_applied
+
+# Read-only projections: list and report routes select plain columns and turn
+# rows into dicts with a mapping built once per route
+def iso_text(column):
+    """A stored date, time or datetime rendered in SQL the way isoformat() renders it"""
+    stored = db.type_coerce(column, db.String)
+    # SQLAlchemy stores microseconds always; isoformat() drops them when zero
+    trimmed = db.case(
+        (db.func.substr(stored, -7) == '.000000', db.func.substr(stored, 1, db.func.length(stored) - 7)),
+        else_=stored
+    )
+    return db.func.replace(trimmed, ' ', 'T').label(column.key)
+
+@functools.lru_cache(maxsize=4096)
+def parse_resources(resources):
+    """Parsed resources JSON, shared between rows and requests; callers must not modify it"""
+    return json.loads(resources) if resources else {}
+
+def row_mapper(keys, converters=None):
+    """A function turning a result row into a dict with `keys`, in column order.
+
+    `converters` maps a key to a function applied to its value.
+    """
+    keys = tuple(keys)
+    converters = converters or {}
+    converted = [(index, converters[key]) for index, key in enumerate(keys) if key in converters]
+    if not converted:
+        return lambda row: dict(zip(keys, row))
+    
+    def to_dict(row):
+        values = list(row)
+        for index, convert in converted:
+            values[index] = convert(values[index])
+        return dict(zip(keys, values))
+    return to_dict
+
+Projection = collections.namedtuple('Projection', ['columns', 'to_dict'])
+
+def projection(*columns, **converters):
+    """Columns to select and the mapping of their rows to dicts keyed by column name"""
+    return Projection(columns, row_mapper([column.key for column in columns], converters))
+
+# Shard routing
+# A request that concerns one event runs on the shard holding it. Requests
+# about an unknown event stay on the directory, whose event and participation
+# tables are empty, so they get the same "not found" answers as before.
+EVENT_COLLEGE_QUERY = db.select(EventDirectory.college_id).where(EventDirectory.event_id == db.bindparam('event_id'))
+
+def lookup_event_college(event_id):
+    """College whose shard holds an event, read from the directory"""
+    with directory_read_engine().connect() as connection:
+        return connection.execute(EVENT_COLLEGE_QUERY, {'event_id': event_id}).scalar()
+
+def route_to_event(event_id):
+    """Send the rest of this request's statements to the shard holding the event"""
+    router = app_state().shard_router
+    if router is None:
+        return
+    college_id = router.college_for_event(int(event_id))
+    if college_id is not None:
+        g.shard = router.shard(college_id)
+
+@bp.url_value_preprocessor
+def route_event_request(endpoint, values):
+    if values and 'event_id' in values:
+        route_to_event(values['event_id'])
+
+def all_shards():
+    """Every college's shard, in college id order"""
+    router = app_state().shard_router
+    with directory_read_engine().connect() as connection:
+        college_ids = connection.execute(db.select(College.id).order_by(College.id)).scalars().all()
+    return [router.shard(college_id) for college_id in college_ids]
+
+def each_database():
+    """Route the session to the main database, then to each shard in turn; callers commit per step"""
+    g.shard = None
+    yield None
+    if app_state().shard_router is not None:
+        for shard in all_shards():
+            g.shard = shard
+            yield shard
+        g.shard = None
+
+def split_by_shard(pairs):
+    """Group (event_id, ...) tuples by the shard holding the event; one None group when unsharded"""
+    router = app_state().shard_router
+    if router is None:
+        return {None: list(pairs)}
+    groups = {}
+    for pair in pairs:
+        college_id = router.college_for_event(pair[0])
+        groups.setdefault(router.shard(college_id) if college_id is not None else None, []).append(pair)
+    return groups
+
+def scatter_rows(statement, params=None, key=None, reverse=False):
+    """Rows of a read-only select from every shard, or from the one database when unsharded.
+    
+    With a `key`, each shard's rows must already be sorted by it and the
+    result is their merge; otherwise the shards' rows are concatenated.
+    """
+    if app_state().shard_router is None:
+        return read_rows(statement, params).all()
+    
+    results = []
+    for shard in all_shards():
+        with shard.read_engine.connect() as connection:
+            results.append(connection.execute(statement, params).all())
+    if key is None:
+        return list(itertools.chain.from_iterable(results))
+    return list(heapq.merge(*results, key=key, reverse=reverse))
+
+def sum_rows(rows, key):
+    """Add up rollup rows that share the `key` column, like one event type counted on several shards"""
+    totals = {}
+    for row in rows:
+        values = row._asdict()
+        total = totals.get(values[key])
+        if total is None:
+            totals[values[key]] = values
+            continue
+        for column, value in values.items():
+            if column != key:
+                total[column] += value
+    return list(totals.values())
+
+def copy_from_directory(model, condition):
+    """Copy the directory's rows matching `condition` into the routed shard; returns their ids"""
+    rows = db.session.execute(
+        db.select(*model.__table__.columns).where(condition), bind_arguments={'bind': directory_read_engine()}
+    ).all()
+    if rows:
+        db.session.execute(sqlite_insert(model).on_conflict_do_nothing(), [row._asdict() for row in rows])
+    return {row.id for row in rows}
+
+def add_student_replicas(student_ids):
+    """Copy students of other colleges into the routed shard; returns the ids found in the directory"""
+    if g.get('shard') is None or not student_ids:
+        return set()
+    return copy_from_directory(Student, Student.id.in_(student_ids))
+
+# Response cache
+# Cached GET routes name the data they read as tags, e.g. 'event:42' or
+# 'popularity'. Writes record the tags they touch on the session, and once the
+# transaction commits the data_changed signal carries them to the cache; a
+# rolled back transaction changes nothing. The 'all' tag covers every entry.
+unibuzz_signals = Namespace()
+data_changed = unibuzz_signals.signal('data-changed')
+
+def mark_changed(*tags):
+    """Record tags of data the current transaction writes, announced when it commits"""
+    db.session.info.setdefault('changed_tags', set()).update(tags)
+
+@sa_event.listens_for(RoutingSession, 'after_commit')
+def announce_changes(session):
+    tags = session.info.pop('changed_tags', None)
+    activity = session.info.pop('activity', None)
+    if not has_app_context():
+        return
+    if tags:
+        data_changed.send(current_app._get_current_object(), tags=tags)
+    if activity:
+        activity_committed.send(current_app._get_current_object(), activity=activity)
+
+@sa_event.listens_for(RoutingSession, 'after_rollback')
+def forget_changes(session):
+    session.info.pop('changed_tags', None)
+    session.info.pop('activity', None)
+
+def invalidate_cached_responses(sender, tags, **extra):
+    cache = sender.extensions['unibuzz'].response_cache
+    if cache is not None:
+        cache.invalidate(tags)
+
+def cached_response(*tags):
+    """Serve a GET route from the response cache while the data named by `tags` is unchanged.
+    
+    Tags are formatted with the view arguments, so 'event:{event_id}' names
+    the requested event. The cache key is the path plus the sorted query
+    arguments. Every response carries an ETag, and a request whose
+    If-None-Match holds it gets an empty 304.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def cached_view(**kwargs):
+            cache = app_state().response_cache
+            if cache is None or g.get('request_profiler') is not None:
+                return view(**kwargs)
+            
+            entry_tags = ('all', *(tag.format(**kwargs) for tag in tags))
+            versions = cache.versions(entry_tags)
+            if versions is None:
+                return view(**kwargs)
+            key = f'{request.path}?{urlencode(sorted(request.args.items(multi=True)))}'
+            entry = cache.get(key, versions)
+            if entry is not None:
+                response = current_app.response_class(entry.body, content_type=entry.content_type)
+                response.headers['X-Cache'] = 'HIT'
+            else:
+                response = current_app.make_response(view(**kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                entry = cache.set(key, response.get_data(), response.content_type, versions)
+                response.headers['X-Cache'] = 'MISS'
+            
+            # Clients may keep the body but must revalidate it on every use
+            response.set_etag(entry.etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response.make_conditional(request)
+        return cached_view
+    return decorator
+
+# Streaming exports
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+EXPORT_BATCH_SIZE = 1000
+
+def stream_export(query, export_format, filename, params=None):
+    """Stream the rows of a read-only query as CSV or NDJSON.
+
+    Rows are fetched from a server-side cursor in batches of EXPORT_BATCH_SIZE
+    and written out batch by batch, so memory stays flat however many rows
+    the query returns.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{export_format}', expected one of: {', '.join(EXPORT_FORMATS)}")
+    
+    def export_value(value):
+        return value.isoformat() if isinstance(value, (datetime, date, time)) else value
+    
+    def generate():
+        # A connection of its own: the request's session is removed before
+        # the response body has finished streaming
+        with get_read_engine().connect() as connection:
+            result = connection.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(query, params)
+            columns = list(result.keys())
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if export_format == 'csv':
+                writer.writerow(columns)
+            
+            for rows in result.partitions():
+                for row in rows:
+                    values = [export_value(value) for value in row]
+                    if export_format == 'csv':
+                        writer.writerow(values)
+                    else:
+                        buffer.write(json.dumps(dict(zip(columns, values))))
+                        buffer.write('\n')
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            
+            if buffer.tell():
+                yield buffer.getvalue()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}.{export_format}'}
+    )
+
+# Bulk write limits
+MAX_BULK_REGISTRATIONS = 5000
+BULK_INSERT_CHUNK_SIZE = 500
+
+def insert_ignoring_duplicates(model, rows):
+    """Insert participation rows in chunks, skipping (event_id, student_id) pairs that already exist.
+
+    Returns {(event_id, student_id): id} for the rows that were actually inserted.
+    """
+    inserted = {}
+    for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+        stmt = sqlite_insert(model).values(rows[start:start + BULK_INSERT_CHUNK_SIZE]).on_conflict_do_nothing(
+            index_elements=['event_id', 'student_id']
+        ).returning(model.id, model.event_id, model.student_id)
+        for row in db.session.execute(stmt):
+            inserted[(row.event_id, row.student_id)] = row.id
+    return inserted
+
+# SQLAlchemy's SQLite insert() (the one with ON CONFLICT) has no cache key,
+# so executing it directly compiles it again on every call. The hot write
+# statements are compiled once into text() constructs, which are cached.
+NAMED_SQLITE_DIALECT = sqlite_dialect.dialect(paramstyle='named')
+
+def precompile(stmt, bind_types):
+    """Compile a statement once into a text() statement binding the named parameters in `bind_types`"""
+    sql = str(stmt.compile(dialect=NAMED_SQLITE_DIALECT, column_keys=list(bind_types)))
+    return db.text(sql).bindparams(*(db.bindparam(name, type_=type_) for name, type_ in bind_types.items()))
+
+def participation_exists(model, event_id, student_id):
+    return db.select(model.id).where(model.event_id == event_id, model.student_id == student_id).exists()
+
+def event_is_archived(event_id):
+    return bool(read_execute(db.select(Event.archived_at.isnot(None)).where(Event.id == event_id)).scalar())
+
+def conditional_participation_insert(model, condition, *columns):
+    """One-row INSERT ... SELECT ... WHERE condition ON CONFLICT DO NOTHING RETURNING id.
+
+    Binds :event_id, :student_id and one parameter per extra column. It inserts
+    nothing, and returns no row, when the condition fails or the
+    (event_id, student_id) pair already exists.
+    """
+    bind_types = {name: getattr(model, name).type for name in ('event_id', 'student_id', *columns)}
+    stmt = sqlite_insert(model).from_select(
+        list(bind_types),
+        db.select(*(db.bindparam(name, type_=type_) for name, type_ in bind_types.items())).where(condition),
+        include_defaults=False
+    ).on_conflict_do_nothing(index_elements=['event_id', 'student_id']).returning(model.id)
+    return precompile(stmt, bind_types)
+
+EVENT_ID, STUDENT_ID = db.bindparam('event_id'), db.bindparam('student_id')
+
+# Seats are allocated against the registrations counter of the event's rollup
+# row, which every registration and cancellation updates in its own write
+# transaction. Those transactions hold the database's write lock from BEGIN,
+# so the check and the insert cannot interleave with another writer's.
+REGISTERED_COUNT = db.func.coalesce(
+    db.select(EventStats.registrations_count).where(EventStats.event_id == Event.id).scalar_subquery(),
+    db.literal_column('0')
+)
+SEAT_AVAILABLE = db.or_(Event.capacity.is_(None), Event.capacity > REGISTERED_COUNT)
+STUDENT_EXISTS = db.select(Student.id).where(Student.id == STUDENT_ID).exists()
+# Archived events take no new participation. Attendance and feedback need a
+# live registration or attendance row, which archived events no longer have.
+EVENT_LIVE = Event.archived_at.is_(None)
+REGISTRATION_INSERT = conditional_participation_insert(
+    Registration,
+    db.select(Event.id).where(Event.id == EVENT_ID, EVENT_LIVE, SEAT_AVAILABLE).exists() & STUDENT_EXISTS,
+    'registered_at'
+)
+WAITLIST_INSERT = conditional_participation_insert(
+    WaitlistEntry,
+    db.select(Event.id).where(Event.id == EVENT_ID, EVENT_LIVE, ~SEAT_AVAILABLE).exists() & STUDENT_EXISTS
+    & ~participation_exists(Registration, EVENT_ID, STUDENT_ID),
+    'created_at'
+)
+WAITLIST_POSITION_QUERY = db.select(db.func.count(WaitlistEntry.id)).where(
+    WaitlistEntry.event_id == EVENT_ID, WaitlistEntry.id <= db.bindparam('waitlist_id')
+)
+FREE_SEATS_QUERY = db.select(Event.capacity - REGISTERED_COUNT).where(Event.id == EVENT_ID)
+ATTENDANCE_INSERT = conditional_participation_insert(
+    Attendance, participation_exists(Registration, EVENT_ID, STUDENT_ID), 'attended_at'
+)
+FEEDBACK_INSERT = conditional_participation_insert(
+    Feedback, participation_exists(Attendance, EVENT_ID, STUDENT_ID), 'rating', 'comment', 'created_at'
+)
+
+def count_per_event(pairs):
+    """Count (event_id, student_id) pairs per event"""
+    counts = {}
+    for event_id, _ in pairs:
+        counts[event_id] = counts.get(event_id, 0) + 1
+    return counts
+
+# Report rollups
+@functools.lru_cache(maxsize=None)
+def counter_upsert(model, key_columns, counters):
+    """Precompiled upsert adding `counters` to a rollup row; a new row starts every other counter at zero"""
+    stmt = sqlite_insert(model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={name: getattr(model, name) + stmt.excluded[name] for name in counters}
+    )
+    return precompile(stmt, {column.name: column.type for column in model.__table__.columns})
+
+def upsert_counters(model, key_columns, rows):
+    """Add counter deltas to rollup rows, creating missing rows.
+
+    Every row in `rows` holds the key columns plus the same counter columns.
+    Runs as part of the caller's transaction.
+    """
+    if not rows:
+        return
+    counters = tuple(name for name in rows[0] if name not in key_columns)
+    zeros = dict.fromkeys((column.name for column in model.__table__.columns), 0)
+    db.session.execute(counter_upsert(model, tuple(key_columns), counters), [{**zeros, **row} for row in rows])
+
+def event_month(event_date):
+    return event_date.strftime('%Y-%m')
+
+# Cached report routes that read each kind of participation counter; the
+# per-event and per-student routes read all of them too
+PARTICIPATION_REPORT_TAGS = {
+    'registrations': ('popularity', 'event-types', 'monthly', 'participation'),
+    'attendance': ('top-students', 'event-types', 'monthly', 'participation'),
+    'feedback': ('event-types', 'monthly', 'participation')
+}
+
+def record_participation(kind, pairs, ratings=None, sign=1):
+    """Update every rollup for newly written participation rows.
+
+    `kind` is 'registrations', 'attendance' or 'feedback', `pairs` the
+    (event_id, student_id) pairs that were inserted and, for feedback,
+    `ratings` maps each pair to its rating. With sign=-1 the pairs were
+    deleted instead (cancelled registrations).
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return
+    column = f'{kind}_count'
+    
+    event_counts = {event_id: sign * count for event_id, count in count_per_event(pairs).items()}
+    rating_sums, rating_counts = {}, {}
+    if ratings:
+        for (event_id, student_id) in pairs:
+            rating = ratings[(event_id, student_id)]
+            rating_sums[event_id] = rating_sums.get(event_id, 0) + sign * rating
+            histogram = rating_counts.setdefault(event_id, dict.fromkeys(RATING_COUNT_COLUMNS, 0))
+            histogram[f'rating_{rating}_count'] += sign
+    
+    def with_rating(row, key):
+        if ratings:
+            row['rating_sum'] = rating_sums.get(key, 0)
+        return row
+    
+    upsert_counters(EventStats, ['event_id'], [
+        {**with_rating({'event_id': event_id, column: count}, event_id), **rating_counts.get(event_id, {})}
+        for event_id, count in event_counts.items()
+    ])
+    # Feedback rows are stamped with the UTC time they were written
+    today = datetime.utcnow().date()
+    upsert_counters(FeedbackDailyStats, ['event_id', 'day'], [
+        {'event_id': event_id, 'day': today, **histogram} for event_id, histogram in rating_counts.items()
+    ])
+    
+    student_counts = {}
+    for _, student_id in pairs:
+        student_counts[student_id] = student_counts.get(student_id, 0) + sign
+    upsert_counters(StudentStats, ['student_id'], [
+        {'student_id': student_id, column: count} for student_id, count in student_counts.items()
+    ])
+    
+    # Fold the per-event counts into the type and month buckets of each event
+    type_rows, month_rows = {}, {}
+    events = db.session.execute(
+        db.select(Event.id, Event.type, Event.date, Event.status).where(Event.id.in_(event_counts))
+    ).all()
+    for event in events:
+        type_row = type_rows.setdefault(event.type, with_rating({'type': event.type, column: 0}, None))
+        type_row[column] += event_counts[event.id]
+        if ratings:
+            type_row['rating_sum'] += rating_sums.get(event.id, 0)
+        
+        month_key = (event_month(event.date), event.status)
+        month_row = month_rows.setdefault(month_key, {'month': month_key[0], 'status': month_key[1], column: 0})
+        month_row[column] += event_counts[event.id]
+    
+    upsert_counters(EventTypeStats, ['type'], list(type_rows.values()))
+    upsert_counters(MonthlyStats, ['month', 'status'], list(month_rows.values()))
+    
+    mark_changed(
+        *PARTICIPATION_REPORT_TAGS[kind],
+        *(f'event:{event_id}' for event_id in event_counts),
+        *(f'student:{student_id}' for student_id in student_counts)
+    )
+    queue_activity(kind, pairs, ratings, sign)
+
+def record_event_buckets(event, sign=1):
+    """Add (sign=1) or remove (sign=-1) an event and its counters in its type and month buckets"""
+    stats = db.session.get(EventStats, event.id)
+    counts = {
+        'registrations_count': stats.registrations_count if stats else 0,
+        'attendance_count': stats.attendance_count if stats else 0,
+        'feedback_count': stats.feedback_count if stats else 0
+    }
+    counts = {name: sign * value for name, value in counts.items()}
+    upsert_counters(EventTypeStats, ['type'], [{
+        'type': event.type,
+        'events_count': sign,
+        **counts,
+        'rating_sum': sign * (stats.rating_sum if stats else 0)
+    }])
+    upsert_counters(MonthlyStats, ['month', 'status'], [{
+        'month': event_month(event.date),
+        'status': event.status,
+        'events_count': sign,
+        **counts
+    }])
+    mark_changed('events', f'event:{event.id}', 'popularity', 'event-types', 'monthly')
+
+def event_stats_columns():
+    """Counter columns for a query that outer joins EventStats"""
+    return [
+        db.func.coalesce(EventStats.registrations_count, 0).label('registrations_count'),
+        db.func.coalesce(EventStats.attendance_count, 0).label('attendance_count'),
+        db.func.coalesce(EventStats.feedback_count, 0).label('feedback_count'),
+        db.func.coalesce(EventStats.rating_sum, 0).label('rating_sum')
+    ]
+
+def rating_count_columns():
+    """Rating histogram columns for a query that outer joins EventStats"""
+    return [db.func.coalesce(getattr(EventStats, name), 0).label(name) for name in RATING_COUNT_COLUMNS]
+
+def get_event_stats_or_404(event_id, *columns):
+    """Fetch an event's title and counters, plus any extra `columns`, in one lookup"""
+    stats = read_execute(db.select(Event.title, *event_stats_columns(), *columns).outerjoin(
+        EventStats, EventStats.event_id == Event.id
+    ).where(Event.id == event_id)).first()
+    if stats is None:
+        abort(404)
+    return stats
+
+def rebuild_report_rollups():
+    """Recompute every rollup from the participation tables, in the caller's transaction"""
+    # Archived rows still count: the live table's count plus its archive's
+    def count_for(model, key, owner_id):
+        live, archived = (
+            db.select(db.func.count()).select_from(table).where(getattr(table, key) == owner_id).scalar_subquery()
+            for table in (model, ARCHIVE_MODELS[model])
+        )
+        return live + archived
+    
+    live_ratings, archived_ratings = (
+        db.select(db.func.coalesce(db.func.sum(table.rating), 0)).where(table.event_id == Event.id).scalar_subquery()
+        for table in (Feedback, ArchivedFeedback)
+    )
+    rating_sum = live_ratings + archived_ratings
+    
+    for model in (EventStats, StudentStats, EventTypeStats, MonthlyStats, FeedbackDailyStats):
+        db.session.execute(db.delete(model))
+    
+    # Daily histograms first; each event's histogram is then the sum of its
+    # days. Feedback without a timestamp counts on the day of its event.
+    ratings = db.union_all(*(
+        db.select(
+            table.event_id, table.rating, db.func.coalesce(db.func.date(table.created_at), Event.date).label('day')
+        ).join(Event, table.event_id == Event.id)
+        for table in (Feedback, ArchivedFeedback)
+    )).subquery()
+    db.session.execute(db.insert(FeedbackDailyStats).from_select(
+        ['event_id', 'day', *RATING_COUNT_COLUMNS],
+        db.select(
+            ratings.c.event_id,
+            ratings.c.day,
+            *(db.func.sum(db.case((ratings.c.rating == rating, 1), else_=0)) for rating in RATINGS)
+        ).group_by(ratings.c.event_id, ratings.c.day)
+    ))
+    rating_counts = [
+        db.select(db.func.coalesce(db.func.sum(getattr(FeedbackDailyStats, name)), 0)).where(
+            FeedbackDailyStats.event_id == Event.id
+        ).scalar_subquery()
+        for name in RATING_COUNT_COLUMNS
+    ]
+    
+    db.session.execute(db.insert(EventStats).from_select(
+        ['event_id', 'registrations_count', 'attendance_count', 'feedback_count', 'rating_sum', *RATING_COUNT_COLUMNS],
+        db.select(
+            Event.id,
+            count_for(Registration, 'event_id', Event.id),
+            count_for(Attendance, 'event_id', Event.id),
+            count_for(Feedback, 'event_id', Event.id),
+            rating_sum,
+            *rating_counts
+        )
+    ))
+    db.session.execute(db.insert(StudentStats).from_select(
+        ['student_id', 'registrations_count', 'attendance_count', 'feedback_count'],
+        db.select(
+            Student.id,
+            count_for(Registration, 'student_id', Student.id),
+            count_for(Attendance, 'student_id', Student.id),
+            count_for(Feedback, 'student_id', Student.id)
+        )
+    ))
+    
+    totals = [
+        db.func.count(Event.id),
+        db.func.sum(EventStats.registrations_count),
+        db.func.sum(EventStats.attendance_count),
+        db.func.sum(EventStats.feedback_count)
+    ]
+    db.session.execute(db.insert(EventTypeStats).from_select(
+        ['type', 'events_count', 'registrations_count', 'attendance_count', 'feedback_count', 'rating_sum'],
+        db.select(Event.type, *totals, db.func.sum(EventStats.rating_sum)).join(
+            EventStats, EventStats.event_id == Event.id
+        ).group_by(Event.type)
+    ))
+    month = db.func.strftime('%Y-%m', Event.date)
+    db.session.execute(db.insert(MonthlyStats).from_select(
+        ['month', 'status', 'events_count', 'registrations_count', 'attendance_count', 'feedback_count'],
+        db.select(month, Event.status, *totals).join(
+            EventStats, EventStats.event_id == Event.id
+        ).group_by(month, Event.status)
+    ))
+    mark_changed('all')
+
+# Live feed
+# Participation writes queue a message per (event, student) pair for events
+# someone is streaming, with the event's counters as of the write. Once the
+# transaction commits, activity_committed hands them to the app's ChangeBus,
+# which sends them to the event's GET /events/<id>/stream subscribers.
+activity_committed = unibuzz_signals.signal('activity-committed')
+ACTIVITY_KINDS = {'registrations': 'registration', 'attendance': 'attendance', 'feedback': 'feedback'}
+LIVE_COUNTS = projection(Event.id.label('event_id'), *event_stats_columns()[:3])
+LIVE_COUNTS_QUERY = db.select(*LIVE_COUNTS.columns).select_from(Event).outerjoin(
+    EventStats, EventStats.event_id == Event.id
+).where(Event.id.in_(db.bindparam('event_ids', expanding=True)))
+LIVE_STUDENT = projection(Student.id.label('student_id'), Student.name, Student.srn, Student.email)
+LIVE_STUDENT_QUERY = db.select(*LIVE_STUDENT.columns).where(Student.id.in_(db.bindparam('student_ids', expanding=True)))
+
+def live_counts_by_event(rows):
+    counts = {}
+    for row in rows:
+        row = LIVE_COUNTS.to_dict(row)
+        counts[row.pop('event_id')] = row
+    return counts
+
+def queue_activity(kind, pairs, ratings=None, sign=1):
+    """Queue live feed messages for participation rows this transaction wrote, for events being streamed"""
+    live_feed = app_state().live_feed
+    pairs = [pair for pair in pairs if live_feed.watched(pair[0])]
+    if not pairs:
+        return
+    
+    connection = db.session.connection()
+    counts = live_counts_by_event(connection.execute(
+        LIVE_COUNTS_QUERY, {'event_ids': list({pair[0] for pair in pairs})}
+    ))
+    students = {row[0]: LIVE_STUDENT.to_dict(row) for row in connection.execute(
+        LIVE_STUDENT_QUERY, {'student_ids': list({pair[1] for pair in pairs})}
+    )}
+    message_kind = ACTIVITY_KINDS[kind] if sign > 0 else 'cancellation'
+    at = datetime.utcnow().isoformat()
+    activity = db.session.info.setdefault('activity', [])
+    for event_id, student_id in pairs:
+        data = {'event_id': event_id, 'student': students.get(student_id), 'at': at, 'counts': counts[event_id]}
+        if ratings:
+            data['rating'] = ratings[(event_id, student_id)]
+        activity.append((event_id, message_kind, data))
+
+def publish_activity(sender, activity, **extra):
+    live_feed = sender.extensions['unibuzz'].live_feed
+    for event_id, kind, data in activity:
+        live_feed.publish(event_id, kind, data)
+
+# Archival
+# Participation rows of Completed and Cancelled events dated before a cutoff
+# move to the archive tables, a chunk of events per write transaction, and
+# the events are stamped archived_at. The rollups keep counting the moved
+# rows, so the report routes return the same totals, and the per-event lists
+# and report jobs read the live and archive tables together.
+ARCHIVABLE_STATUSES = ('Completed', 'Cancelled')
+ARCHIVE_CHUNK_SIZE = 50
+VACUUM_STEP_PAGES = 2000
+
+def archive_events(cutoff, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """Move the participation rows of finished events dated before `cutoff` to the archive tables.
+    
+    Each chunk of `chunk_size` events commits on its own, so writers wait at
+    most one chunk for the lock and an interrupted run keeps the chunks it
+    finished. Waitlists of the archived events are dropped. Returns a
+    Counter of archived events and moved rows per live table.
+    """
+    moved = collections.Counter()
+    while True:
+        event_ids = db.session.scalars(db.select(Event.id).where(
+            Event.status.in_(ARCHIVABLE_STATUSES), Event.date < cutoff, EVENT_LIVE
+        ).limit(chunk_size)).all()
+        if not event_ids:
+            db.session.rollback()
+            return moved
+        
+        for model, archive_model in ARCHIVE_MODELS.items():
+            columns = [column.name for column in archive_model.__table__.columns]
+            db.session.execute(db.insert(archive_model).prefix_with('OR IGNORE').from_select(
+                columns, db.select(*(getattr(model, name) for name in columns)).where(model.event_id.in_(event_ids))
+            ))
+            moved[model.__tablename__] += db.session.execute(
+                db.delete(model).where(model.event_id.in_(event_ids))
+            ).rowcount
+        db.session.execute(db.delete(WaitlistEntry).where(WaitlistEntry.event_id.in_(event_ids)))
+        db.session.execute(db.update(Event).where(Event.id.in_(event_ids)).values(archived_at=datetime.utcnow()))
+        mark_changed('student-feeds', *(f'event:{event_id}' for event_id in event_ids))
+        db.session.commit()
+        moved['events'] += len(event_ids)
+
+def compact_database(vacuum=False):
+    """Refresh planner statistics and give free pages back to the file system; returns the bytes reclaimed.
+    
+    With auto_vacuum=INCREMENTAL free pages are released VACUUM_STEP_PAGES
+    at a time, each step a short write of its own, so requests keep running.
+    Databases created before that setting need one full VACUUM (`vacuum`),
+    which converts them but holds the write lock until it finishes.
+    """
+    connection = db.session.get_bind().raw_connection()
+    try:
+        cursor = connection.cursor()
+        
+        def size():
+            return cursor.execute('PRAGMA page_count').fetchone()[0] * cursor.execute('PRAGMA page_size').fetchone()[0]
+        
+        before = size()
+        if vacuum:
+            cursor.execute('VACUUM')
+        elif cursor.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            while cursor.execute('PRAGMA freelist_count').fetchone()[0]:
+                # executescript steps the pragma to completion; execute() frees a single page
+                cursor.executescript(f'PRAGMA incremental_vacuum({VACUUM_STEP_PAGES});')
+        for model in (*ARCHIVE_MODELS, *ARCHIVE_MODELS.values(), WaitlistEntry):
+            cursor.execute(f'ANALYZE {model.__tablename__}')
+        cursor.execute('PRAGMA wal_checkpoint(PASSIVE)')
+        reclaimed = before - size()
+        cursor.close()
+        return reclaimed
+    finally:
+        connection.close()
+
+# Full-text search helpers
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+# Column weights for bm25(), in events_fts column order: title, description, venue, type
+SEARCH_COLUMN_WEIGHTS = (10.0, 1.0, 2.0, 5.0)
+
+def build_match_query(text, prefix=False):
+    """Turn user input into an FTS5 query that matches every word.
+
+    Each word is quoted so FTS5 operators and punctuation in the input are
+    taken literally. With prefix=True the last word also matches as a
+    prefix, for typeahead.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        raise ValueError('Search query must contain at least one word')
+    terms = [f'"{word}"' for word in words]
+    if prefix:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+# Pagination and projection helpers for GET /events
+DEFAULT_EVENTS_PAGE_SIZE = 50
+MAX_EVENTS_PAGE_SIZE = 500
+
+EVENT_LIST_FIELDS = {
+    'id': Event.id,
+    'title': Event.title,
+    'description': Event.description,
+    'type': Event.type,
+    'date': Event.date,
+    'time': Event.time,
+    'venue': Event.venue,
+    'status': Event.status,
+    'capacity': Event.capacity,
+    'resources': Event.resources,
+    'college_name': College.name
+}
+
+def parse_event_fields(fields_param):
+    """Return the requested event fields, or all of them when none are given"""
+    if not fields_param:
+        return list(EVENT_LIST_FIELDS)
+    
+    fields = [field.strip() for field in fields_param.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in EVENT_LIST_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+# Each filter binds its own parameters, so one prebuilt statement serves
+# every request that uses the same fields and filters
+EVENT_LIST_FILTERS = {
+    'type': Event.type == db.bindparam('type'),
+    'date': Event.date == db.bindparam('date'),
+    'status': Event.status == db.bindparam('status'),
+    'cursor': db.tuple_(Event.date, Event.time, Event.id) > db.tuple_(
+        db.bindparam('cursor_date', type_=Event.date.type),
+        db.bindparam('cursor_time', type_=Event.time.type),
+        db.bindparam('cursor_id')
     )
+}
+
+@functools.lru_cache(maxsize=256)
+def event_list_query(fields, filters):
+    """Page query and row mapping for a tuple of requested fields and a tuple of the filters in use.
+
+    The (date, time, id) sort key is always selected, after the requested
+    fields, so the next cursor can be built from the last row of a page.
+    """
+    def column(field):
+        return iso_text(EVENT_LIST_FIELDS[field]) if field in ('date', 'time') else EVENT_LIST_FIELDS[field].label(field)
+    
+    columns = [column(field) for field in fields]
+    columns += [column(field) for field in ('id', 'date', 'time') if field not in fields]
+    query = db.select(*columns).select_from(Event)
+    
+    # College names come from the same query instead of one lazy load per event
+    if 'college_name' in fields:
+        query = query.join(College, Event.college_id == College.id)
+    
+    query = query.where(*(EVENT_LIST_FILTERS[name] for name in filters))
+    query = query.order_by(Event.date, Event.time, Event.id).limit(db.bindparam('limit'))
+    return query, row_mapper(fields, {'resources': parse_resources})
+
+def encode_events_cursor(row):
+    """Encode the (date, time, id) sort key of the last row on a page"""
+    key = [row.date, row.time, row.id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_events_cursor(cursor):
+    """Decode a cursor produced by encode_events_cursor"""
+    try:
+        event_date, event_time, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return date.fromisoformat(event_date), time.fromisoformat(event_time), int(event_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
 
-# Helper function to serialize datetime objects
-def serialize_datetime(obj):
-    if isinstance(obj, (datetime, date, time)):
-        return obj.isoformat()
-    return str(obj)
+# Prebuilt statements and row mappings of the read-only routes
+EVENT_DETAIL = projection(
+    Event.id, Event.title, Event.description, Event.type, iso_text(Event.date), iso_text(Event.time), Event.venue,
+    Event.status, Event.capacity, Event.resources, College.name.label('college_name'), *event_stats_columns()[:2],
+    db.select(db.func.count(WaitlistEntry.id)).where(WaitlistEntry.event_id == Event.id).scalar_subquery().label(
+        'waitlist_count'
+    ),
+    resources=parse_resources
+)
+EVENT_DETAIL_QUERY = db.select(*EVENT_DETAIL.columns).select_from(Event).join(
+    College, Event.college_id == College.id
+).outerjoin(
+    EventStats, EventStats.event_id == Event.id
+).where(Event.id == db.bindparam('event_id'))
+
+def participation_list(model, columns):
+    """Projection and query of one event's participation rows, joined to their students.
+    
+    `columns(table)` gives the columns to select from the live table or its
+    archive; the query reads both with UNION ALL.
+    """
+    query = db.union_all(*(
+        db.select(*columns(table)).select_from(table).join(Student, table.student_id == Student.id).where(
+            table.event_id == db.bindparam('event_id')
+        )
+        for table in (model, ARCHIVE_MODELS[model])
+    ))
+    return projection(*query.selected_columns), query
+
+REGISTRATION_LIST, REGISTRATION_LIST_QUERY = participation_list(Registration, lambda table: (
+    Student.id.label('student_id'), Student.name, Student.srn, Student.email, iso_text(table.registered_at)
+))
+ATTENDANCE_LIST, ATTENDANCE_LIST_QUERY = participation_list(Attendance, lambda table: (
+    Student.id.label('student_id'), Student.name, Student.srn, Student.email, iso_text(table.attended_at)
+))
+FEEDBACK_LIST, FEEDBACK_LIST_QUERY = participation_list(Feedback, lambda table: (
+    Student.name.label('student_name'), table.rating, table.comment, iso_text(table.created_at)
+))
+
+WAITLIST_LIST = projection(
+    Student.id.label('student_id'), Student.name, Student.srn, Student.email, iso_text(WaitlistEntry.created_at)
+)
+WAITLIST_LIST_QUERY = db.select(*WAITLIST_LIST.columns).select_from(WaitlistEntry).join(
+    Student, WaitlistEntry.student_id == Student.id
+).where(WaitlistEntry.event_id == db.bindparam('event_id')).order_by(WaitlistEntry.id)
+
+# Walks the registrations_count index of the per-event rollup; LIMIT -1 is no limit
+POPULARITY_LIST = projection(
+    Event.id.label('event_id'), Event.title, Event.type, iso_text(Event.date), College.name.label('college_name'),
+    EventStats.registrations_count.label('registration_count')
+)
+POPULARITY_LIST_QUERY = db.select(*POPULARITY_LIST.columns).select_from(EventStats).join(
+    Event, EventStats.event_id == Event.id
+).join(
+    College, Event.college_id == College.id
+).order_by(EventStats.registrations_count.desc()).limit(db.bindparam('limit'))
+POPULARITY_BY_TYPE_QUERY = POPULARITY_LIST_QUERY.where(Event.type == db.bindparam('type'))
 
 # Routes
 
-# Auth Routes (Mock)
-@app.route('/auth/login', methods=['POST'])
-def login():
-    """Mock login endpoint - returns static token for testing"""
-    data = request.get_json()
-    email = data.get('email')
-    password = data.get('password')
+# Auth Routes
+# With AUTH_REQUIRED, every route but login needs an `Authorization: Bearer`
+# token from POST /auth/login or `flask issue-token`. A token is verified from
+# its signature alone, without a database lookup. Students may write only
+# their own registrations and feedback; organizers and admins may write anything.
+TOKEN_ROLES = ('student', 'organizer', 'admin')
+PUBLIC_ENDPOINTS = {'unibuzz.login'}
+STUDENT_WRITE_ENDPOINTS = {'unibuzz.register_student', 'unibuzz.cancel_registration', 'unibuzz.submit_feedback'}
+# Browsers' EventSource cannot send headers, so streams also take ?access_token=
+QUERY_TOKEN_ENDPOINTS = {'unibuzz.stream_event_activity'}
+
+def issue_token(student_id, college_id, role, ttl=None):
+    claims = {'student_id': student_id, 'college_id': college_id, 'role': role}
+    return app_state().token_signer.issue(claims, ttl=ttl)
+
+@functools.lru_cache(maxsize=None)
+def unknown_user_password_hash():
+    """Hash checked for unknown emails, so that login takes as long as for a known one"""
+    return generate_password_hash(os.urandom(16).hex())
+
+def auth_error(message, status):
+    return jsonify({'success': False, 'message': message}), status, {'WWW-Authenticate': 'Bearer'}
+
+def acting_student_id(req):
+    """Student a write request acts for, from the URL or the JSON body"""
+    student_id = req.view_args.get('student_id') if req.view_args else None
+    if student_id is None:
+        student_id = (req.get_json(silent=True) or {}).get('student_id')
+    try:
+        return int(student_id)
+    except (TypeError, ValueError):
+        return None
+
+def authenticate_request(token_signer):
+    """Check the request's bearer token, leaving its claims in g.auth; installed by create_app with AUTH_REQUIRED"""
+    # Every context-local lookup costs about a microsecond, so each is made once
+    req = request._get_current_object()
+    endpoint = req.endpoint
+    if endpoint in PUBLIC_ENDPOINTS:
+        return None
+    scheme, _, token = req.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' and endpoint in QUERY_TOKEN_ENDPOINTS:
+        scheme, token = 'bearer', req.args.get('access_token', '')
+    if scheme.lower() != 'bearer' or not token:
+        return auth_error('Authentication required', 401)
+    try:
+        claims = token_signer.verify(token)
+    except InvalidToken as e:
+        return auth_error(str(e), 401)
     
-    # Mock authentication - in real app, verify credentials
-    if email and password:
+    if claims['role'] == 'student' and req.method != 'GET' and (
+        endpoint not in STUDENT_WRITE_ENDPOINTS or acting_student_id(req) != claims['student_id']
+    ):
+        return auth_error('Not allowed for this token', 403)
+    g.auth = claims
+    return None
+
+@bp.route('/auth/login', methods=['POST'])
+def login():
+    """Exchange a student's email and password for a signed token"""
+    try:
+        data = request.get_json()
+        email = data.get('email')
+        password = data.get('password')
+        if not email or not password:
+            return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
+        
+        # On the read bind: a write transaction would hold the database lock while the hash is checked
+        student = read_execute(
+            db.select(Student.id, Student.college_id, Student.name, Student.password_hash).where(Student.email == email)
+        ).first()
+        if student is None or not student.password_hash:
+            check_password_hash(unknown_user_password_hash(), password)
+            return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
+        if not check_password_hash(student.password_hash, password):
+            return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
+        
         return jsonify({
             'success': True,
-            'token': 'mock_jwt_token_12345',
+            'token': issue_token(student.id, student.college_id, 'student'),
+            'token_type': 'Bearer',
+            'expires_in': current_app.config['AUTH_TOKEN_TTL'],
             'user': {
+                'id': student.id,
+                'name': student.name,
                 'email': email,
+                'college_id': student.college_id,
                 'role': 'student'
             }
         }), 200
-    
-    return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
 
 # Event Routes
-@app.route('/events', methods=['POST'])
+def add_event(**columns):
+    """Add an event with its rollup rows to the session.
+    
+    When sharded, the directory allocates the id and the request is routed
+    to the college's shard before the event is written there.
+    """
+    router = app_state().shard_router
+    if router is not None:
+        columns['id'] = db.session.execute(
+            db.insert(EventDirectory).values(college_id=columns['college_id']).returning(EventDirectory.event_id),
+            bind_arguments={'bind': db.engine}
+        ).scalar()
+        g.shard = router.shard(columns['college_id'])
+    
+    event = Event(**columns)
+    db.session.add(event)
+    db.session.flush()
+    db.session.add(EventStats(event_id=event.id))
+    record_event_buckets(event)
+    return event
+
+def parse_capacity(value):
+    """Seat count from a request: a positive integer, or None for unlimited"""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError('capacity must be a positive integer or null')
+    return value
+
+@bp.route('/events', methods=['POST'])
 def create_event():
     """Create a new event"""
     try:
@@ -127,7 +1681,7 @@ def create_event():
         event_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
         event_time = datetime.strptime(data['time'], '%H:%M').time()
         
-        event = Event(
+        event = add_event(
             college_id=data['college_id'],
             title=data['title'],
             description=data.get('description', ''),
@@ -136,10 +1690,9 @@ def create_event():
             time=event_time,
             venue=data['venue'],
             status=data.get('status', 'Active'),
+            capacity=parse_capacity(data.get('capacity')),
             resources=json.dumps(data.get('resources', {}))
         )
-        
-        db.session.add(event)
         db.session.commit()
         
         return jsonify({
@@ -152,80 +1705,138 @@ def create_event():
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 400
 
-@app.route('/events', methods=['GET'])
+@bp.route('/events', methods=['GET'])
+@cached_response('events')
 def get_events():
-    """Get all events with optional filters"""
+    """Get events with optional filters, one keyset-paginated page at a time"""
     try:
         # Get query parameters
         event_type = request.args.get('type')
         event_date = request.args.get('date')
         status = request.args.get('status', 'Active')
+        fields = parse_event_fields(request.args.get('fields'))
+        limit = min(request.args.get('limit', DEFAULT_EVENTS_PAGE_SIZE, type=int), MAX_EVENTS_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError('limit must be a positive integer')
         
-        # Build query
-        query = Event.query
-        
+        params = {'limit': limit + 1}
         if event_type:
-            query = query.filter(Event.type == event_type)
+            params['type'] = event_type
         if event_date:
-            query = query.filter(Event.date == datetime.strptime(event_date, '%Y-%m-%d').date())
+            params['date'] = datetime.strptime(event_date, '%Y-%m-%d').date()
         if status:
-            query = query.filter(Event.status == status)
+            params['status'] = status
+        
+        filters = [name for name in ('type', 'date', 'status') if name in params]
+        cursor = request.args.get('cursor')
+        if cursor:
+            params['cursor_date'], params['cursor_time'], params['cursor_id'] = decode_events_cursor(cursor)
+            filters.append('cursor')
         
-        events = query.all()
+        # Each shard returns its own first page; merged, they give the global one
+        query, to_dict = event_list_query(tuple(fields), tuple(filters))
+        rows = scatter_rows(query, params, key=lambda row: (row.date, row.time, row.id))[:limit + 1]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         
+        events_list = [to_dict(row) for row in rows]
+        next_cursor = encode_events_cursor(rows[-1]) if has_more else None
+        
+        return jsonify({'success': True, 'events': events_list, 'next_cursor': next_cursor}), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@bp.route('/events/search', methods=['GET'])
+@cached_response('events')
+def search_events():
+    """Full-text search over event title, description, venue and type, best matches first"""
+    try:
+        match_query = build_match_query(
+            request.args.get('q', ''),
+            prefix=request.args.get('prefix', 'false').lower() in ('1', 'true', 'yes')
+        )
+        status = request.args.get('status', 'Active')
+        limit = min(request.args.get('limit', DEFAULT_SEARCH_PAGE_SIZE, type=int), MAX_SEARCH_PAGE_SIZE)
+        offset = request.args.get('offset', 0, type=int)
+        if limit < 1 or offset < 0:
+            raise ValueError('limit must be positive and offset non-negative')
+        
+        # Ordering by the hidden rank column lets FTS5 return rows already
+        # sorted; the rank MATCH clause sets the bm25 column weights it uses.
+        # Shards each return their first offset + limit matches to be merged.
+        sharded = app_state().shard_router is not None
+        results = scatter_rows(db.text("""
+            SELECT events.id, events.title, events.type, events.date, events.time, events.venue,
+                   events.status, colleges.name AS college_name, events_fts.rank,
+                   snippet(events_fts, -1, '<mark>', '</mark>', '…', 12) AS snippet
+            FROM events_fts
+            JOIN events ON events.id = events_fts.rowid
+            JOIN colleges ON colleges.id = events.college_id
+            WHERE events_fts MATCH :match_query AND events_fts.rank MATCH :ranking
+              AND (:status = '' OR events.status = :status)
+            ORDER BY events_fts.rank
+            LIMIT :limit OFFSET :offset
+        """), {
+            'match_query': match_query,
+            'ranking': f"bm25({', '.join(str(weight) for weight in SEARCH_COLUMN_WEIGHTS)})",
+            'status': status or '',
+            'limit': offset + limit + 1 if sharded else limit + 1,
+            'offset': 0 if sharded else offset
+        }, key=lambda row: row.rank)
+        if sharded:
+            results = results[offset:]
+        
+        has_more = len(results) > limit
         events_list = []
-        for event in events:
+        for event in results[:limit]:
             events_list.append({
                 'id': event.id,
                 'title': event.title,
-                'description': event.description,
                 'type': event.type,
-                'date': serialize_datetime(event.date),
-                'time': serialize_datetime(event.time),
+                'date': event.date,
+                'time': event.time[:8],
                 'venue': event.venue,
                 'status': event.status,
-                'resources': json.loads(event.resources) if event.resources else {},
-                'college_name': event.college.name
+                'college_name': event.college_name,
+                'score': round(-event.rank, 4),
+                'snippet': event.snippet
             })
         
-        return jsonify({'success': True, 'events': events_list}), 200
+        return jsonify({
+            'success': True,
+            'query': match_query,
+            'events': events_list,
+            'next_offset': offset + limit if has_more else None
+        }), 200
         
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
-@app.route('/events/<int:event_id>', methods=['GET'])
+@bp.route('/events/<int:event_id>', methods=['GET'])
+@cached_response('event:{event_id}')
 def get_event(event_id):
     """Get specific event details"""
     try:
-        event = Event.query.get_or_404(event_id)
-        
-        event_data = {
-            'id': event.id,
-            'title': event.title,
-            'description': event.description,
-            'type': event.type,
-            'date': serialize_datetime(event.date),
-            'time': serialize_datetime(event.time),
-            'venue': event.venue,
-            'status': event.status,
-            'resources': json.loads(event.resources) if event.resources else {},
-            'college_name': event.college.name,
-            'registrations_count': len(event.registrations),
-            'attendance_count': len(event.attendance)
-        }
+        row = read_rows(EVENT_DETAIL_QUERY, {'event_id': event_id}).first()
+        if row is None:
+            abort(404)
         
-        return jsonify({'success': True, 'event': event_data}), 200
+        return jsonify({'success': True, 'event': EVENT_DETAIL.to_dict(row)}), 200
         
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 404
 
-@app.route('/events/<int:event_id>', methods=['PUT'])
+@bp.route('/events/<int:event_id>', methods=['PUT'])
 def update_event(event_id):
     """Update an event"""
     try:
         event = Event.query.get_or_404(event_id)
         data = request.get_json()
         
+        # Take the event out of its type and month buckets while it changes
+        record_event_buckets(event, sign=-1)
+        
         if 'title' in data:
             event.title = data['title']
         if 'description' in data:
@@ -242,8 +1853,19 @@ def update_event(event_id):
             event.status = data['status']
         if 'resources' in data:
             event.resources = json.dumps(data['resources'])
+        if 'capacity' in data:
+            event.capacity = parse_capacity(data['capacity'])
         
+        record_event_buckets(event)
+        # Seats added by a larger capacity go to the waitlist first
+        promoted = promote_waitlisted(event_id) if 'capacity' in data else []
+        finished = event.status in ARCHIVABLE_STATUSES
         db.session.commit()
+        gate = app_state().checkin_gate
+        gate.add_registrations(promoted)
+        if finished:
+            # The gate has closed; its sets would only take up memory
+            gate.forget(event_id)
         
         return jsonify({'success': True, 'message': 'Event updated successfully'}), 200
         
@@ -251,13 +1873,16 @@ def update_event(event_id):
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 400
 
-@app.route('/events/<int:event_id>', methods=['DELETE'])
+@bp.route('/events/<int:event_id>', methods=['DELETE'])
 def delete_event(event_id):
     """Delete/cancel an event"""
     try:
         event = Event.query.get_or_404(event_id)
+        record_event_buckets(event, sign=-1)
         event.status = 'Cancelled'
+        record_event_buckets(event)
         db.session.commit()
+        app_state().checkin_gate.forget(event_id)
         
         return jsonify({'success': True, 'message': 'Event cancelled successfully'}), 200
         
@@ -265,27 +1890,407 @@ def delete_event(event_id):
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 400
 
+# Import Routes
+# Rosters arrive as CSV (with a header row) or NDJSON, read from the request
+# body or an uploaded file a line at a time. Every IMPORT_CHUNK_SIZE rows are
+# validated and inserted with one executemany in their own transaction, so
+# memory and the time the write lock is held stay flat however large the
+# file. Invalid rows are skipped and reported by row number.
+IMPORT_CHUNK_SIZE = 1000
+MAX_IMPORT_ERRORS = 1000
+IMPORT_FORMATS = {mimetype: name for name, mimetype in EXPORT_FORMATS.items()}
+IMPORT_EXTENSIONS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+EMAIL_PATTERN = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+STUDENT_IMPORT_FIELDS = ('name', 'srn', 'email')
+EVENT_IMPORT_FIELDS = ('college_id', 'title', 'type', 'date', 'time', 'venue')
+
+def parse_import(stream, import_format, required_fields):
+    """Yield (row_number, record, error) for each row of a CSV or NDJSON byte stream, reading it incrementally"""
+    if import_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{import_format}', expected one of: {', '.join(EXPORT_FORMATS)}")
+    if not isinstance(stream, io.BufferedIOBase):
+        stream = io.BufferedReader(stream)
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    
+    if import_format == 'csv':
+        reader = csv.DictReader(text)
+        missing = [field for field in required_fields if field not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"CSV header is missing columns: {', '.join(missing)}")
+        for number, record in enumerate(reader, 1):
+            yield number, record, None
+        return
+    
+    number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(record, dict):
+            yield number, None, 'Expected a JSON object'
+            continue
+        yield number, record, None
+
+def import_chunks(rows, report):
+    """Chunks of up to IMPORT_CHUNK_SIZE parsed rows; rows that failed to parse go to `report` instead"""
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, IMPORT_CHUNK_SIZE))
+        if not batch:
+            return
+        chunk = []
+        for number, record, error in batch:
+            if error:
+                add_import_error(report, number, error)
+            else:
+                chunk.append((number, record))
+        if chunk:
+            yield chunk
+
+def new_import_report():
+    return {'imported': 0, 'failed': 0, 'errors': [], 'errors_truncated': False}
+
+def add_import_error(report, number, message):
+    report['failed'] += 1
+    if len(report['errors']) < MAX_IMPORT_ERRORS:
+        report['errors'].append({'row': number, 'message': message})
+    else:
+        report['errors_truncated'] = True
+
+def import_text(record, field, required=True):
+    value = record.get(field)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise ValueError(f'{field} is required')
+    return value
+
+def validate_student(record):
+    student = {field: import_text(record, field) for field in STUDENT_IMPORT_FIELDS}
+    if not EMAIL_PATTERN.fullmatch(student['email']):
+        raise ValueError(f"Invalid email '{student['email']}'")
+    return student
+
+def validate_event(record):
+    """Event columns from an imported row, parsed the way POST /events parses its body"""
+    college_id = import_text(record, 'college_id')
+    if not college_id.isdigit():
+        raise ValueError('college_id must be an integer')
+    
+    capacity = record.get('capacity')
+    if isinstance(capacity, str):
+        capacity = capacity.strip()
+        capacity = int(capacity) if capacity.isdigit() else capacity or None
+    resources = record.get('resources') or {}
+    if isinstance(resources, str):
+        try:
+            resources = json.loads(resources)
+        except ValueError as e:
+            raise ValueError(f'Invalid resources JSON: {e}') from e
+    
+    return {
+        'college_id': int(college_id),
+        'title': import_text(record, 'title'),
+        'description': import_text(record, 'description', required=False),
+        'type': import_text(record, 'type'),
+        'date': datetime.strptime(import_text(record, 'date'), '%Y-%m-%d').date(),
+        'time': datetime.strptime(import_text(record, 'time'), '%H:%M').time(),
+        'venue': import_text(record, 'venue'),
+        'status': import_text(record, 'status', required=False) or 'Active',
+        'capacity': parse_capacity(capacity),
+        'resources': json.dumps(resources)
+    }
+
+def import_students(college_id, rows):
+    """Create a college's students from parsed rows, one transaction per chunk; returns the import report.
+    
+    srn and email must be new: rows that repeat one already in the database,
+    or earlier in the file, are rejected. The lookups run on the read bind;
+    the insert skips rows whose srn or email a concurrent import took since,
+    and reports them as duplicates.
+    When sharded, the new students are copied to the college's shard too.
+    """
+    report = new_import_report()
+    router = app_state().shard_router
+    if router is not None and not os.path.exists(router.path(college_id)):
+        init_shard(college_id)
+    
+    for chunk in import_chunks(rows, report):
+        g.shard = None
+        valid, srns, emails = [], set(), set()
+        for number, record in chunk:
+            try:
+                student = validate_student(record)
+            except ValueError as e:
+                add_import_error(report, number, str(e))
+                continue
+            valid.append((number, student))
+            srns.add(student['srn'])
+            emails.add(student['email'])
+        
+        # Looked up on the read bind, so a chunk holds the write lock only while it inserts
+        taken_srns = set(read_execute(db.select(Student.srn).where(Student.srn.in_(srns))).scalars())
+        taken_emails = set(read_execute(db.select(Student.email).where(Student.email.in_(emails))).scalars())
+        students = {}
+        for number, student in valid:
+            if student['srn'] in taken_srns:
+                add_import_error(report, number, f"srn '{student['srn']}' already exists")
+            elif student['email'] in taken_emails:
+                add_import_error(report, number, f"email '{student['email']}' already exists")
+            else:
+                taken_srns.add(student['srn'])
+                taken_emails.add(student['email'])
+                students[number] = {**student, 'college_id': college_id}
+        if students:
+            # A concurrent import may have taken a srn or email since the lookup
+            inserted = set(db.session.execute(
+                sqlite_insert(Student).on_conflict_do_nothing().returning(Student.srn), list(students.values())
+            ).scalars())
+            for number, student in list(students.items()):
+                if student['srn'] not in inserted:
+                    add_import_error(
+                        report, number, f"srn '{student['srn']}' or email '{student['email']}' already exists"
+                    )
+                    del students[number]
+            mark_changed('students')
+        db.session.commit()
+        report['imported'] += len(students)
+        
+        if router is not None and students:
+            g.shard = router.shard(college_id)
+            copy_from_directory(Student, Student.srn.in_([student['srn'] for student in students.values()]))
+            db.session.commit()
+    g.shard = None
+    report['errors'].sort(key=lambda error: error['row'])
+    return report
+
+def record_new_events(events):
+    """Rollup rows for newly inserted (id, type, date, status) events: empty counters and their type and month buckets"""
+    db.session.execute(db.insert(EventStats), [{'event_id': event.id} for event in events])
+    types = collections.Counter(event.type for event in events)
+    months = collections.Counter((event_month(event.date), event.status) for event in events)
+    upsert_counters(EventTypeStats, ['type'], [
+        {'type': event_type, 'events_count': count} for event_type, count in types.items()
+    ])
+    upsert_counters(MonthlyStats, ['month', 'status'], [
+        {'month': month, 'status': status, 'events_count': count} for (month, status), count in months.items()
+    ])
+    mark_changed('events', 'popularity', 'event-types', 'monthly')
+
+def insert_events(events):
+    """Insert event rows with their rollup rows in the routed database"""
+    if not events:
+        return
+    inserted = db.session.execute(
+        db.insert(Event).returning(Event.id, Event.type, Event.date, Event.status, sort_by_parameter_order=True),
+        events
+    ).all()
+    record_new_events(inserted)
+
+def import_events(rows):
+    """Create events from parsed rows, one transaction per chunk; returns the import report.
+    
+    When sharded, the directory allocates each chunk's event ids and the
+    events are written to their colleges' shards.
+    """
+    report = new_import_report()
+    router = app_state().shard_router
+    for chunk in import_chunks(rows, report):
+        g.shard = None
+        valid = []
+        for number, record in chunk:
+            try:
+                valid.append((number, validate_event(record)))
+            except (ValueError, TypeError) as e:
+                add_import_error(report, number, str(e))
+        
+        colleges = set(read_execute(
+            db.select(College.id).where(College.id.in_({event['college_id'] for _, event in valid}))
+        ).scalars())
+        by_college = {}
+        for number, event in valid:
+            if event['college_id'] in colleges:
+                by_college.setdefault(event['college_id'], []).append(event)
+            else:
+                add_import_error(report, number, f"College {event['college_id']} not found")
+        
+        if router is None:
+            insert_events([event for events in by_college.values() for event in events])
+        else:
+            for college_id, events in by_college.items():
+                if not os.path.exists(router.path(college_id)):
+                    init_shard(college_id)
+                event_ids = db.session.execute(
+                    db.insert(EventDirectory).returning(EventDirectory.event_id, sort_by_parameter_order=True),
+                    [{'college_id': college_id}] * len(events), bind_arguments={'bind': db.engine}
+                ).scalars().all()
+                g.shard = router.shard(college_id)
+                insert_events([{**event, 'id': event_id} for event, event_id in zip(events, event_ids)])
+                g.shard = None
+        db.session.commit()
+        report['imported'] += sum(len(events) for events in by_college.values())
+    g.shard = None
+    report['errors'].sort(key=lambda error: error['row'])
+    return report
+
+def import_upload():
+    """The roster of an import request as a byte stream, and its format.
+    
+    The roster is a multipart `file` upload or the raw request body. Its
+    format comes from ?format=, else from the content type or file extension.
+    """
+    upload = request.files.get('file') if request.mimetype == 'multipart/form-data' else None
+    if upload is not None:
+        stream, mimetype, filename = upload.stream, upload.mimetype, upload.filename or ''
+    else:
+        stream, mimetype, filename = request.stream, request.mimetype, ''
+    import_format = (
+        request.args.get('format') or IMPORT_FORMATS.get(mimetype)
+        or IMPORT_EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+    )
+    if import_format is None:
+        raise ValueError('Send text/csv or application/x-ndjson, or set ?format=csv or ?format=ndjson')
+    return stream, import_format
+
+@bp.route('/colleges/<int:college_id>/students/import', methods=['POST'])
+def import_college_students(college_id):
+    """Create a college's students from a CSV or NDJSON roster"""
+    try:
+        if read_execute(db.select(College.id).where(College.id == college_id)).scalar() is None:
+            return jsonify({'success': False, 'message': 'College not found'}), 404
+        
+        stream, import_format = import_upload()
+        report = import_students(college_id, parse_import(stream, import_format, STUDENT_IMPORT_FIELDS))
+        
+        return jsonify({'success': True, 'college_id': college_id, **report}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@bp.route('/events/import', methods=['POST'])
+def import_event_roster():
+    """Create events from a CSV or NDJSON file, one event per row"""
+    try:
+        stream, import_format = import_upload()
+        report = import_events(parse_import(stream, import_format, EVENT_IMPORT_FIELDS))
+        
+        return jsonify({'success': True, **report}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+
 # Registration Routes
-@app.route('/register', methods=['POST'])
+def promote_waitlisted(event_id):
+    """Give an event's free seats to the head of its waitlist, in the caller's transaction.
+    
+    Returns the (event_id, student_id) pairs that were registered.
+    """
+    free_seats = db.session.execute(FREE_SEATS_QUERY, {'event_id': event_id}).scalar()
+    if free_seats is not None and free_seats <= 0:
+        return []
+    
+    waiting = db.session.execute(
+        db.select(WaitlistEntry.id, WaitlistEntry.student_id).where(WaitlistEntry.event_id == event_id)
+        .order_by(WaitlistEntry.id).limit(-1 if free_seats is None else free_seats)
+    ).all()
+    if not waiting:
+        return []
+    db.session.execute(db.delete(WaitlistEntry).where(WaitlistEntry.id.in_([entry.id for entry in waiting])))
+    
+    promoted = []
+    registered_at = datetime.utcnow()
+    for entry in waiting:
+        params = {'event_id': event_id, 'student_id': entry.student_id, 'registered_at': registered_at}
+        if db.session.execute(REGISTRATION_INSERT, params).scalar() is not None:
+            promoted.append((event_id, entry.student_id))
+    record_participation('registrations', promoted)
+    return promoted
+
+def allocate_seats(pairs, event_ids, student_ids):
+    """Split candidate registrations into those that fit the free seats and those for the waitlist.
+    
+    Seats go in request order. Pairs that are already registered are kept
+    with the admitted ones, where the unique constraint skips them, and do
+    not use up a seat.
+    """
+    free_seats = dict(db.session.execute(
+        db.select(Event.id, Event.capacity - REGISTERED_COUNT).where(Event.id.in_(event_ids), Event.capacity.isnot(None))
+    ).all())
+    if not free_seats:
+        return pairs, []
+    registered = set(db.session.execute(db.select(Registration.event_id, Registration.student_id).where(
+        Registration.event_id.in_(free_seats), Registration.student_id.in_(student_ids)
+    )).tuples())
+    
+    admitted, overflow = [], []
+    for pair in pairs:
+        event_id = pair[0]
+        if event_id not in free_seats or pair in registered:
+            admitted.append(pair)
+        elif free_seats[event_id] > 0:
+            free_seats[event_id] -= 1
+            admitted.append(pair)
+        else:
+            overflow.append(pair)
+    return admitted, overflow
+
+@bp.route('/register', methods=['POST'])
 def register_student():
     """Register a student for an event"""
     try:
         data = request.get_json()
         event_id = data['event_id']
         student_id = data['student_id']
-        
-        # Check if already registered
-        existing = Registration.query.filter_by(event_id=event_id, student_id=student_id).first()
-        if existing:
-            return jsonify({'success': False, 'message': 'Student already registered for this event'}), 409
-        
-        registration = Registration(event_id=event_id, student_id=student_id)
-        db.session.add(registration)
+        route_to_event(event_id)
+        
+        # One conditional INSERT: skipped when the event or student is unknown
+        # or the unique constraint already holds the pair
+        params = {'event_id': event_id, 'student_id': student_id, 'registered_at': datetime.utcnow()}
+        registration_id = db.session.execute(REGISTRATION_INSERT, params).scalar()
+        if registration_id is None and add_student_replicas([student_id]):
+            # A student of another college, registering on this shard for the first time
+            registration_id = db.session.execute(REGISTRATION_INSERT, params).scalar()
+        if registration_id is None:
+            # A full event puts the student at the back of its waitlist instead
+            waitlist_id = db.session.execute(WAITLIST_INSERT, {
+                'event_id': event_id, 'student_id': student_id, 'created_at': params['registered_at']
+            }).scalar()
+            if waitlist_id is not None:
+                mark_changed(f'event:{event_id}', f'student:{student_id}')
+                position = db.session.execute(
+                    WAITLIST_POSITION_QUERY, {'event_id': event_id, 'waitlist_id': waitlist_id}
+                ).scalar()
+                db.session.commit()
+                return jsonify({
+                    'success': True,
+                    'waitlisted': True,
+                    'waitlist_id': waitlist_id,
+                    'position': position,
+                    'message': 'Event is full; added to the waitlist'
+                }), 202
+            
+            db.session.rollback()
+            if event_is_archived(event_id):
+                return jsonify({'success': False, 'message': 'Event is archived'}), 409
+            if read_execute(db.select(participation_exists(Registration, event_id, student_id))).scalar():
+                return jsonify({'success': False, 'message': 'Student already registered for this event'}), 409
+            if read_execute(db.select(participation_exists(WaitlistEntry, event_id, student_id))).scalar():
+                return jsonify({'success': False, 'message': 'Student already on the waitlist for this event'}), 409
+            return jsonify({'success': False, 'message': 'Event or student not found'}), 404
+        
+        record_participation('registrations', [(event_id, student_id)])
         db.session.commit()
+        app_state().checkin_gate.add_registrations([(event_id, student_id)])
         
         return jsonify({
             'success': True,
-            'registration_id': registration.id,
+            'registration_id': registration_id,
             'message': 'Successfully registered for event'
         }), 201
         
@@ -293,26 +2298,169 @@ def register_student():
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 400
 
-@app.route('/registrations/<int:event_id>', methods=['GET'])
-def get_registrations(event_id):
-    """Get all students registered for an event"""
+@bp.route('/register/bulk', methods=['POST'])
+def register_students_bulk():
+    """Register many students in one transaction"""
+    try:
+        data = request.get_json()
+        
+        # Accept either one event with many students or explicit pairs
+        if 'registrations' in data:
+            pairs = [(int(item['event_id']), int(item['student_id'])) for item in data['registrations']]
+        else:
+            event_id = int(data['event_id'])
+            pairs = [(event_id, int(student_id)) for student_id in data['student_ids']]
+        
+        if len(pairs) > MAX_BULK_REGISTRATIONS:
+            return jsonify({
+                'success': False,
+                'message': f'At most {MAX_BULK_REGISTRATIONS} registrations per request'
+            }), 400
+        
+        # One set-based lookup per table instead of a SELECT per pair, and one
+        # transaction per shard when sharded
+        known_events, archived_events, known_students, created, waitlisted = set(), set(), set(), {}, set()
+        for shard, shard_pairs in split_by_shard(dict.fromkeys(pairs)).items():
+            g.shard = shard
+            event_ids = {pair[0] for pair in shard_pairs}
+            student_ids = {pair[1] for pair in shard_pairs}
+            shard_events = set(db.session.scalars(db.select(Event.id).where(Event.id.in_(event_ids), EVENT_LIVE)))
+            archived_events |= set(db.session.scalars(
+                db.select(Event.id).where(Event.id.in_(event_ids - shard_events), Event.archived_at.isnot(None))
+            ))
+            shard_students = set(db.session.scalars(db.select(Student.id).where(Student.id.in_(student_ids))))
+            shard_students |= add_student_replicas(student_ids - shard_students)
+            
+            # Duplicates are left to the unique constraint: rows that conflict are skipped
+            to_insert = [pair for pair in shard_pairs if pair[0] in shard_events and pair[1] in shard_students]
+            to_insert, overflow = allocate_seats(to_insert, shard_events, student_ids)
+            shard_created = insert_ignoring_duplicates(
+                Registration, [{'event_id': event_id, 'student_id': student_id} for event_id, student_id in to_insert]
+            )
+            record_participation('registrations', shard_created)
+            insert_ignoring_duplicates(
+                WaitlistEntry, [{'event_id': event_id, 'student_id': student_id} for event_id, student_id in overflow]
+            )
+            mark_changed(
+                *(f'event:{event_id}' for event_id, _ in overflow), *(f'student:{student_id}' for _, student_id in overflow)
+            )
+            waitlisted.update(overflow)
+            
+            db.session.commit()
+            app_state().checkin_gate.add_registrations(shard_created)
+            known_events |= shard_events
+            known_students |= shard_students
+            created.update(shard_created)
+        
+        results = []
+        summary = {
+            'created': 0, 'already_registered': 0, 'waitlisted': 0, 'unknown_student': 0, 'unknown_event': 0,
+            'archived_event': 0
+        }
+        reported = set()
+        for event_id, student_id in pairs:
+            result = {'event_id': event_id, 'student_id': student_id}
+            if event_id in archived_events:
+                result['status'] = 'archived_event'
+            elif event_id not in known_events:
+                result['status'] = 'unknown_event'
+            elif student_id not in known_students:
+                result['status'] = 'unknown_student'
+            elif (event_id, student_id) in created and (event_id, student_id) not in reported:
+                result['status'] = 'created'
+                result['registration_id'] = created[(event_id, student_id)]
+                reported.add((event_id, student_id))
+            elif (event_id, student_id) in waitlisted:
+                result['status'] = 'waitlisted'
+            else:
+                result['status'] = 'already_registered'
+            summary[result['status']] += 1
+            results.append(result)
+        
+        return jsonify({
+            'success': True,
+            'summary': summary,
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@bp.route('/registrations/<int:event_id>', methods=['GET'])
+def get_registrations(event_id):
+    """Get all students registered for an event"""
+    try:
+        params = {'event_id': event_id}
+        export_format = request.args.get('format')
+        if export_format:
+            return stream_export(REGISTRATION_LIST_QUERY, export_format, f'registrations-{event_id}', params)
+        
+        students_list = [REGISTRATION_LIST.to_dict(row) for row in read_rows(REGISTRATION_LIST_QUERY, params)]
+        
+        return jsonify({
+            'success': True,
+            'event_id': event_id,
+            'total_registrations': len(students_list),
+            'students': students_list
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@bp.route('/registrations/<int:event_id>/<int:student_id>', methods=['DELETE'])
+def cancel_registration(event_id, student_id):
+    """Cancel a registration or leave the waitlist; a freed seat goes to the head of the waitlist"""
+    try:
+        left_waitlist = db.session.execute(db.delete(WaitlistEntry).where(
+            WaitlistEntry.event_id == event_id, WaitlistEntry.student_id == student_id
+        )).rowcount
+        if left_waitlist:
+            mark_changed(f'event:{event_id}', f'student:{student_id}')
+            db.session.commit()
+            return jsonify({'success': True, 'message': 'Removed from the waitlist'}), 200
+        
+        attended = db.session.execute(db.select(participation_exists(Attendance, event_id, student_id))).scalar()
+        if attended or app_state().checkin_gate.is_checked_in(event_id, student_id):
+            db.session.rollback()
+            return jsonify({'success': False, 'message': 'Student already attended this event'}), 409
+        
+        cancelled = db.session.execute(db.delete(Registration).where(
+            Registration.event_id == event_id, Registration.student_id == student_id
+        )).rowcount
+        if not cancelled:
+            db.session.rollback()
+            return jsonify({'success': False, 'message': 'Registration not found'}), 404
+        
+        record_participation('registrations', [(event_id, student_id)], sign=-1)
+        promoted = promote_waitlisted(event_id)
+        db.session.commit()
+        
+        gate = app_state().checkin_gate
+        gate.remove_registrations([(event_id, student_id)])
+        gate.add_registrations(promoted)
+        
+        return jsonify({
+            'success': True,
+            'promoted_student_ids': [promoted_id for _, promoted_id in promoted],
+            'message': 'Registration cancelled'
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@bp.route('/waitlist/<int:event_id>', methods=['GET'])
+def get_waitlist(event_id):
+    """Get an event's waitlist, first in line first"""
     try:
-        registrations = db.session.query(Registration, Student).join(Student).filter(Registration.event_id == event_id).all()
-        
-        students_list = []
-        for reg, student in registrations:
-            students_list.append({
-                'student_id': student.id,
-                'name': student.name,
-                'srn': student.srn,
-                'email': student.email,
-                'registered_at': serialize_datetime(reg.registered_at)
-            })
+        rows = read_rows(WAITLIST_LIST_QUERY, {'event_id': event_id})
+        students_list = [dict(WAITLIST_LIST.to_dict(row), position=position) for position, row in enumerate(rows, 1)]
         
         return jsonify({
             'success': True,
             'event_id': event_id,
-            'total_registrations': len(students_list),
+            'total_waitlisted': len(students_list),
             'students': students_list
         }), 200
         
@@ -320,31 +2468,37 @@ def get_registrations(event_id):
         return jsonify({'success': False, 'message': str(e)}), 400
 
 # Attendance Routes
-@app.route('/attendance', methods=['POST'])
+@bp.route('/attendance', methods=['POST'])
 def mark_attendance():
     """Mark student attendance for an event"""
     try:
         data = request.get_json()
         event_id = data['event_id']
         student_id = data['student_id']
+        route_to_event(event_id)
         
-        # Check if student is registered
-        registration = Registration.query.filter_by(event_id=event_id, student_id=student_id).first()
-        if not registration:
-            return jsonify({'success': False, 'message': 'Student not registered for this event'}), 404
+        # Scans still queued at the gate are not in the table yet
+        if app_state().checkin_gate.is_checked_in(event_id, student_id):
+            return jsonify({'success': False, 'message': 'Attendance already marked'}), 409
         
-        # Check if already marked attendance
-        existing = Attendance.query.filter_by(event_id=event_id, student_id=student_id).first()
-        if existing:
+        attendance_id = db.session.execute(ATTENDANCE_INSERT, {
+            'event_id': event_id, 'student_id': student_id, 'attended_at': datetime.utcnow()
+        }).scalar()
+        if attendance_id is None:
+            db.session.rollback()
+            if event_is_archived(event_id):
+                return jsonify({'success': False, 'message': 'Event is archived'}), 409
+            if not read_execute(db.select(participation_exists(Registration, event_id, student_id))).scalar():
+                return jsonify({'success': False, 'message': 'Student not registered for this event'}), 404
             return jsonify({'success': False, 'message': 'Attendance already marked'}), 409
         
-        attendance = Attendance(event_id=event_id, student_id=student_id)
-        db.session.add(attendance)
+        record_participation('attendance', [(event_id, student_id)])
         db.session.commit()
+        app_state().checkin_gate.add_checkins([(event_id, student_id)])
         
         return jsonify({
             'success': True,
-            'attendance_id': attendance.id,
+            'attendance_id': attendance_id,
             'message': 'Attendance marked successfully'
         }), 201
         
@@ -352,21 +2506,16 @@ def mark_attendance():
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 400
 
-@app.route('/attendance/<int:event_id>', methods=['GET'])
+@bp.route('/attendance/<int:event_id>', methods=['GET'])
 def get_attendance(event_id):
     """Get attendance list for an event"""
     try:
-        attendance_records = db.session.query(Attendance, Student).join(Student).filter(Attendance.event_id == event_id).all()
+        params = {'event_id': event_id}
+        export_format = request.args.get('format')
+        if export_format:
+            return stream_export(ATTENDANCE_LIST_QUERY, export_format, f'attendance_records-{event_id}', params)
         
-        students_list = []
-        for att, student in attendance_records:
-            students_list.append({
-                'student_id': student.id,
-                'name': student.name,
-                'srn': student.srn,
-                'email': student.email,
-                'attended_at': serialize_datetime(att.attended_at)
-            })
+        students_list = [ATTENDANCE_LIST.to_dict(row) for row in read_rows(ATTENDANCE_LIST_QUERY, params)]
         
         return jsonify({
             'success': True,
@@ -378,40 +2527,130 @@ def get_attendance(event_id):
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
+# Gate Check-in Routes
+def load_checkin_sets(event_id):
+    """Registered and checked-in student ids for one event"""
+    # Runs inside the calling request's session, on the read engine: a second
+    # session here would wait forever on the request's own write transaction
+    registered = read_execute(db.select(Registration.student_id).where(Registration.event_id == event_id)).scalars().all()
+    checked_in = read_execute(db.select(Attendance.student_id).where(Attendance.event_id == event_id)).scalars().all()
+    return registered, checked_in
+
+def flush_checkins(app, batch):
+    """Write a batch of accepted scans as one group commit per shard"""
+    with app.app_context():
+        for shard, scans in split_by_shard(batch).items():
+            g.shard = shard
+            try:
+                inserted = insert_ignoring_duplicates(Attendance, [
+                    {'event_id': event_id, 'student_id': student_id, 'attended_at': scanned_at}
+                    for event_id, student_id, scanned_at in scans
+                ])
+                record_participation('attendance', inserted)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+@bp.route('/events/<int:event_id>/checkin/preload', methods=['POST'])
+def preload_checkin(event_id):
+    """Load an event's registered and checked-in students into memory before the gate opens"""
+    try:
+        # Read-only: a write-engine transaction would take the write lock
+        if read_execute(db.select(Event.id).where(Event.id == event_id)).first() is None:
+            abort(404)
+        registered, checked_in = app_state().checkin_gate.preload(event_id)
+        
+        return jsonify({
+            'success': True,
+            'event_id': event_id,
+            'registered': registered,
+            'checked_in': checked_in
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@bp.route('/attendance/checkin', methods=['POST'])
+def checkin_attendance():
+    """Accept a gate scan immediately; the attendance row is written by the background writer"""
+    try:
+        data = request.get_json()
+        event_id = int(data['event_id'])
+        student_id = int(data['student_id'])
+        route_to_event(event_id)
+        
+        outcome = app_state().checkin_gate.admit(event_id, student_id)
+        if outcome == CheckinGate.NOT_REGISTERED:
+            # The sets may predate a registration made through another worker
+            if not read_execute(db.select(participation_exists(Registration, event_id, student_id))).scalar():
+                return jsonify({'success': False, 'message': 'Student not registered for this event'}), 404
+            app_state().checkin_gate.add_registrations([(event_id, student_id)])
+            outcome = app_state().checkin_gate.admit(event_id, student_id)
+        if outcome == CheckinGate.ALREADY_CHECKED_IN:
+            return jsonify({'success': False, 'message': 'Attendance already marked'}), 409
+        
+        scan = (event_id, student_id, datetime.utcnow())
+        try:
+            app_state().checkin_queue.put(scan)
+        except RuntimeError:
+            app_state().checkin_gate.drop_scans([scan])
+            raise
+        
+        return jsonify({
+            'success': True,
+            'message': 'Check-in accepted'
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@bp.route('/attendance/checkin/flush', methods=['POST'])
+def flush_checkin_queue():
+    """Write all queued scans now, e.g. when the gate closes"""
+    try:
+        flushed = app_state().checkin_queue.flush()
+        return jsonify({'success': True, 'flushed': flushed}), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 # Feedback Routes
-@app.route('/feedback', methods=['POST'])
+def parse_rating(value):
+    """Rating from a request: an integer from 1 to 5, the histogram bucket it is counted in"""
+    if isinstance(value, bool) or not isinstance(value, int) or value not in RATINGS:
+        raise ValueError('rating must be an integer from 1 to 5')
+    return value
+
+@bp.route('/feedback', methods=['POST'])
 def submit_feedback():
     """Submit feedback for an event"""
     try:
         data = request.get_json()
         event_id = data['event_id']
         student_id = data['student_id']
-        rating = data['rating']
+        rating = parse_rating(data['rating'])
         comment = data.get('comment', '')
-        
-        # Check if student attended the event
-        attendance = Attendance.query.filter_by(event_id=event_id, student_id=student_id).first()
-        if not attendance:
-            return jsonify({'success': False, 'message': 'Can only provide feedback for attended events'}), 403
-        
-        # Check if feedback already submitted
-        existing = Feedback.query.filter_by(event_id=event_id, student_id=student_id).first()
-        if existing:
+        route_to_event(event_id)
+        
+        feedback_id = db.session.execute(FEEDBACK_INSERT, {
+            'event_id': event_id, 'student_id': student_id, 'rating': rating, 'comment': comment,
+            'created_at': datetime.utcnow()
+        }).scalar()
+        if feedback_id is None:
+            db.session.rollback()
+            if event_is_archived(event_id):
+                return jsonify({'success': False, 'message': 'Event is archived'}), 409
+            if not read_execute(db.select(participation_exists(Attendance, event_id, student_id))).scalar():
+                return jsonify({'success': False, 'message': 'Can only provide feedback for attended events'}), 403
             return jsonify({'success': False, 'message': 'Feedback already submitted'}), 409
         
-        feedback = Feedback(
-            event_id=event_id,
-            student_id=student_id,
-            rating=rating,
-            comment=comment
-        )
-        
-        db.session.add(feedback)
+        record_participation('feedback', [(event_id, student_id)], ratings={(event_id, student_id): rating})
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'feedback_id': feedback.id,
+            'feedback_id': feedback_id,
             'message': 'Feedback submitted successfully'
         }), 201
         
@@ -419,23 +2658,17 @@ def submit_feedback():
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 400
 
-@app.route('/feedback/<int:event_id>', methods=['GET'])
+@bp.route('/feedback/<int:event_id>', methods=['GET'])
 def get_feedback(event_id):
     """Get feedback for an event"""
     try:
-        feedback_records = db.session.query(Feedback, Student).join(Student).filter(Feedback.event_id == event_id).all()
+        params = {'event_id': event_id}
+        export_format = request.args.get('format')
+        if export_format:
+            return stream_export(FEEDBACK_LIST_QUERY, export_format, f'feedback-{event_id}', params)
         
-        feedback_list = []
-        total_rating = 0
-        
-        for feedback, student in feedback_records:
-            feedback_list.append({
-                'student_name': student.name,
-                'rating': feedback.rating,
-                'comment': feedback.comment,
-                'created_at': serialize_datetime(feedback.created_at)
-            })
-            total_rating += feedback.rating
+        feedback_list = [FEEDBACK_LIST.to_dict(row) for row in read_rows(FEEDBACK_LIST_QUERY, params)]
+        total_rating = sum(item['rating'] for item in feedback_list)
         
         average_rating = round(total_rating / len(feedback_list), 2) if feedback_list else 0
         
@@ -450,39 +2683,257 @@ def get_feedback(event_id):
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
+# Student Feed Routes
+# A student's events, newest first: what they registered for or wait on,
+# whether they attended, and whether feedback is still due, with upcoming
+# events of the types they attend most. Every query starts from the
+# student_id indexes of the participation tables and their archives; the
+# response is cached per student until one of their own writes.
+DEFAULT_FEED_PAGE_SIZE = 20
+MAX_FEED_PAGE_SIZE = 100
+FEED_RECOMMENDED_TYPES = 3
+FEED_RECOMMENDED_EVENTS = 5
+FEED_STUDENT = db.bindparam('student_id')
+
+def student_participated(model, event_id):
+    """Whether the feed's student has a row of `model`, live or archived, for `event_id`"""
+    return db.or_(*(
+        db.exists().where(table.event_id == event_id, table.student_id == FEED_STUDENT)
+        for table in (model, ARCHIVE_MODELS[model])
+    ))
+
+FEED_ENTRIES = db.union_all(
+    db.select(Registration.event_id, db.literal('registered').label('registration')).where(
+        Registration.student_id == FEED_STUDENT
+    ),
+    db.select(ArchivedRegistration.event_id, db.literal('registered')).where(
+        ArchivedRegistration.student_id == FEED_STUDENT
+    ),
+    db.select(WaitlistEntry.event_id, db.literal('waitlisted')).where(WaitlistEntry.student_id == FEED_STUDENT)
+).subquery('feed_entries')
+FEED = projection(
+    Event.id, Event.title, Event.type, iso_text(Event.date), iso_text(Event.time), Event.venue, Event.status,
+    College.name.label('college_name'), FEED_ENTRIES.c.registration,
+    student_participated(Attendance, Event.id).label('attended'),
+    student_participated(Feedback, Event.id).label('feedback_given'),
+    Event.archived_at.isnot(None).label('archived'),
+    attended=bool, feedback_given=bool, archived=bool
+)
+FEED_QUERY = db.select(*FEED.columns).select_from(FEED_ENTRIES).join(
+    Event, FEED_ENTRIES.c.event_id == Event.id
+).join(College, Event.college_id == College.id).where(
+    Event.date >= db.bindparam('date_from', type_=Event.date.type),
+    Event.date <= db.bindparam('date_to', type_=Event.date.type),
+    db.tuple_(Event.date, Event.time, Event.id) < db.tuple_(
+        db.bindparam('cursor_date', type_=Event.date.type),
+        db.bindparam('cursor_time', type_=Event.time.type),
+        db.bindparam('cursor_id')
+    )
+).order_by(Event.date.desc(), Event.time.desc(), Event.id.desc()).limit(db.bindparam('limit'))
+
+# Feedback can be given for attended events that are not archived, whose
+# attendance rows are therefore still in the live table
+FEEDBACK_PENDING_QUERY = db.select(db.func.count().label('pending')).select_from(Attendance).where(
+    Attendance.student_id == FEED_STUDENT,
+    ~participation_exists(Feedback, Attendance.event_id, FEED_STUDENT)
+)
+FEED_ATTENDED = db.union_all(
+    db.select(Attendance.event_id).where(Attendance.student_id == FEED_STUDENT),
+    db.select(ArchivedAttendance.event_id).where(ArchivedAttendance.student_id == FEED_STUDENT)
+).subquery('attended_events')
+FEED_TYPES_QUERY = db.select(Event.type, db.func.count().label('attended')).select_from(FEED_ATTENDED).join(
+    Event, FEED_ATTENDED.c.event_id == Event.id
+).group_by(Event.type)
+RECOMMENDED = projection(
+    Event.id, Event.title, Event.type, iso_text(Event.date), iso_text(Event.time), Event.venue,
+    College.name.label('college_name')
+)
+RECOMMENDED_QUERY = db.select(*RECOMMENDED.columns).select_from(Event).join(
+    College, Event.college_id == College.id
+).where(
+    Event.college_id == db.bindparam('college_id'),
+    Event.status == 'Active',
+    EVENT_LIVE,
+    Event.date >= db.bindparam('today', type_=Event.date.type),
+    ~participation_exists(Registration, Event.id, FEED_STUDENT),
+    ~participation_exists(WaitlistEntry, Event.id, FEED_STUDENT)
+).order_by(Event.date, Event.time, Event.id).limit(FEED_RECOMMENDED_EVENTS)
+RECOMMENDED_BY_TYPE_QUERY = RECOMMENDED_QUERY.where(Event.type.in_(db.bindparam('types', expanding=True)))
+
+def recommended_events(student_id, college_id):
+    """Upcoming events at the student's college, of the types they attend most, that they have not signed up for"""
+    attended_types = sum_rows(scatter_rows(FEED_TYPES_QUERY, {'student_id': student_id}), 'type')
+    attended_types.sort(key=lambda row: (-row['attended'], row['type']))
+    types = [row['type'] for row in attended_types[:FEED_RECOMMENDED_TYPES]]
+    
+    params = {'student_id': student_id, 'college_id': college_id, 'today': date.today()}
+    query = RECOMMENDED_QUERY
+    if types:
+        query, params['types'] = RECOMMENDED_BY_TYPE_QUERY, types
+    # Only the college's own shard holds its events
+    router = app_state().shard_router
+    if router is not None:
+        g.shard = router.shard(college_id)
+    return types, [RECOMMENDED.to_dict(row) for row in read_rows(query, params)]
+
+@bp.route('/students/<int:student_id>/feed', methods=['GET'])
+@cached_response('student:{student_id}', 'events', 'student-feeds')
+def get_student_feed(student_id):
+    """A student's events newest first, one keyset-paginated page at a time, with recommended upcoming events"""
+    try:
+        limit = min(request.args.get('limit', DEFAULT_FEED_PAGE_SIZE, type=int), MAX_FEED_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError('limit must be a positive integer')
+        student = read_execute(
+            db.select(Student.name, Student.college_id).where(Student.id == student_id)
+        ).first()
+        if student is None:
+            abort(404)
+        
+        params = {
+            'student_id': student_id,
+            'date_from': parse_report_date('from') or date.min,
+            'date_to': parse_report_date('to') or date.max,
+            'limit': limit + 1
+        }
+        cursor = request.args.get('cursor')
+        if cursor:
+            params['cursor_date'], params['cursor_time'], params['cursor_id'] = decode_events_cursor(cursor)
+        else:
+            params['cursor_date'], params['cursor_time'], params['cursor_id'] = date.max, time.max, 0
+        
+        # Each shard holding the student's events returns its own first page
+        rows = scatter_rows(FEED_QUERY, params, key=lambda row: (row.date, row.time, row.id), reverse=True)[:limit + 1]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        today = date.today().isoformat()
+        events_list = []
+        for row in rows:
+            entry = FEED.to_dict(row)
+            entry['upcoming'] = entry['date'] >= today
+            entry['feedback_pending'] = entry['attended'] and not entry['feedback_given'] and not entry['archived']
+            events_list.append(entry)
+        
+        response = {
+            'success': True,
+            'student_id': student_id,
+            'student_name': student.name,
+            'events': events_list,
+            'next_cursor': encode_events_cursor(rows[-1]) if has_more else None
+        }
+        # The summary and recommendations head the first page only
+        if not cursor:
+            response['feedback_pending_count'] = sum(
+                row.pending for row in scatter_rows(FEEDBACK_PENDING_QUERY, {'student_id': student_id})
+            )
+            response['favorite_types'], response['recommended'] = recommended_events(student_id, student.college_id)
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+# Live Feed Routes
+LIVE_FEED_RETRY_MS = 3000
+
+def live_counts(event_id):
+    """An event's counters, or None for an unknown event"""
+    return live_counts_by_event(read_rows(LIVE_COUNTS_QUERY, {'event_ids': [event_id]})).get(event_id)
+
+def refresh_live_counts(app, event_id):
+    """An event's counters, read from a stream body that runs after its request has ended"""
+    with app.app_context():
+        route_to_event(event_id)
+        return live_counts(event_id)
+
+def live_stream(app, event_id, subscription, counts):
+    """Body of an event's activity stream: the current counters unless resuming, then each message as it commits.
+    
+    An idle stream gets a keepalive comment every LIVE_FEED_HEARTBEAT seconds,
+    or the counters when they changed, e.g. through another server process.
+    """
+    heartbeat = app.config['LIVE_FEED_HEARTBEAT']
+    yield f'retry: {LIVE_FEED_RETRY_MS}\n\n'.encode()
+    if not subscription.resumed:
+        yield sse_frame('snapshot', {'event_id': event_id, 'counts': counts}, subscription.last_id)
+    while True:
+        messages = subscription.wait(heartbeat)
+        if subscription.missed:
+            # Fell further behind than the history; the client reloads the lists
+            counts = refresh_live_counts(app, event_id)
+            yield sse_frame('snapshot', {'event_id': event_id, 'counts': counts}, subscription.last_id)
+        elif messages:
+            counts = messages[-1].data['counts']
+            yield b''.join(message.frame for message in messages)
+        else:
+            latest = refresh_live_counts(app, event_id)
+            if latest == counts:
+                yield b': keepalive\n\n'
+            else:
+                counts = latest
+                yield sse_frame('counts', {'event_id': event_id, 'counts': counts}, subscription.last_id)
+
+@bp.route('/events/<int:event_id>/stream', methods=['GET'])
+def stream_event_activity(event_id):
+    """Stream an event's registrations, cancellations, check-ins and feedback as Server-Sent Events"""
+    try:
+        counts = live_counts(event_id)
+        if counts is None:
+            return jsonify({'success': False, 'message': 'Event not found'}), 404
+        
+        # Browsers send Last-Event-ID when they reconnect by themselves
+        last_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        try:
+            subscription = app_state().live_feed.subscribe(event_id, last_id)
+        except TooManySubscribers as e:
+            return jsonify({'success': False, 'message': str(e)}), 503, {'Retry-After': '30'}
+        
+        # The body runs after the request has ended, so it holds no database connection
+        body = live_stream(current_app._get_current_object(), event_id, subscription, counts)
+        response = Response(body, mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+        response.call_on_close(subscription.close)
+        return response
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
 # Report Routes
-@app.route('/reports/registrations/<int:event_id>', methods=['GET'])
+@bp.route('/reports/registrations/<int:event_id>', methods=['GET'])
+@cached_response('event:{event_id}')
 def report_registrations(event_id):
     """Get total registrations for an event"""
     try:
-        total = Registration.query.filter_by(event_id=event_id).count()
-        event = Event.query.get_or_404(event_id)
+        stats = get_event_stats_or_404(event_id)
         
         return jsonify({
             'success': True,
             'event_id': event_id,
-            'event_title': event.title,
-            'total_registrations': total
+            'event_title': stats.title,
+            'total_registrations': stats.registrations_count
         }), 200
         
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
-@app.route('/reports/attendance/<int:event_id>', methods=['GET'])
+@bp.route('/reports/attendance/<int:event_id>', methods=['GET'])
+@cached_response('event:{event_id}')
 def report_attendance(event_id):
     """Get attendance percentage for an event"""
     try:
-        total_registered = Registration.query.filter_by(event_id=event_id).count()
-        total_attended = Attendance.query.filter_by(event_id=event_id).count()
+        stats = get_event_stats_or_404(event_id)
+        total_registered = stats.registrations_count
+        total_attended = stats.attendance_count
         
         percentage = round((total_attended / total_registered) * 100, 2) if total_registered > 0 else 0
         
-        event = Event.query.get_or_404(event_id)
-        
         return jsonify({
             'success': True,
             'event_id': event_id,
-            'event_title': event.title,
+            'event_title': stats.title,
             'total_registered': total_registered,
             'total_attended': total_attended,
             'attendance_percentage': percentage
@@ -491,60 +2942,45 @@ def report_attendance(event_id):
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
-@app.route('/reports/feedback/<int:event_id>', methods=['GET'])
+@bp.route('/reports/feedback/<int:event_id>', methods=['GET'])
+@cached_response('event:{event_id}')
 def report_feedback(event_id):
-    """Get average feedback for an event"""
+    """Get average feedback and the rating distribution for an event"""
     try:
-        feedback_records = Feedback.query.filter_by(event_id=event_id).all()
-        
-        if not feedback_records:
-            average_rating = 0
-            total_feedback = 0
-        else:
-            total_rating = sum(f.rating for f in feedback_records)
-            average_rating = round(total_rating / len(feedback_records), 2)
-            total_feedback = len(feedback_records)
-        
-        event = Event.query.get_or_404(event_id)
+        stats = get_event_stats_or_404(event_id, *rating_count_columns())
+        total_feedback = stats.feedback_count
+        average_rating = round(stats.rating_sum / total_feedback, 2) if total_feedback > 0 else 0
+        histogram = RatingHistogram.from_row(stats._mapping)
         
         return jsonify({
             'success': True,
             'event_id': event_id,
-            'event_title': event.title,
+            'event_title': stats.title,
             'total_feedback': total_feedback,
-            'average_rating': average_rating
+            'average_rating': average_rating,
+            'median_rating': histogram.percentile(50),
+            'histogram': histogram.summary()['histogram']
         }), 200
         
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
-@app.route('/reports/popularity', methods=['GET'])
+@bp.route('/reports/popularity', methods=['GET'])
+@cached_response('popularity')
 def report_popularity():
     """Get events sorted by registration count"""
     try:
         event_type = request.args.get('type')
         
         # Build query with registration count
-        query = db.session.query(
-            Event,
-            db.func.count(Registration.id).label('registration_count')
-        ).outerjoin(Registration).group_by(Event.id)
+        limit = request.args.get('limit', type=int)
         
         if event_type:
-            query = query.filter(Event.type == event_type)
-        
-        results = query.order_by(db.desc('registration_count')).all()
-        
-        events_list = []
-        for event, reg_count in results:
-            events_list.append({
-                'event_id': event.id,
-                'title': event.title,
-                'type': event.type,
-                'date': serialize_datetime(event.date),
-                'registration_count': reg_count,
-                'college_name': event.college.name
-            })
+            query, params = POPULARITY_BY_TYPE_QUERY, {'type': event_type, 'limit': limit or -1}
+        else:
+            query, params = POPULARITY_LIST_QUERY, {'limit': limit or -1}
+        results = scatter_rows(query, params, key=lambda row: row.registration_count, reverse=True)
+        events_list = [POPULARITY_LIST.to_dict(row) for row in results[:limit or None]]
         
         return jsonify({
             'success': True,
@@ -554,14 +2990,25 @@ def report_popularity():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
-@app.route('/reports/participation/<int:student_id>', methods=['GET'])
+@bp.route('/reports/participation/<int:student_id>', methods=['GET'])
+@cached_response('student:{student_id}')
 def report_participation(student_id):
     """Get number of events attended by a student"""
     try:
-        events_attended = Attendance.query.filter_by(student_id=student_id).count()
-        events_registered = Registration.query.filter_by(student_id=student_id).count()
-        
-        student = Student.query.get_or_404(student_id)
+        if app_state().shard_router is not None:
+            return report_sharded_participation(student_id)
+        
+        student = read_execute(
+            db.select(
+                Student.name,
+                db.func.coalesce(StudentStats.registrations_count, 0).label('events_registered'),
+                db.func.coalesce(StudentStats.attendance_count, 0).label('events_attended')
+            ).outerjoin(StudentStats, StudentStats.student_id == Student.id).where(Student.id == student_id)
+        ).first()
+        if student is None:
+            abort(404)
+        events_registered = student.events_registered
+        events_attended = student.events_attended
         
         return jsonify({
             'success': True,
@@ -575,24 +3022,81 @@ def report_participation(student_id):
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
-@app.route('/reports/top-students', methods=['GET'])
+def report_sharded_participation(student_id):
+    """report_participation for a sharded deployment: the student's rollups summed over every shard"""
+    name = read_execute(db.select(Student.name).where(Student.id == student_id)).scalar()
+    if name is None:
+        abort(404)
+    counts = scatter_rows(db.select(StudentStats.registrations_count, StudentStats.attendance_count).where(
+        StudentStats.student_id == student_id
+    ))
+    events_registered = sum(row.registrations_count for row in counts)
+    events_attended = sum(row.attendance_count for row in counts)
+    
+    return jsonify({
+        'success': True,
+        'student_id': student_id,
+        'student_name': name,
+        'events_registered': events_registered,
+        'events_attended': events_attended,
+        'attendance_rate': round((events_attended / events_registered) * 100, 2) if events_registered > 0 else 0
+    }), 200
+
+ACTIVE_STUDENTS_SQL = 'SELECT student_id, attendance_count FROM student_stats WHERE attendance_count > 0'
+
+def sharded_top_students(limit):
+    """(student_id, events_attended) of the most active students, summed over every shard.
+    
+    A student's attendance is split across the shards of the events they
+    went to, so every positive count is gathered. Over a hundred thousand rows
+    wrapping each one in a Result row costs more than the query, so they are
+    fetched straight from the DB-API cursor.
+    """
+    totals = collections.Counter()
+    for shard in all_shards():
+        with shard.read_engine.connect() as connection:
+            result = connection.exec_driver_sql(ACTIVE_STUDENTS_SQL)
+            for student_id, attended in result.cursor.fetchall():
+                totals[student_id] = totals.get(student_id, 0) + attended
+            result.close()
+    return totals.most_common(limit)
+
+@bp.route('/reports/top-students', methods=['GET'])
+@cached_response('top-students')
 def report_top_students():
     """Get top 3 most active students"""
     try:
-        # Get students with most event attendance
-        results = db.session.query(
-            Student,
-            db.func.count(Attendance.id).label('events_attended')
-        ).join(Attendance).group_by(Student.id).order_by(db.desc('events_attended')).limit(3).all()
+        if app_state().shard_router is not None:
+            top = dict(sharded_top_students(3))
+            results = read_execute(
+                db.select(Student.id, Student.name, Student.srn, College.name.label('college_name'),
+                          db.case(top, value=Student.id).label('events_attended')).join(
+                    College, Student.college_id == College.id
+                ).where(Student.id.in_(top))
+            ).all() if top else []
+            results.sort(key=lambda student: student.events_attended, reverse=True)
+        else:
+            # Get students with most event attendance
+            results = read_execute(
+                db.select(
+                    Student.id,
+                    Student.name,
+                    Student.srn,
+                    College.name.label('college_name'),
+                    StudentStats.attendance_count.label('events_attended')
+                ).select_from(StudentStats).join(Student, StudentStats.student_id == Student.id).join(
+                    College, Student.college_id == College.id
+                ).where(StudentStats.attendance_count > 0).order_by(StudentStats.attendance_count.desc()).limit(3)
+            ).all()
         
         students_list = []
-        for student, events_count in results:
+        for student in results:
             students_list.append({
                 'student_id': student.id,
                 'name': student.name,
                 'srn': student.srn,
-                'college_name': student.college.name,
-                'events_attended': events_count
+                'college_name': student.college_name,
+                'events_attended': student.events_attended
             })
         
         return jsonify({
@@ -603,40 +3107,875 @@ def report_top_students():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
-# Initialize database
-# Initialize database and seed data
-with app.app_context():
-    db.create_all()
+@bp.route('/reports/event-types', methods=['GET'])
+@cached_response('event-types')
+def report_event_types():
+    """Get registration, attendance and rating totals per event type"""
+    try:
+        results = sum_rows(scatter_rows(
+            db.select(*EventTypeStats.__table__.columns).order_by(EventTypeStats.events_count.desc())
+        ), 'type')
+        # A type's row stays behind at zero once its last event changes type; ties list by name
+        results = [stats for stats in results if stats['events_count']]
+        results.sort(key=lambda stats: (-stats['events_count'], stats['type']))
+        
+        types_list = []
+        for stats in results:
+            types_list.append({
+                'event_type': stats['type'],
+                'total_events': stats['events_count'],
+                'total_registrations': stats['registrations_count'],
+                'total_attendance': stats['attendance_count'],
+                'total_feedback': stats['feedback_count'],
+                'average_rating': round(stats['rating_sum'] / stats['feedback_count'], 2) if stats['feedback_count'] > 0 else 0
+            })
+        
+        return jsonify({
+            'success': True,
+            'event_types': types_list
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@bp.route('/reports/monthly', methods=['GET'])
+@cached_response('monthly')
+def report_monthly():
+    """Get per-month event statistics for events with the given status"""
+    try:
+        status = request.args.get('status', 'Completed')
+        
+        results = sum_rows(scatter_rows(
+            db.select(
+                MonthlyStats.month, MonthlyStats.events_count, MonthlyStats.registrations_count,
+                MonthlyStats.attendance_count, MonthlyStats.feedback_count
+            ).where(MonthlyStats.status == status).order_by(MonthlyStats.month.desc())
+        ), 'month')
+        # A month's row stays behind at zero once its last event moves away
+        results = [stats for stats in results if stats['events_count']]
+        results.sort(key=lambda stats: stats['month'], reverse=True)
+        
+        months_list = []
+        for stats in results:
+            months_list.append({
+                'month': stats['month'],
+                'events_conducted': stats['events_count'],
+                'total_registrations': stats['registrations_count'],
+                'total_attendance': stats['attendance_count'],
+                'total_feedback': stats['feedback_count']
+            })
+        
+        return jsonify({
+            'success': True,
+            'status': status,
+            'months': months_list
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+# Batched Report Routes
+# A dashboard showing many events or students asks for all of them at once:
+# the entities are chosen by a list of ids or by college and date range, and
+# their figures come from one query over the rollups per table (one per shard
+# when sharded) instead of a request per entity.
+MAX_REPORT_IDS = 1000
+EVENT_REPORT = projection(
+    Event.id.label('event_id'), Event.title.label('event_title'), Event.type.label('event_type'),
+    iso_text(Event.date), Event.status, College.name.label('college_name'), *event_stats_columns()
+)
+EVENT_REPORT_QUERY = db.select(*EVENT_REPORT.columns).select_from(Event).join(
+    College, Event.college_id == College.id
+).outerjoin(EventStats, EventStats.event_id == Event.id).order_by(Event.date, Event.id)
+EVENT_REPORT_CURSOR = db.tuple_(Event.date, Event.id) > db.tuple_(
+    db.bindparam('cursor_date', type_=Event.date.type), db.bindparam('cursor_id')
+)
+
+def encode_report_cursor(row):
+    """Encode the (date, event_id) sort key of the last event of a report page"""
+    return base64.urlsafe_b64encode(json.dumps([row['date'], row['event_id']]).encode()).decode()
+
+def decode_report_cursor(cursor):
+    """Decode a cursor produced by encode_report_cursor"""
+    try:
+        event_date, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return date.fromisoformat(event_date), int(event_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+def parse_report_ids():
+    """The distinct ids of ?ids=1,2,3, or None when not given"""
+    ids = request.args.get('ids')
+    if ids is None:
+        return None
+    ids = list(dict.fromkeys(int(value) for value in ids.split(',') if value.strip()))
+    if len(ids) > MAX_REPORT_IDS:
+        raise ValueError(f'At most {MAX_REPORT_IDS} ids per request')
+    return ids
+
+def parse_report_date(name):
+    value = request.args.get(name)
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+def event_report_conditions(ids):
+    """Event filters of a report request: the listed `ids`, ?college_id, ?from and ?to dates, ?type and ?status"""
+    college_id = request.args.get('college_id', type=int)
+    date_from, date_to = parse_report_date('from'), parse_report_date('to')
+    
+    conditions = []
+    if ids is not None:
+        conditions.append(Event.id.in_(ids))
+    if college_id is not None:
+        conditions.append(Event.college_id == college_id)
+    if date_from is not None:
+        conditions.append(Event.date >= date_from)
+    if date_to is not None:
+        conditions.append(Event.date <= date_to)
+    for name in ('type', 'status'):
+        if request.args.get(name):
+            conditions.append(getattr(Event, name) == request.args[name])
+    return conditions
+
+def participation_figures(registered, attended, feedback, rating_sum):
+    """The figures of the per-event report routes, from rollup counters"""
+    return {
+        'total_registrations': registered,
+        'total_attended': attended,
+        'attendance_percentage': round(attended / registered * 100, 2) if registered > 0 else 0,
+        'total_feedback': feedback,
+        'average_rating': round(rating_sum / feedback, 2) if feedback > 0 else 0
+    }
+
+def summarize_events(rows):
+    """Event count and participation figures summed over event report rows"""
+    return {'total_events': len(rows), **participation_figures(*(
+        sum(row[column] for row in rows)
+        for column in ('registrations_count', 'attendance_count', 'feedback_count', 'rating_sum')
+    ))}
+
+@bp.route('/reports/events', methods=['GET'])
+@cached_response('events', 'participation')
+def report_events():
+    """Figures of the listed events, or of a page of the events matching filters, with totals per type and month"""
+    try:
+        ids = parse_report_ids()
+        query = EVENT_REPORT_QUERY.where(*event_report_conditions(ids))
+        params = {}
+        
+        # Listed ids are bounded by MAX_REPORT_IDS; a selection by filters alone
+        # is paged, at most MAX_REPORT_IDS events at a time
+        if ids is None:
+            limit = min(request.args.get('limit', MAX_REPORT_IDS, type=int), MAX_REPORT_IDS)
+            if limit < 1:
+                raise ValueError('limit must be a positive integer')
+            params['limit'] = limit + 1
+            cursor = request.args.get('cursor')
+            if cursor:
+                params['cursor_date'], params['cursor_id'] = decode_report_cursor(cursor)
+                query = query.where(EVENT_REPORT_CURSOR)
+            query = query.limit(db.bindparam('limit'))
+        
+        rows = [EVENT_REPORT.to_dict(row) for row in scatter_rows(
+            query, params, key=lambda row: (row.date, row.event_id)
+        )]
+        has_more = ids is None and len(rows) > limit
+        if ids is None:
+            rows = rows[:limit]
+        
+        by_type, by_month = {}, {}
+        for row in rows:
+            by_type.setdefault(row['event_type'], []).append(row)
+            by_month.setdefault(row['date'][:7], []).append(row)
+        
+        events_list = []
+        for row in rows:
+            events_list.append({
+                'event_id': row['event_id'],
+                'event_title': row['event_title'],
+                'event_type': row['event_type'],
+                'date': row['date'],
+                'status': row['status'],
+                'college_name': row['college_name'],
+                **participation_figures(
+                    row['registrations_count'], row['attendance_count'], row['feedback_count'], row['rating_sum']
+                )
+            })
+        
+        response = {
+            'success': True,
+            'totals': summarize_events(rows),
+            'event_types': [{'event_type': name, **summarize_events(group)} for name, group in sorted(by_type.items())],
+            'months': [{'month': month, **summarize_events(group)} for month, group in sorted(by_month.items())],
+            'events': events_list
+        }
+        if ids is not None:
+            found = {row['event_id'] for row in rows}
+            response['not_found'] = [event_id for event_id in ids if event_id not in found]
+        else:
+            response['next_cursor'] = encode_report_cursor(rows[-1]) if has_more else None
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@bp.route('/reports/students', methods=['GET'])
+@cached_response('students', 'participation')
+def report_students():
+    """Participation of the listed students, or of a college's, most active first"""
+    try:
+        ids = parse_report_ids()
+        college_id = request.args.get('college_id', type=int)
+        if ids is None and college_id is None:
+            return jsonify({'success': False, 'message': 'Give ids or college_id'}), 400
+        
+        students_list = student_participation_report(college_id=college_id, student_ids=ids)
+        response = {
+            'success': True,
+            'total_students': len(students_list),
+            'students': students_list
+        }
+        if ids is not None:
+            found = {student['student_id'] for student in students_list}
+            response['not_found'] = [student_id for student_id in ids if student_id not in found]
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+# Feedback Analytics Routes
+# Rating distributions of events chosen like the batched reports. They come
+# from the rating histograms feedback writes keep per event and per event and
+# day, so a semester's analytics read a rollup row per event and per day with
+# feedback, never the feedback rows themselves.
+FEEDBACK_ANALYTICS = projection(
+    Event.id.label('event_id'), Event.title.label('event_title'), Event.type.label('event_type'),
+    *event_stats_columns(), *rating_count_columns()
+)
+FEEDBACK_ANALYTICS_QUERY = db.select(*FEEDBACK_ANALYTICS.columns).select_from(Event).outerjoin(
+    EventStats, EventStats.event_id == Event.id
+).order_by(Event.id)
+FEEDBACK_TREND_QUERY = db.select(
+    FeedbackDailyStats.day, *(db.func.sum(getattr(FeedbackDailyStats, name)).label(name) for name in RATING_COUNT_COLUMNS)
+).join(Event, FeedbackDailyStats.event_id == Event.id).group_by(FeedbackDailyStats.day).order_by(FeedbackDailyStats.day)
+
+def feedback_analytics(rows):
+    """Rating statistics and response rate over feedback analytics rows"""
+    histogram = RatingHistogram()
+    for row in rows:
+        histogram.add(RatingHistogram.from_row(row))
+    attended = sum(row['attendance_count'] for row in rows)
+    return {
+        **histogram.summary(),
+        'total_attended': attended,
+        'response_rate': round(histogram.total / attended * 100, 2) if attended > 0 else 0
+    }
+
+@bp.route('/reports/feedback-analytics', methods=['GET'])
+@cached_response('events', 'participation')
+def report_feedback_analytics():
+    """Rating histogram, percentiles, response rate and daily or weekly trend of the chosen events' feedback"""
+    try:
+        ids = parse_report_ids()
+        conditions = event_report_conditions(ids)
+        bucket = request.args.get('bucket', 'week')
+        
+        rows = [FEEDBACK_ANALYTICS.to_dict(row) for row in scatter_rows(
+            FEEDBACK_ANALYTICS_QUERY.where(*conditions), key=lambda row: row.event_id
+        )]
+        by_type = {}
+        for row in rows:
+            by_type.setdefault(row['event_type'], []).append(row)
+        trend = rating_trend(sum_rows(scatter_rows(FEEDBACK_TREND_QUERY.where(*conditions)), 'day'), bucket)
+        
+        trend_list = []
+        for start, histogram in trend:
+            trend_list.append({
+                'start': start.isoformat(),
+                'total_feedback': histogram.total,
+                'average_rating': histogram.mean(),
+                'median_rating': histogram.percentile(50),
+                'histogram': histogram.summary()['histogram']
+            })
+        
+        response = {
+            'success': True,
+            'bucket': bucket,
+            'summary': {'total_events': len(rows), **feedback_analytics(rows)},
+            'event_types': [
+                {'event_type': name, 'total_events': len(group), **feedback_analytics(group)}
+                for name, group in sorted(by_type.items())
+            ],
+            'trend': trend_list,
+            'events': [
+                {'event_id': row['event_id'], 'event_title': row['event_title'], 'event_type': row['event_type'],
+                 **feedback_analytics([row])}
+                for row in rows
+            ]
+        }
+        if ids is not None:
+            found = {row['event_id'] for row in rows}
+            response['not_found'] = [event_id for event_id in ids if event_id not in found]
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+# Report Job Routes
+# Cross-event analytics that take too long for the request thread. Each report
+# is a function of keyword parameters, listed with their types, that returns
+# a list of row dicts; POST /reports/jobs queues it and a JobRunner thread,
+# in this or any other process, computes it.
+def distinct_students_by(key_column, participation, event_filter=None):
+    """{key: set of student ids} over participation rows, archived ones included, joined to their events, from every shard"""
+    selects = []
+    for table in (participation, ARCHIVE_MODELS[participation]):
+        select = db.select(key_column.label('key'), table.student_id).join(Event, table.event_id == Event.id)
+        selects.append(select if event_filter is None else select.where(event_filter))
+    statement = db.union(*selects)
+    students = {}
+    for row in scatter_rows(statement):
+        students.setdefault(row.key, set()).add(row.student_id)
+    return students
+
+def student_participation_report(college_id=None, student_ids=None):
+    """Registrations, attendance and feedback of every student, or of a college's or the listed ones, most active first"""
+    stats_query = db.select(
+        StudentStats.student_id, StudentStats.registrations_count, StudentStats.attendance_count,
+        StudentStats.feedback_count
+    )
+    students = db.select(Student.id, Student.name, Student.srn, College.name.label('college_name')).join(
+        College, Student.college_id == College.id
+    )
+    if college_id is not None:
+        # Shards hold a copy of every student with participation there
+        stats_query = stats_query.join(Student, StudentStats.student_id == Student.id).where(
+            Student.college_id == college_id
+        )
+        students = students.where(Student.college_id == college_id)
+    if student_ids is not None:
+        stats_query = stats_query.where(StudentStats.student_id.in_(student_ids))
+        students = students.where(Student.id.in_(student_ids))
+    totals = {stats['student_id']: stats for stats in sum_rows(scatter_rows(stats_query), 'student_id')}
+    
+    rows = []
+    for student in read_rows(students):
+        stats = totals.get(student.id, {})
+        registered = stats.get('registrations_count', 0)
+        attended = stats.get('attendance_count', 0)
+        rows.append({
+            'student_id': student.id,
+            'student_name': student.name,
+            'srn': student.srn,
+            'college_name': student.college_name,
+            'events_registered': registered,
+            'events_attended': attended,
+            'feedback_given': stats.get('feedback_count', 0),
+            'attendance_rate': round(attended / registered * 100, 2) if registered else 0
+        })
+    rows.sort(key=lambda row: (-row['events_attended'], row['student_id']))
+    return rows
+
+def monthly_report(status='Completed'):
+    """Per-month totals for events with `status`, with the number of distinct participants"""
+    month = db.func.strftime('%Y-%m', Event.date)
+    participants = distinct_students_by(month, Registration, Event.status == status)
+    results = sum_rows(scatter_rows(db.select(
+        MonthlyStats.month, MonthlyStats.events_count, MonthlyStats.registrations_count,
+        MonthlyStats.attendance_count, MonthlyStats.feedback_count
+    ).where(MonthlyStats.status == status)), 'month')
+    results = [stats for stats in results if stats['events_count']]
+    results.sort(key=lambda stats: stats['month'], reverse=True)
+    return [{
+        'month': stats['month'],
+        'events_conducted': stats['events_count'],
+        'unique_participants': len(participants.get(stats['month'], ())),
+        'total_registrations': stats['registrations_count'],
+        'total_attendance': stats['attendance_count'],
+        'total_feedback': stats['feedback_count']
+    } for stats in results]
+
+def event_type_report():
+    """Per-type totals, with the number of distinct students who registered for and attended each type"""
+    registrants = distinct_students_by(Event.type, Registration)
+    attendees = distinct_students_by(Event.type, Attendance)
+    results = sum_rows(scatter_rows(db.select(*EventTypeStats.__table__.columns)), 'type')
+    results = [stats for stats in results if stats['events_count']]
+    results.sort(key=lambda stats: (-stats['events_count'], stats['type']))
+    return [{
+        'event_type': stats['type'],
+        'total_events': stats['events_count'],
+        'unique_registrants': len(registrants.get(stats['type'], ())),
+        'unique_attendees': len(attendees.get(stats['type'], ())),
+        'total_registrations': stats['registrations_count'],
+        'total_attendance': stats['attendance_count'],
+        'total_feedback': stats['feedback_count'],
+        'average_rating': round(stats['rating_sum'] / stats['feedback_count'], 2) if stats['feedback_count'] > 0 else 0
+    } for stats in results]
+
+REPORT_JOBS = {
+    'student-participation': (student_participation_report, {'college_id': int}),
+    'monthly': (monthly_report, {'status': str}),
+    'event-types': (event_type_report, {}),
+}
+
+def parse_report_params(report, params):
+    """Validate a report's parameters and return them as canonical JSON"""
+    if not isinstance(params, dict):
+        raise ValueError('params must be an object')
+    types = REPORT_JOBS[report][1]
+    unknown = sorted(set(params) - set(types))
+    if unknown:
+        raise ValueError(f"Unknown params for {report}: {', '.join(unknown)}")
+    for name, value in params.items():
+        if value is not None and (not isinstance(value, types[name]) or isinstance(value, bool)):
+            raise ValueError(f'{name} must be {types[name].__name__}')
+    return json.dumps({name: value for name, value in params.items() if value is not None}, sort_keys=True)
+
+REPORT_JOB = projection(
+    ReportJob.id, ReportJob.report, ReportJob.params, ReportJob.status, ReportJob.error, iso_text(ReportJob.created_at),
+    iso_text(ReportJob.started_at), iso_text(ReportJob.finished_at), iso_text(ReportJob.expires_at),
+    params=json.loads
+)
+REPORT_JOB_QUERY = db.select(*REPORT_JOB.columns).where(
+    ReportJob.id == db.bindparam('job_id'),
+    db.or_(ReportJob.expires_at.is_(None), ReportJob.expires_at > db.bindparam('now', type_=ReportJob.expires_at.type))
+)
+REPORT_JOB_RESULT_QUERY = db.select(ReportJob.report, ReportJob.status, ReportJob.result).where(
+    ReportJob.id == db.bindparam('job_id'),
+    db.or_(ReportJob.expires_at.is_(None), ReportJob.expires_at > db.bindparam('now', type_=ReportJob.expires_at.type))
+)
+REPORT_JOB_ACTIVE = ('queued', 'running')
+report_job_logger = logging.getLogger('unibuzz.report_jobs')
+
+def report_job_dict(job):
+    job = dict(job)
+    if job['status'] == 'done':
+        job['result_url'] = f"/reports/jobs/{job['id']}/result"
+    return job
+
+def enqueue_report_job(report, params):
+    """Find an identical queued, running or unexpired finished job, or queue a new one; returns (job id, created).
+    
+    Runs in a write transaction, which holds the write lock from BEGIN, so two
+    requests for the same report cannot both miss and queue it twice.
+    """
+    now = datetime.utcnow()
+    job_id = db.session.execute(db.select(ReportJob.id).where(
+        ReportJob.report == report, ReportJob.params == params,
+        db.or_(ReportJob.status.in_(REPORT_JOB_ACTIVE), db.and_(ReportJob.status == 'done', ReportJob.expires_at > now))
+    ).order_by(ReportJob.id.desc()).limit(1)).scalar()
+    if job_id is not None:
+        return job_id, False
+    
+    # Expired results are dropped whenever a new job is queued
+    db.session.execute(db.delete(ReportJob).where(ReportJob.expires_at <= now))
+    job_id = db.session.execute(db.insert(ReportJob).values(
+        report=report, params=params, status='queued', created_at=now
+    ).returning(ReportJob.id)).scalar()
+    return job_id, True
+
+def claim_report_job(app):
+    """Mark the oldest queued (or abandoned) job as running; returns its (id, report, params) or None"""
+    with app.app_context():
+        now = datetime.utcnow()
+        abandoned = now - timedelta(seconds=app.config['REPORT_JOB_TIMEOUT'])
+        # min() rather than ORDER BY id LIMIT 1: the two status lookups are merged without a temporary sort
+        next_job = db.select(db.func.min(ReportJob.id)).where(db.or_(
+            ReportJob.status == 'queued', db.and_(ReportJob.status == 'running', ReportJob.started_at < abandoned)
+        ))
+        # Workers poll every few seconds: look on the read bind first, so an idle poll never takes the write lock
+        if read_execute(next_job).scalar() is None:
+            return None
+        job = db.session.execute(
+            db.update(ReportJob).where(ReportJob.id == next_job.scalar_subquery())
+            .values(status='running', started_at=now).returning(ReportJob.id, ReportJob.report, ReportJob.params),
+            execution_options={'synchronize_session': False}
+        ).first()
+        db.session.commit()
+        return tuple(job) if job is not None else None
+
+def run_report_job(app, job):
+    """Compute a claimed job and store its result, or its error, until REPORT_JOB_TTL seconds from now"""
+    job_id, report, params = job
+    with app.app_context():
+        try:
+            rows = REPORT_JOBS[report][0](**json.loads(params))
+            outcome = {'status': 'done', 'error': None, 'result': json.dumps({
+                'success': True, 'job_id': job_id, 'report': report, 'params': json.loads(params), 'rows': rows
+            })}
+        except Exception as e:
+            db.session.rollback()
+            report_job_logger.exception('Report job %s (%s) failed', job_id, report)
+            outcome = {'status': 'failed', 'error': str(e), 'result': None}
+        
+        finished = datetime.utcnow()
+        db.session.execute(
+            db.update(ReportJob).where(ReportJob.id == job_id, ReportJob.status == 'running').values(
+                finished_at=finished, expires_at=finished + timedelta(seconds=app.config['REPORT_JOB_TTL']), **outcome
+            ),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+
+@bp.route('/reports/jobs', methods=['POST'])
+def create_report_job():
+    """Queue a background report, or return the identical job already queued, running or finished"""
+    try:
+        data = request.get_json()
+        report = data.get('report')
+        if report not in REPORT_JOBS:
+            return jsonify({
+                'success': False,
+                'message': f"Unknown report; available: {', '.join(REPORT_JOBS)}"
+            }), 400
+        params = parse_report_params(report, data.get('params') or {})
+        
+        job_id, created = enqueue_report_job(report, params)
+        db.session.commit()
+        
+        job = read_rows(REPORT_JOB_QUERY, {'job_id': job_id, 'now': datetime.utcnow()}).first()
+        if job.status in REPORT_JOB_ACTIVE:
+            app_state().report_jobs.notify()
+        
+        return jsonify({
+            'success': True,
+            'deduplicated': not created,
+            'job': report_job_dict(REPORT_JOB.to_dict(job))
+        }), 200 if job.status == 'done' else 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@bp.route('/reports/jobs/<int:job_id>', methods=['GET'])
+def get_report_job(job_id):
+    """Get the status of a background report"""
+    try:
+        job = read_rows(REPORT_JOB_QUERY, {'job_id': job_id, 'now': datetime.utcnow()}).first()
+        if job is None:
+            return jsonify({'success': False, 'message': 'Job not found or expired'}), 404
+        
+        return jsonify({'success': True, 'job': report_job_dict(REPORT_JOB.to_dict(job))}), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@bp.route('/reports/jobs/<int:job_id>/result', methods=['GET'])
+def get_report_job_result(job_id):
+    """Download the stored result of a finished background report"""
+    try:
+        job = read_rows(REPORT_JOB_RESULT_QUERY, {'job_id': job_id, 'now': datetime.utcnow()}).first()
+        if job is None:
+            return jsonify({'success': False, 'message': 'Job not found or expired'}), 404
+        if job.status != 'done':
+            return jsonify({'success': False, 'status': job.status, 'message': f'Job is {job.status}'}), 409
+        
+        return Response(job.result, mimetype='application/json', headers={
+            'Content-Disposition': f'attachment; filename=report-{job_id}-{job.report}.json'
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+# Metrics Routes
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Per-route request and SQL metrics in the Prometheus text format"""
+    return Response(app_state().metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# CLI Commands
+@bp.cli.command('migrate')
+def migrate_command():
+    """Create missing tables and apply pending schema migrations"""
+    for shard in each_database():
+        # The schema_migrations table itself may be new; migrations then change the existing tables
+        if shard is None:
+            db.create_all(bind_key=None)
+        else:
+            db.metadata.create_all(shard.engine)
+        applied = apply_migrations()
+        name = 'Database' if shard is None else f'Shard of college {shard.college_id}'
+        click.echo(f'{name}: applied migrations {applied}' if applied else f'{name} is up to date')
 
-    # Add sample data if tables are empty
-    if College.query.count() == 0:
-        # Add sample colleges
-        college1 = College(name='Engineering College A')
-        college2 = College(name='Arts & Science College B')
-        db.session.add(college1)
-        db.session.add(college2)
+@bp.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute all report rollups from the participation tables"""
+    events = 0
+    for shard in each_database():
+        rebuild_report_rollups()
         db.session.commit()
+        events += EventStats.query.count()
+    click.echo(f'Rebuilt rollups for {events} events and {Student.query.count()} students')
 
-        # Add sample students
-        student1 = Student(college_id=college1.id, name='John Doe', srn='ENG001', email='john@example.com')
-        student2 = Student(college_id=college1.id, name='Jane Smith', srn='ENG002', email='jane@example.com')
-        db.session.add(student1)
-        db.session.add(student2)
+@bp.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Re-index every event for full-text search"""
+    for shard in each_database():
+        rebuild_events_search_index()
         db.session.commit()
+    click.echo('Rebuilt the event search index')
 
-        # Add sample event
-        event1 = Event(
-            college_id=college1.id,
-            title='Python Workshop',
-            description='Learn Python programming basics',
-            type='Workshop',
-            date=date(2024, 12, 15),
-            time=time(10, 0),
-            venue='Lab 1',
-            resources='{"materials": ["slides.pdf", "code.zip"]}'
+@bp.cli.command('archive')
+@click.option('--before', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Archive events dated before this day [default: ARCHIVE_AFTER_DAYS ago]')
+@click.option('--chunk-size', default=ARCHIVE_CHUNK_SIZE, show_default=True, help='Events moved per transaction')
+@click.option('--vacuum', is_flag=True, help='Finish with a full VACUUM, which blocks writers while it runs')
+def archive_command(before, chunk_size, vacuum):
+    """Move participation rows of old Completed and Cancelled events to the archive tables, then compact"""
+    cutoff = before.date() if before else date.today() - timedelta(days=current_app.config['ARCHIVE_AFTER_DAYS'])
+    for shard in each_database():
+        moved = archive_events(cutoff, chunk_size)
+        reclaimed = compact_database(vacuum)
+        name = 'Database' if shard is None else f'Shard of college {shard.college_id}'
+        click.echo(
+            f"{name}: archived {moved['events']} events dated before {cutoff} ({moved['registrations']} registrations, "
+            f"{moved['attendance']} attendance, {moved['feedback']} feedback rows); "
+            f'reclaimed {reclaimed / 1024 / 1024:.1f} MB'
         )
-        db.session.add(event1)
+
+def file_import_format(path, import_format):
+    import_format = import_format or IMPORT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if import_format is None:
+        raise click.UsageError('Cannot tell the file format from its extension; pass --format')
+    return import_format
+
+def echo_import_report(report):
+    click.echo(f"Imported {report['imported']} rows; {report['failed']} rejected")
+    for error in report['errors']:
+        click.echo(f"  row {error['row']}: {error['message']}", err=True)
+    if report['errors_truncated']:
+        click.echo(f'  (only the first {MAX_IMPORT_ERRORS} errors are listed)', err=True)
+
+@bp.cli.command('import-students')
+@click.argument('college_id', type=int)
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'import_format', type=click.Choice(list(EXPORT_FORMATS)),
+              help='csv or ndjson [default: from the file extension]')
+def import_students_command(college_id, path, import_format):
+    """Create a college's students from a CSV or NDJSON file with name, srn and email"""
+    if read_execute(db.select(College.id).where(College.id == college_id)).scalar() is None:
+        raise click.UsageError(f'College {college_id} not found')
+    with open(path, 'rb') as stream:
+        echo_import_report(import_students(
+            college_id, parse_import(stream, file_import_format(path, import_format), STUDENT_IMPORT_FIELDS)
+        ))
+
+@bp.cli.command('import-events')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'import_format', type=click.Choice(list(EXPORT_FORMATS)),
+              help='csv or ndjson [default: from the file extension]')
+def import_events_command(path, import_format):
+    """Create events from a CSV or NDJSON file with the fields of POST /events"""
+    with open(path, 'rb') as stream:
+        echo_import_report(import_events(
+            parse_import(stream, file_import_format(path, import_format), EVENT_IMPORT_FIELDS)
+        ))
+
+@bp.cli.command('init-db')
+def init_db_command():
+    """Create the schema and apply pending migrations"""
+    applied = init_db()
+    click.echo(f'Initialized the database; applied migrations: {applied}' if applied else 'Database is up to date')
+
+@bp.cli.command('seed')
+def seed_command():
+    """Add the demo colleges, students and event to an empty database"""
+    click.echo('Added demo data' if seed_demo_data() else 'Database already has data; nothing added')
+
+@bp.cli.command('set-password')
+@click.argument('student_id', type=int)
+@click.password_option()
+def set_password_command(student_id, password):
+    """Set the password a student logs in with"""
+    updated = db.session.execute(
+        db.update(Student).where(Student.id == student_id).values(password_hash=generate_password_hash(password))
+    ).rowcount
+    if not updated:
+        raise click.UsageError(f'Student {student_id} not found')
+    db.session.commit()
+    click.echo(f'Password set for student {student_id}')
+
+@bp.cli.command('issue-token')
+@click.option('--role', type=click.Choice(TOKEN_ROLES), default='organizer', show_default=True)
+@click.option('--college-id', type=int, help='college the holder belongs to')
+@click.option('--student-id', type=int, help='student the token acts for; required for the student role')
+@click.option('--ttl', type=int, help='seconds until it expires [default: AUTH_TOKEN_TTL]')
+def issue_token_command(role, college_id, student_id, ttl):
+    """Print a signed token, e.g. for an organizer's dashboard or a gate scanner"""
+    if role == 'student' and student_id is None:
+        raise click.UsageError('--student-id is required for the student role')
+    click.echo(issue_token(student_id, college_id, role, ttl=ttl))
+
+@bp.cli.command('split-shards')
+@click.argument('source', type=click.Path(exists=True, dir_okay=False))
+def split_shards_command(source):
+    """Copy a single-file database, migrated to the current schema, into the directory and one shard per college under SHARDS_DIR"""
+    if app_state().shard_router is None:
+        raise click.UsageError('Set SHARDS_DIR to split a database into shards')
+    shards = split_into_shards(os.path.abspath(source))
+    click.echo(f'Split {source} into {shards} college shards under {app_state().shard_router.shards_dir}')
+
+# Database setup, run explicitly rather than on import
+def init_db():
+    """Create missing tables and apply pending migrations; returns the versions applied.
+    
+    When sharded, every college in the directory also gets its shard.
+    """
+    # Every model lives on the default bind; the read bind is the same database
+    db.create_all(bind_key=None)
+    applied = apply_migrations()
+    if app_state().shard_router is not None:
+        for college_id in db.session.scalars(db.select(College.id).order_by(College.id)).all():
+            init_shard(college_id)
+    return applied
+
+def init_shard(college_id):
+    """Create a college's shard and copy its college and student rows in from the directory"""
+    shard = app_state().shard_router.shard(college_id, create=True)
+    db.metadata.create_all(shard.engine)
+    g.shard = shard
+    try:
+        apply_migrations()
+        copy_from_directory(College, College.id == college_id)
+        copy_from_directory(Student, Student.college_id == college_id)
+        db.session.commit()
+    finally:
+        g.shard = None
+
+def copy_rows_sql(model, condition):
+    """INSERT copying a model's rows matching `condition` from the attached `source` database"""
+    table = model.__tablename__
+    columns = ', '.join(column.name for column in model.__table__.columns)
+    return f'INSERT OR IGNORE INTO main.{table} ({columns}) SELECT {columns} FROM source.{table} WHERE {condition}'
+
+def run_attached(engine, source, statements):
+    """Run (sql, params) statements in one transaction with the `source` database attached"""
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute('ATTACH DATABASE ? AS source', (source,))
+        cursor.execute('BEGIN IMMEDIATE')
+        for sql, params in statements:
+            cursor.execute(sql, params)
+        cursor.execute('COMMIT')
+        cursor.execute('DETACH DATABASE source')
+        cursor.close()
+    finally:
+        connection.close()
+
+def split_into_shards(source):
+    """Load a single-file database into the directory and one shard per college; returns the shard count"""
+    db.create_all(bind_key=None)
+    apply_migrations()
+    run_attached(db.engine, source, [
+        (copy_rows_sql(College, '1'), ()),
+        (copy_rows_sql(Student, '1'), ()),
+        ('INSERT OR IGNORE INTO event_directory (event_id, college_id) SELECT id, college_id FROM source.events', ())
+    ])
+    init_db()
+    
+    shards = 0
+    for shard in each_database():
+        if shard is not None:
+            # Students of other colleges come along with their registrations
+            participation = 'event_id IN (SELECT id FROM main.events)'
+            run_attached(shard.engine, source, [
+                (copy_rows_sql(Event, 'college_id = ?'), (shard.college_id,)),
+                (copy_rows_sql(Registration, participation), ()),
+                (copy_rows_sql(Attendance, participation), ()),
+                (copy_rows_sql(Feedback, participation), ()),
+                (copy_rows_sql(WaitlistEntry, participation), ()),
+                *((copy_rows_sql(model, participation), ()) for model in ARCHIVE_MODELS.values()),
+                (copy_rows_sql(Student, 'id IN (SELECT student_id FROM main.registrations '
+                                        'UNION SELECT student_id FROM main.registrations_archive '
+                                        'UNION SELECT student_id FROM main.waitlist)'), ())
+            ])
+            rebuild_report_rollups()
+            db.session.commit()
+            shards += 1
+        db.session.execute(db.text('ANALYZE'))
         db.session.commit()
+    return shards
+
+def seed_demo_data():
+    """Add sample data if tables are empty; returns whether anything was added"""
+    if College.query.count() > 0:
+        return False
+    
+    # Add sample colleges
+    college1 = College(name='Engineering College A')
+    college2 = College(name='Arts & Science College B')
+    db.session.add(college1)
+    db.session.add(college2)
+    db.session.commit()
+    
+    # Add sample students, who log in with the password "password"
+    password_hash = generate_password_hash('password')
+    student1 = Student(
+        college_id=college1.id, name='John Doe', srn='ENG001', email='john@example.com', password_hash=password_hash
+    )
+    student2 = Student(
+        college_id=college1.id, name='Jane Smith', srn='ENG002', email='jane@example.com', password_hash=password_hash
+    )
+    db.session.add(student1)
+    db.session.add(student2)
+    db.session.commit()
+    if app_state().shard_router is not None:
+        for college in (college1, college2):
+            init_shard(college.id)
+    
+    # Add sample event
+    add_event(
+        college_id=college1.id,
+        title='Python Workshop',
+        description='Learn Python programming basics',
+        type='Workshop',
+        date=date(2024, 12, 15),
+        time=time(10, 0),
+        venue='Lab 1',
+        resources='{"materials": ["slides.pdf", "code.zip"]}'
+    )
+    db.session.commit()
+    return True
+
+# Application factory
+def create_app(config=None):
+    """Build a configured application.
+    
+    Nothing here touches the database: engines connect on first use, and the
+    schema is created by `flask init-db` (or init_db()) instead of on import.
+    """
+    app = Flask(__name__)
+    app.config.from_mapping(default_config())
+    if config:
+        app.config.from_mapping(config)
+    if app.config['AUTH_REQUIRED'] and app.config.get('SECRET_KEY') in (None, '', DEFAULT_SECRET_KEY):
+        raise RuntimeError('AUTH_REQUIRED needs SECRET_KEY set to a secret value')
+    configure_engines(app.config)
+    db.init_app(app)
+    
+    state = app.extensions['unibuzz'] = AppState(app)
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            apply_sqlite_pragmas(engine, app.config['SQLITE_PRAGMAS'], read_only=(bind_key == 'read'))
+            instrument_engine(engine, state.metrics)
+    
+    request_started.connect(start_request_trace, app)
+    request_finished.connect(finish_request_trace, app)
+    data_changed.connect(invalidate_cached_responses, app)
+    activity_committed.connect(publish_activity, app)
+    if app.config['AUTH_REQUIRED']:
+        app.before_request(functools.partial(authenticate_request, state.token_signer))
+    app.register_blueprint(bp)
+    return app
+
 if __name__ == '__main__':
+    app = create_app()
+    # The development server sets up and seeds its database itself
+    with app.app_context():
+        init_db()
+        seed_demo_data()
     app.run(debug=True)
-
@@ -0,0 +1,67 @@
+"""Stateless auth tokens: HMAC-signed, expiring claims that need no lookup to verify"""
+import base64
+import functools
+import hashlib
+import hmac
+import json
+import time
+
+
+class InvalidToken(Exception):
+    """A token that is malformed, forged or expired"""
+
+
+def _encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class TokenSigner:
+    """Issues and verifies `<claims>.<signature>` tokens.
+
+    The claims are base64url JSON with an `exp` Unix time, and the signature
+    is HMAC-SHA256 of the encoded claims under `secret`, compared in constant
+    time. Verified tokens are kept in an LRU of `cache_size` entries, so a
+    client sending the same token on every request pays for the HMAC once;
+    expiry is still checked on every use.
+    """
+
+    def __init__(self, secret, ttl=3600, cache_size=4096):
+        if isinstance(secret, str):
+            secret = secret.encode()
+        self._key = hmac.new(b'unibuzz-auth-token', secret, hashlib.sha256).digest()
+        self.ttl = ttl
+        self._verified = functools.lru_cache(maxsize=cache_size)(self._check)
+
+    def _sign(self, payload):
+        return _encode(hmac.new(self._key, payload.encode('ascii'), hashlib.sha256).digest())
+
+    def issue(self, claims, ttl=None):
+        """A token carrying `claims`, valid for `ttl` seconds (the signer's default if None)"""
+        claims = {**claims, 'exp': int(time.time() + (self.ttl if ttl is None else ttl))}
+        payload = _encode(json.dumps(claims, separators=(',', ':'), sort_keys=True).encode())
+        return f'{payload}.{self._sign(payload)}'
+
+    def verify(self, token):
+        """The claims of a genuine, unexpired token; raises InvalidToken otherwise. Callers must not modify them."""
+        claims = self._verified(token)
+        if claims['exp'] <= time.time():
+            raise InvalidToken('Token expired')
+        return claims
+
+    def _check(self, token):
+        if not token.isascii():
+            raise InvalidToken('Malformed token')
+        payload, _, signature = token.partition('.')
+        if not hmac.compare_digest(self._sign(payload), signature):
+            raise InvalidToken('Invalid token signature')
+        try:
+            claims = json.loads(_decode(payload))
+        except ValueError:
+            raise InvalidToken('Malformed token') from None
+        if not isinstance(claims, dict) or not isinstance(claims.get('exp'), int):
+            raise InvalidToken('Malformed token')
+        return claims
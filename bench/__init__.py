@@ -0,0 +1,10 @@
+"""Benchmark tooling for UniBuzz.
+
+bench.datagen   builds a deterministic synthetic campus database
+bench.runner    drives every route and records latency, throughput and SQL counts
+bench.compare   diffs two runner result files
+bench.serializers  times the read-path row serializers against the ORM
+bench.startup   times worker import, app creation and the first request
+bench.writeload  measures registration throughput from several processes
+bench.seatrush  rushes one capped event and checks seat counts and the waitlist
+"""
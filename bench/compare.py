@@ -0,0 +1,102 @@
+"""Compare two bench.runner result files.
+
+    python -m bench.compare bench/results/before.json bench/results/after.json
+    python -m bench.compare before.json after.json --threshold 0.2
+
+A route is flagged when its p95 latency grows by more than `--threshold`
+(default 10%) or it issues more SQL statements per request than before. The
+exit status is 1 when any route is flagged, so the comparison can gate CI.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def change(before, after):
+    """Relative change from before to after, or None when it cannot be computed"""
+    if before is None or after is None or before == 0:
+        return None
+    return (after - before) / before
+
+
+def format_change(value):
+    return '' if value is None else f'{value:+.0%}'
+
+
+def describe(meta):
+    commit = meta.get('git_commit') or 'unknown'
+    if meta.get('git_dirty'):
+        commit += '+dirty'
+    label = f' ({meta["label"]})' if meta.get('label') else ''
+    return (f'{commit}{label} on {meta.get("dataset")}, {meta.get("transport")}, '
+            f'concurrency {meta.get("concurrency")}, {meta.get("timestamp")}')
+
+
+def compare(before, after, threshold):
+    """Print a per-route table and return the names of the regressed routes"""
+    print(f'before: {describe(before["meta"])}')
+    print(f'after:  {describe(after["meta"])}')
+    if (before['meta'].get('dataset'), before['meta'].get('concurrency')) != \
+            (after['meta'].get('dataset'), after['meta'].get('concurrency')):
+        print('warning: the runs used different datasets or concurrency')
+    print()
+
+    header = (f'{"route":<40}{"p50":>9}{"":>8}{"p95":>9}{"":>8}{"p99":>9}{"":>8}'
+              f'{"req/s":>9}{"":>8}{"sql":>7}')
+    print(header)
+    print('-' * len(header))
+
+    regressions = []
+    for name in list(before['routes']) + [name for name in after['routes'] if name not in before['routes']]:
+        old, new = before['routes'].get(name), after['routes'].get(name)
+        if old is None or new is None:
+            print(f'{name:<40}  {"only in after" if old is None else "only in before"}')
+            continue
+
+        cells = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+            cells.append(f'{new[key]:>9.2f}{format_change(change(old[key], new[key])):>8}')
+        sql = '-' if new['sql_per_request'] is None else f'{new["sql_per_request"]:g}'
+
+        flags = []
+        p95_change = change(old['p95_ms'], new['p95_ms'])
+        if p95_change is not None and p95_change > threshold:
+            flags.append('p95')
+        if None not in (old['sql_per_request'], new['sql_per_request']) and \
+                new['sql_per_request'] > old['sql_per_request']:
+            flags.append(f'sql {old["sql_per_request"]:g}->{new["sql_per_request"]:g}')
+        if flags:
+            regressions.append(name)
+        # Different status codes are worth a look but not a regression by themselves
+        if old['status_counts'] != new['status_counts']:
+            flags.append(f'status {new["status_counts"]}')
+
+        print(f'{name:<40}{"".join(cells)}{sql:>7}  {" ".join(flags)}')
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two bench.runner result files.')
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='allowed relative p95 growth before a route is flagged (default 0.10)')
+    args = parser.parse_args(argv)
+
+    regressions = compare(load(args.before), load(args.after), args.threshold)
+    print()
+    if regressions:
+        print(f'{len(regressions)} route(s) regressed: {", ".join(regressions)}')
+        return 1
+    print('No regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
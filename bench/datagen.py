@@ -0,0 +1,198 @@
+"""Deterministic synthetic campus dataset generator.
+
+    python -m bench.datagen --preset small --output bench/data/small.db
+    python -m bench.datagen --preset full --output bench/data/full.db
+
+The same preset and seed always produce the same rows. Rows are written with
+executemany in large transactions straight through the DB-API connection, so
+the full preset (5M registrations) loads in minutes rather than hours.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+PRESETS = {
+    'small': {'colleges': 5, 'students': 2_000, 'events': 200, 'registrations': 20_000},
+    'medium': {'colleges': 20, 'students': 20_000, 'events': 2_000, 'registrations': 300_000},
+    'full': {'colleges': 50, 'students': 200_000, 'events': 20_000, 'registrations': 5_000_000},
+}
+
+EVENT_TYPES = ['Workshop', 'Seminar', 'Hackathon', 'Fest', 'Talk', 'Sports', 'Cultural', 'Placement']
+TOPICS = ['Python', 'Machine Learning', 'Robotics', 'Design', 'Finance', 'Music', 'Drama', 'Cloud',
+          'Security', 'Entrepreneurship', 'Photography', 'Debate', 'Chess', 'Football', 'Data']
+VENUES = ['Main Auditorium', 'Lab 1', 'Lab 2', 'Seminar Hall', 'Open Air Theatre', 'Library Hall',
+          'Sports Complex', 'Conference Room']
+
+ATTENDANCE_RATE = 0.6
+FEEDBACK_RATE = 0.5
+FIRST_EVENT_DAY = date(2023, 1, 1)
+EVENT_DAYS = 3 * 365
+COMPLETED_BEFORE = date(2025, 6, 1)
+CHUNK_SIZE = 50_000
+
+
+class _ChunkedInserter:
+    """Buffers rows for one INSERT and writes them with executemany, one transaction per chunk"""
+
+    def __init__(self, connection, sql):
+        self.connection = connection
+        self.sql = sql
+        self.rows = []
+        self.total = 0
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            cursor = self.connection.cursor()
+            cursor.execute('BEGIN')
+            cursor.executemany(self.sql, self.rows)
+            cursor.execute('COMMIT')
+            cursor.close()
+            self.total += len(self.rows)
+            self.rows = []
+        return self.total
+
+
+def _insert(connection, sql, rows):
+    inserter = _ChunkedInserter(connection, sql)
+    for row in rows:
+        inserter.add(row)
+    return inserter.flush()
+
+
+def populate(connection, colleges, students, events, registrations, seed=42):
+    """Insert a synthetic campus through a DB-API connection in autocommit mode.
+
+    Returns the number of rows written per table. Dates and times use
+    SQLAlchemy's SQLite storage format, so the ORM reads them back unchanged.
+    """
+    rng = random.Random(seed)
+    counts = {}
+
+    counts['colleges'] = _insert(
+        connection, 'INSERT INTO colleges (id, name, created_at) VALUES (?, ?, ?)',
+        ((i, f'College {i:03d}', '2022-06-01 09:00:00.000000') for i in range(1, colleges + 1))
+    )
+    counts['students'] = _insert(
+        connection,
+        'INSERT INTO students (id, college_id, name, srn, email, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+        ((i, rng.randint(1, colleges), f'Student {i}', f'SRN{i:07d}', f'student{i}@campus.example.edu',
+          '2022-07-01 09:00:00.000000') for i in range(1, students + 1))
+    )
+
+    event_days = {}
+
+    def event_rows():
+        for i in range(1, events + 1):
+            day = FIRST_EVENT_DAY + timedelta(days=rng.randrange(EVENT_DAYS))
+            event_days[i] = day
+            topic = rng.choice(TOPICS)
+            event_type = rng.choice(EVENT_TYPES)
+            if day < COMPLETED_BEFORE:
+                status = 'Cancelled' if rng.random() < 0.05 else 'Completed'
+            else:
+                status = 'Cancelled' if rng.random() < 0.05 else 'Active'
+            yield (
+                i, rng.randint(1, colleges), f'{topic} {event_type} #{i}',
+                f'A {event_type.lower()} about {topic.lower()} for students of every year.',
+                event_type, day.isoformat(), f'{rng.randrange(8, 20):02d}:{rng.choice([0, 30]):02d}:00.000000',
+                rng.choice(VENUES), status, '{"materials": []}', '2022-08-01 09:00:00.000000'
+            )
+
+    counts['events'] = _insert(
+        connection,
+        'INSERT INTO events (id, college_id, title, description, type, date, time, venue, status, resources, '
+        'created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        event_rows()
+    )
+
+    # Registration counts per event vary between 20% and 180% of the average.
+    # Attendance and feedback are drawn from each event's registrations in the
+    # same pass, so nothing is held in memory beyond one chunk per table.
+    registrations_out = _ChunkedInserter(
+        connection, 'INSERT INTO registrations (event_id, student_id, registered_at) VALUES (?, ?, ?)'
+    )
+    attendance_out = _ChunkedInserter(
+        connection, 'INSERT INTO attendance (event_id, student_id, attended_at) VALUES (?, ?, ?)'
+    )
+    feedback_out = _ChunkedInserter(
+        connection, 'INSERT INTO feedback (event_id, student_id, rating, comment, created_at) VALUES (?, ?, ?, ?, ?)'
+    )
+    average = registrations / events if events else 0
+    for event_id in range(1, events + 1):
+        size = min(students, int(average * rng.uniform(0.2, 1.8)))
+        registered_at = f'{(event_days[event_id] - timedelta(days=7)).isoformat()} 12:00:00.000000'
+        attended_at = f'{event_days[event_id].isoformat()} 10:00:00.000000'
+        for student_id in rng.sample(range(1, students + 1), size):
+            registrations_out.add((event_id, student_id, registered_at))
+            if rng.random() < ATTENDANCE_RATE:
+                attendance_out.add((event_id, student_id, attended_at))
+                if rng.random() < FEEDBACK_RATE:
+                    feedback_out.add((event_id, student_id, rng.choice([3, 4, 4, 5, 5, 2, 1]),
+                                      'Synthetic feedback', attended_at))
+
+    counts['registrations'] = registrations_out.flush()
+    counts['attendance'] = attendance_out.flush()
+    counts['feedback'] = feedback_out.flush()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic UniBuzz database.')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+    parser.add_argument('--output', default=None, help='database file (default: bench/data/<preset>.db)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--force', action='store_true', help='overwrite an existing database file')
+    for name in ('colleges', 'students', 'events', 'registrations'):
+        parser.add_argument(f'--{name}', type=int, help=f'override the preset number of {name}')
+    args = parser.parse_args(argv)
+
+    sizes = dict(PRESETS[args.preset])
+    for name in sizes:
+        if getattr(args, name) is not None:
+            sizes[name] = getattr(args, name)
+
+    output = os.path.abspath(args.output or os.path.join(os.path.dirname(__file__), 'data', f'{args.preset}.db'))
+    if os.path.exists(output):
+        if not args.force:
+            parser.error(f'{output} exists; pass --force to overwrite it')
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(output + suffix):
+                os.remove(output + suffix)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    from app import create_app, db, init_db, rebuild_report_rollups
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{output}'})
+
+    started = time.perf_counter()
+    with app.app_context():
+        init_db()
+        connection = db.engine.raw_connection()
+        try:
+            connection.execute('PRAGMA synchronous=OFF')
+            counts = populate(connection.driver_connection, seed=args.seed, **sizes)
+        finally:
+            connection.close()
+        loaded = time.perf_counter()
+
+        rebuild_report_rollups()
+        db.session.commit()
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+
+    print(f'Wrote {output}')
+    for table, count in counts.items():
+        print(f'  {table:<14}{count:>12,}')
+    print(f'Loaded rows in {loaded - started:.1f}s, rebuilt rollups in {time.perf_counter() - loaded:.1f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
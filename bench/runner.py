@@ -0,0 +1,585 @@
+"""Route benchmark runner.
+
+    python -m bench.runner --database bench/data/medium.db
+    python -m bench.runner --database bench/data/medium.db --concurrency 8 --requests 500
+    python -m bench.runner --database bench/data/medium.db --url http://127.0.0.1:5000
+
+Every route in app.py is called `--requests` times from `--concurrency`
+threads, one route at a time. By default the requests go through the Flask
+test client against a temporary copy of the database, so write routes never
+touch the dataset and SQL statements can be counted per request. With `--url`
+the requests go to a running server instead (which should be serving the same
+database) and SQL counts are not available.
+
+GET /events/<id>/stream is measured differently: `--subscribers` streams
+are opened on a new event, `--requests` registrations to it are sent from
+`--concurrency` threads, and its latencies are the time from each message's
+`at` stamp (taken as the write queues it, just before commit) to its arrival
+on every stream.
+
+Results are printed as a table and saved as JSON under bench/results/ for
+bench.compare.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STREAM_SCENARIO = 'GET /events/<id>/stream'
+
+
+class Scenario:
+    """One route: `build(rng)` returns the (path, payload) of the next request.
+
+    The payload is sent as JSON, or as the raw body when it is bytes.
+    """
+
+    def __init__(self, name, method, build):
+        self.name = name
+        self.method = method
+        self.build = build
+
+
+class PairPool:
+    """Thread-safe supply of (event_id, student_id) pairs, each handed out once"""
+
+    def __init__(self, pairs):
+        self._pairs = list(pairs)
+        self._lock = threading.Lock()
+
+    def take(self, rng, fallback):
+        with self._lock:
+            if self._pairs:
+                return self._pairs.pop()
+        return fallback(rng)
+
+    def put(self, pair):
+        with self._lock:
+            self._pairs.append(pair)
+
+
+def sample_dataset(database, count, seed):
+    """Read the ids the scenarios need straight from the SQLite file"""
+    connection = sqlite3.connect(database)
+    try:
+        event_ids = [row[0] for row in connection.execute('SELECT id FROM events ORDER BY id')]
+        student_ids = [row[0] for row in connection.execute('SELECT id FROM students ORDER BY id')]
+        college_ids = [row[0] for row in connection.execute('SELECT id FROM colleges ORDER BY id')]
+        # Registered but not yet checked in: half for POST /attendance, half for the gate
+        unattended = connection.execute(
+            'SELECT r.event_id, r.student_id FROM registrations r '
+            'WHERE NOT EXISTS (SELECT 1 FROM attendance a '
+            '                  WHERE a.student_id = r.student_id AND a.event_id = r.event_id) '
+            'ORDER BY r.id LIMIT ?', (2 * count,)
+        ).fetchall()
+        without_feedback = connection.execute(
+            'SELECT a.event_id, a.student_id FROM attendance a '
+            'WHERE NOT EXISTS (SELECT 1 FROM feedback f '
+            '                  WHERE f.student_id = a.student_id AND f.event_id = a.event_id) '
+            'ORDER BY a.id LIMIT ?', (count,)
+        ).fetchall()
+    finally:
+        connection.close()
+
+    if not event_ids or not student_ids:
+        raise SystemExit(f'{database} has no events or students; generate one with python -m bench.datagen')
+
+    rng = random.Random(seed)
+    rng.shuffle(unattended)
+    return {
+        'event_ids': event_ids,
+        'student_ids': student_ids,
+        'college_ids': college_ids,
+        'attendance': unattended[:count],
+        'checkin': unattended[count:],
+        'feedback': without_feedback,
+    }
+
+
+def build_scenarios(sample, client_cursor):
+    """A scenario for every route in app.py"""
+    event_ids = sample['event_ids']
+    student_ids = sample['student_ids']
+    attendance = PairPool(sample['attendance'])
+    checkin = PairPool(sample['checkin'])
+    feedback = PairPool(sample['feedback'])
+    checkin_events = sorted({event_id for event_id, _ in sample['checkin']}) or event_ids
+    created_events = PairPool([])
+    # Report job ids from POST /reports/jobs, and those GET /reports/jobs/<id> found done
+    report_jobs = {'queued': [], 'done': []}
+
+    def event(rng):
+        return rng.choice(event_ids)
+
+    def student(rng):
+        return rng.choice(student_ids)
+
+    def random_pair(rng):
+        return event(rng), student(rng)
+
+    def college(rng):
+        return rng.choice(sample['college_ids'])
+
+    def id_list(rng, ids, count=20):
+        return ','.join(str(i) for i in rng.sample(ids, min(count, len(ids))))
+
+    def semester(rng):
+        year = rng.choice([2023, 2024])
+        return rng.choice([f'from={year}-01-01&to={year}-06-30', f'from={year}-07-01&to={year}-12-31'])
+
+    def new_event(rng):
+        return {
+            'college_id': college(rng), 'title': f'Benchmark Workshop {rng.randrange(10**6)}',
+            'description': 'Created by bench.runner', 'type': 'Workshop', 'date': '2026-03-14', 'time': '10:30',
+            'venue': 'Lab 1',
+        }
+
+    def report_job(rng, state):
+        return rng.choice(report_jobs[state]) if report_jobs[state] else 0
+
+    def student_roster(rng, rows=100):
+        # Every row is a new student; the datagen dataset uses SRN<7 digits>, so 'BENCH' never collides
+        batch = rng.randrange(10**9)
+        lines = ['name,srn,email'] + [
+            f'Bench Student {batch}-{row},BENCH{batch}-{row},bench{batch}-{row}@campus.example.edu'
+            for row in range(rows)
+        ]
+        return ('\n'.join(lines) + '\n').encode()
+
+    def event_roster(rng, rows=20):
+        lines = ['college_id,title,type,date,time,venue'] + [
+            f'{college(rng)},Imported Workshop {rng.randrange(10**6)},Workshop,2026-03-14,10:30,Lab 1'
+            for _ in range(rows)
+        ]
+        return ('\n'.join(lines) + '\n').encode()
+
+    def delete_event(rng):
+        event_id = created_events.take(rng, lambda rng: (0, 0))[0]
+        return f'/events/{event_id}', None
+
+    scenarios = [
+        Scenario('POST /auth/login', 'POST', lambda rng: ('/auth/login', {'email': 'a@b.edu', 'password': 'x'})),
+        Scenario('GET /events', 'GET', lambda rng: ('/events', None)),
+        Scenario('GET /events?type', 'GET', lambda rng: ('/events?type=Workshop', None)),
+        Scenario('GET /events?status&fields', 'GET',
+                 lambda rng: ('/events?status=Completed&fields=id,title,date,venue', None)),
+        Scenario('GET /events?cursor', 'GET', lambda rng: (f'/events?cursor={client_cursor}', None)),
+        Scenario('GET /events/search', 'GET',
+                 lambda rng: (f'/events/search?q={rng.choice(["python", "robotics workshop", "music"])}', None)),
+        Scenario('GET /events/search?prefix', 'GET',
+                 lambda rng: (f'/events/search?q={rng.choice(["mach", "hack", "sem"])}&prefix=1', None)),
+        Scenario('GET /events/<id>', 'GET', lambda rng: (f'/events/{event(rng)}', None)),
+        Scenario('POST /events', 'POST', lambda rng: ('/events', new_event(rng))),
+        Scenario('PUT /events/<id>', 'PUT',
+                 lambda rng: (f'/events/{event(rng)}', {'venue': rng.choice(['Lab 1', 'Lab 2', 'Seminar Hall'])})),
+        Scenario('DELETE /events/<id>', 'DELETE', delete_event),
+        Scenario('POST /colleges/<id>/students/import', 'POST', lambda rng: (
+            f'/colleges/{college(rng)}/students/import?format=csv', student_roster(rng))),
+        Scenario('POST /events/import', 'POST', lambda rng: ('/events/import?format=csv', event_roster(rng))),
+        Scenario('POST /register', 'POST',
+                 lambda rng: ('/register', {'event_id': event(rng), 'student_id': student(rng)})),
+        Scenario('POST /register/bulk', 'POST',
+                 lambda rng: ('/register/bulk', {'event_id': event(rng), 'student_ids': rng.sample(student_ids, 50)})),
+        Scenario('GET /registrations/<id>', 'GET', lambda rng: (f'/registrations/{event(rng)}', None)),
+        Scenario('GET /registrations/<id>?format=csv', 'GET',
+                 lambda rng: (f'/registrations/{event(rng)}?format=csv', None)),
+        Scenario('GET /waitlist/<id>', 'GET', lambda rng: (f'/waitlist/{event(rng)}', None)),
+        Scenario('POST /attendance', 'POST', lambda rng: ('/attendance', dict(zip(
+            ('event_id', 'student_id'), attendance.take(rng, random_pair))))),
+        Scenario('GET /attendance/<id>', 'GET', lambda rng: (f'/attendance/{event(rng)}', None)),
+        Scenario('POST /events/<id>/checkin/preload', 'POST',
+                 lambda rng: (f'/events/{rng.choice(checkin_events)}/checkin/preload', None)),
+        Scenario('POST /attendance/checkin', 'POST', lambda rng: ('/attendance/checkin', dict(zip(
+            ('event_id', 'student_id'), checkin.take(rng, random_pair))))),
+        Scenario('POST /attendance/checkin/flush', 'POST', lambda rng: ('/attendance/checkin/flush', None)),
+        Scenario('POST /feedback', 'POST', lambda rng: ('/feedback', dict(zip(
+            ('event_id', 'student_id'), feedback.take(rng, random_pair)), rating=rng.randint(1, 5)))),
+        Scenario('GET /feedback/<id>', 'GET', lambda rng: (f'/feedback/{event(rng)}', None)),
+        Scenario('GET /reports/registrations/<id>', 'GET', lambda rng: (f'/reports/registrations/{event(rng)}', None)),
+        Scenario('GET /reports/attendance/<id>', 'GET', lambda rng: (f'/reports/attendance/{event(rng)}', None)),
+        Scenario('GET /reports/feedback/<id>', 'GET', lambda rng: (f'/reports/feedback/{event(rng)}', None)),
+        Scenario('GET /reports/popularity', 'GET', lambda rng: ('/reports/popularity?limit=100', None)),
+        Scenario('GET /reports/popularity?type', 'GET', lambda rng: ('/reports/popularity?type=Workshop', None)),
+        Scenario('GET /reports/participation/<id>', 'GET',
+                 lambda rng: (f'/reports/participation/{student(rng)}', None)),
+        Scenario('GET /reports/top-students', 'GET', lambda rng: ('/reports/top-students', None)),
+        Scenario('GET /reports/event-types', 'GET', lambda rng: ('/reports/event-types', None)),
+        Scenario('GET /reports/monthly', 'GET', lambda rng: ('/reports/monthly', None)),
+        Scenario('GET /reports/events?ids', 'GET',
+                 lambda rng: (f'/reports/events?ids={id_list(rng, event_ids)}', None)),
+        Scenario('GET /reports/events?college_id&from&to', 'GET',
+                 lambda rng: (f'/reports/events?college_id={college(rng)}&{semester(rng)}', None)),
+        Scenario('GET /reports/students?ids', 'GET',
+                 lambda rng: (f'/reports/students?ids={id_list(rng, student_ids)}', None)),
+        Scenario('GET /reports/students?college_id', 'GET',
+                 lambda rng: (f'/reports/students?college_id={college(rng)}', None)),
+        Scenario('GET /reports/feedback-analytics?ids', 'GET',
+                 lambda rng: (f'/reports/feedback-analytics?ids={id_list(rng, event_ids)}&bucket=day', None)),
+        Scenario('GET /reports/feedback-analytics?from&to', 'GET',
+                 lambda rng: (f'/reports/feedback-analytics?college_id={college(rng)}&{semester(rng)}', None)),
+        Scenario('GET /students/<id>/feed', 'GET', lambda rng: (f'/students/{student(rng)}/feed', None)),
+        Scenario('GET /students/<id>/feed?from&to&limit', 'GET',
+                 lambda rng: (f'/students/{student(rng)}/feed?{semester(rng)}&limit=5', None)),
+        Scenario('POST /reports/jobs', 'POST', lambda rng: ('/reports/jobs', {
+            'report': 'student-participation', 'params': {'college_id': college(rng)}})),
+        Scenario('GET /reports/jobs/<id>', 'GET', lambda rng: (f'/reports/jobs/{report_job(rng, "queued")}', None)),
+        Scenario('GET /reports/jobs/<id>/result', 'GET',
+                 lambda rng: (f'/reports/jobs/{report_job(rng, "done")}/result', None)),
+        Scenario('GET /metrics', 'GET', lambda rng: ('/metrics', None)),
+    ]
+    return scenarios, created_events, report_jobs
+
+
+class TestClientTransport:
+    """Calls the app in-process, one test client per thread, counting SQL statements per request"""
+
+    counts_sql = True
+
+    def __init__(self, app, db):
+        from sqlalchemy import event as sa_event
+
+        self.app = app
+        self._local = threading.local()
+        for engine in set(db.engines.values()):
+            sa_event.listen(engine, 'before_cursor_execute', self._count_statement)
+
+    def _count_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.statements = getattr(self._local, 'statements', 0) + 1
+
+    def request(self, method, path, payload):
+        if not hasattr(self._local, 'client'):
+            self._local.client = self.app.test_client()
+        self._local.statements = 0
+        if isinstance(payload, bytes):
+            response = self._local.client.open(path, method=method, data=payload)
+        else:
+            response = self._local.client.open(path, method=method, json=payload)
+        body = response.get_data()
+        return response.status_code, body, self._local.statements
+
+    def open_stream(self, path):
+        """(status, iterator of body chunks, close) of a streamed GET"""
+        response = self.app.test_client().get(path, buffered=False)
+        return response.status_code, iter(response.response), response.close
+
+
+class HttpTransport:
+    """Calls a running server over HTTP"""
+
+    counts_sql = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, payload):
+        data = payload if payload is None or isinstance(payload, bytes) else json.dumps(payload).encode()
+        http_request = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if data is not None and not isinstance(payload, bytes):
+            http_request.add_header('Content-Type', 'application/json')
+        try:
+            with urllib.request.urlopen(http_request) as response:
+                return response.status, response.read(), None
+        except urllib.error.HTTPError as e:
+            return e.code, e.read(), None
+
+    def open_stream(self, path):
+        """(status, iterator of body chunks, close) of a streamed GET"""
+        try:
+            response = urllib.request.urlopen(self.base_url + path)
+        except urllib.error.HTTPError as e:
+            return e.code, iter(()), e.close
+        return response.status, iter(lambda: response.read1(65536), b''), response.close
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(transport, scenario, requests, concurrency, warmup, seed, on_response=None):
+    """Call one route `requests` times from `concurrency` threads and summarise the timings"""
+    rng_lock = threading.Lock()
+    rng = random.Random(seed)
+
+    def call(_):
+        with rng_lock:
+            path, payload = scenario.build(rng)
+        started = time.perf_counter()
+        status, body, statements = transport.request(scenario.method, path, payload)
+        elapsed = time.perf_counter() - started
+        if on_response is not None:
+            on_response(scenario, status, body)
+        return elapsed, status, statements
+
+    for i in range(warmup):
+        call(i)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in results)
+    statuses = Counter(str(status) for _, status, _ in results)
+    statement_counts = [statements for _, _, statements in results if statements is not None]
+    return {
+        'method': scenario.method,
+        'requests': requests,
+        'status_counts': dict(sorted(statuses.items())),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'max_ms': round(latencies[-1], 3),
+        'throughput_rps': round(requests / wall, 1) if wall else None,
+        'sql_per_request': round(statistics.fmean(statement_counts), 2) if statement_counts else None,
+        'sql_max': max(statement_counts) if statement_counts else None,
+    }
+
+
+def sse_messages(chunks):
+    """Yield the data of each Server-Sent Events message with a data line, parsed as JSON"""
+    buffer = b''
+    for chunk in chunks:
+        buffer += chunk
+        *frames, buffer = buffer.split(b'\n\n')
+        for frame in frames:
+            for line in frame.split(b'\n'):
+                if line.startswith(b'data: '):
+                    yield json.loads(line[len(b'data: '):])
+
+
+def run_stream_scenario(transport, sample, subscribers, writes, concurrency, seed, timeout=60.0):
+    """Open `subscribers` streams on a new event, register `writes` students to it and time each delivery"""
+    rng = random.Random(seed)
+    status, body, _ = transport.request('POST', '/events', {
+        'college_id': rng.choice(sample['college_ids']), 'title': 'Benchmark Live Event', 'type': 'Workshop',
+        'date': '2026-03-14', 'time': '10:30', 'venue': 'Lab 1',
+    })
+    if status != 201:
+        raise SystemExit(f'Could not create the event to stream: {status} {body[:200]!r}')
+    event_id = json.loads(body)['event_id']
+    student_ids = rng.sample(sample['student_ids'], min(writes, len(sample['student_ids'])))
+
+    latencies = []
+    latencies_lock = threading.Lock()
+    ready = threading.Barrier(subscribers + 1)
+    deadline = time.monotonic() + timeout
+    stream_statuses = Counter()
+
+    def subscribe():
+        # The stream is subscribed once its response starts, so the writes wait only for that
+        try:
+            status, chunks, close = transport.open_stream(f'/events/{event_id}/stream')
+        except Exception:
+            ready.abort()
+            raise
+        received = []
+        try:
+            ready.wait()
+            if status == 200:
+                # Activity messages carry `at`; the snapshot and count refreshes do not
+                for data in sse_messages(chunks):
+                    if 'at' not in data:
+                        continue
+                    arrived = datetime.utcnow()
+                    received.append((arrived - datetime.fromisoformat(data['at'])) / timedelta(milliseconds=1))
+                    if len(received) >= len(student_ids) or time.monotonic() > deadline:
+                        break
+        finally:
+            close()
+            with latencies_lock:
+                stream_statuses[str(status)] += 1
+                latencies.extend(received)
+
+    readers = [threading.Thread(target=subscribe, daemon=True) for _ in range(subscribers)]
+    for reader in readers:
+        reader.start()
+    ready.wait()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        write_statuses = Counter(f'POST {status}' for status, _, _ in pool.map(
+            lambda student_id: transport.request('POST', '/register', {'event_id': event_id, 'student_id': student_id}),
+            student_ids
+        ))
+    for reader in readers:
+        reader.join(max(0.0, deadline - time.monotonic()))
+    wall = time.perf_counter() - started
+
+    with latencies_lock:
+        latencies = sorted(latencies)
+    if not latencies:
+        raise SystemExit(f'No stream message arrived; streams {dict(stream_statuses)}, writes {dict(write_statuses)}')
+    return {
+        'method': 'GET',
+        'requests': len(student_ids),
+        'subscribers': subscribers,
+        'deliveries': len(latencies),
+        'expected_deliveries': len(student_ids) * subscribers,
+        'status_counts': dict(sorted((stream_statuses + write_statuses).items())),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'max_ms': round(latencies[-1], 3),
+        'throughput_rps': round(len(latencies) / wall, 1) if wall else None,
+        'sql_per_request': None,
+        'sql_max': None,
+    }
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(dirty)
+
+
+def copy_database(database):
+    """Copy the dataset (and any WAL) to a temporary directory so write routes leave it untouched"""
+    directory = tempfile.mkdtemp(prefix='unibuzz-bench-')
+    target = os.path.join(directory, os.path.basename(database))
+    for suffix in ('', '-wal'):
+        if os.path.exists(database + suffix):
+            shutil.copyfile(database + suffix, target + suffix)
+    return directory, target
+
+
+def print_table(routes):
+    header = f'{"route":<40}{"p50":>9}{"p95":>9}{"p99":>9}{"req/s":>9}{"sql":>7}  status'
+    print(header)
+    print('-' * len(header))
+    for name, result in routes.items():
+        sql = '-' if result['sql_per_request'] is None else f'{result["sql_per_request"]:g}'
+        statuses = ' '.join(f'{code}x{count}' for code, count in result['status_counts'].items())
+        print(f'{name:<40}{result["p50_ms"]:>9.2f}{result["p95_ms"]:>9.2f}{result["p99_ms"]:>9.2f}'
+              f'{result["throughput_rps"]:>9.1f}{sql:>7}  {statuses}')
+    print('latencies in ms')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark every UniBuzz route.')
+    parser.add_argument('--database', required=True, help='dataset built by bench.datagen')
+    parser.add_argument('--url', help='benchmark a running server instead of the in-process test client')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per route')
+    parser.add_argument('--warmup', type=int, default=5, help='untimed requests per route')
+    parser.add_argument('--routes', help='only run routes whose name contains this text')
+    parser.add_argument('--subscribers', type=int, default=100,
+                        help=f'streams open during {STREAM_SCENARIO}; 0 skips it')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--in-place', action='store_true',
+                        help='run write routes against --database itself instead of a copy')
+    parser.add_argument('--label', default='', help='free-form note stored with the results')
+    parser.add_argument('--output', help='result file (default: bench/results/<timestamp>-<commit>.json)')
+    args = parser.parse_args(argv)
+
+    database = os.path.abspath(args.database)
+    if not os.path.exists(database):
+        parser.error(f'{database} does not exist; generate it with python -m bench.datagen')
+
+    scratch_dir = None
+    if args.url:
+        transport = HttpTransport(args.url)
+    else:
+        if not args.in_place:
+            scratch_dir, database = copy_database(database)
+        sys.path.insert(0, REPO_DIR)
+        from app import create_app, db
+
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}', 'TESTING': True})
+        with app.app_context():
+            transport = TestClientTransport(app, db)
+
+    count = args.requests + args.warmup
+    sample = sample_dataset(database, count, args.seed)
+    _, first_page, _ = transport.request('GET', '/events?limit=50', None)
+    client_cursor = json.loads(first_page).get('next_cursor') or ''
+    scenarios, created_events, report_jobs = build_scenarios(sample, client_cursor)
+    if args.routes:
+        scenarios = [scenario for scenario in scenarios if args.routes in scenario.name]
+
+    def remember_created(scenario, status, body):
+        if scenario.name == 'POST /events' and status == 201:
+            created_events.put((json.loads(body)['event_id'], None))
+        elif scenario.name == 'POST /reports/jobs' and status in (200, 202):
+            report_jobs['queued'].append(json.loads(body)['job']['id'])
+        elif scenario.name == 'GET /reports/jobs/<id>' and status == 200:
+            job = json.loads(body)['job']
+            if job['status'] == 'done':
+                report_jobs['done'].append(job['id'])
+
+    routes = {}
+    started = time.perf_counter()
+    try:
+        for scenario in scenarios:
+            routes[scenario.name] = run_scenario(transport, scenario, args.requests, args.concurrency,
+                                                 args.warmup, args.seed, remember_created)
+        if args.subscribers > 0 and (not args.routes or args.routes in STREAM_SCENARIO):
+            routes[STREAM_SCENARIO] = run_stream_scenario(transport, sample, args.subscribers, args.requests,
+                                                          args.concurrency, args.seed)
+    finally:
+        if scratch_dir is not None:
+            # Write queued gate scans before the scratch copy goes away
+            transport.request('POST', '/attendance/checkin/flush', None)
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    commit, dirty = git_revision()
+    result = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_commit': commit,
+            'git_dirty': dirty,
+            'label': args.label,
+            'dataset': os.path.basename(args.database),
+            'dataset_rows': {table: len(sample[f'{table}_ids']) for table in ('event', 'student', 'college')},
+            'transport': 'http' if args.url else 'test_client',
+            'url': args.url,
+            'concurrency': args.concurrency,
+            'requests_per_route': args.requests,
+            'stream_subscribers': args.subscribers,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'python': sys.version.split()[0],
+            'sqlite': sqlite3.sqlite_version,
+            'duration_s': round(time.perf_counter() - started, 1),
+        },
+        'routes': routes,
+    }
+
+    print_table(routes)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f'{datetime.now().strftime("%Y%m%d-%H%M%S")}-{commit or "nogit"}{"-dirty" if dirty else ""}.json'
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f'Saved {output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Registration rush against one capped event.
+
+    python -m bench.seatrush --database bench/data/medium.db
+    python -m bench.seatrush --database bench/data/medium.db --registrants 500 --capacity 100 --processes 4
+
+Creates an event with `--capacity` seats on a scratch copy of the dataset,
+then releases `--registrants` students of its college at /register at the
+same moment, one thread per student spread over `--processes` processes.
+Afterwards it cancels `--cancellations` of the confirmed registrations, also
+all at once, and checks the results:
+
+    every seat is taken exactly once: `capacity` 201s, the rest 202 waitlisted
+    the registrations table and the event's rollup both hold `capacity` rows
+    waitlist positions are 1..n with no gaps or repeats, in the order of the
+    waitlist itself
+    each cancellation promotes the head of the waitlist, so the first
+    `cancellations` waiting students end up registered
+
+It prints rush latency percentiles and exits 1 if any check fails.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+from bench.runner import REPO_DIR, copy_database, percentile
+
+
+def pick_college(database, registrants):
+    """A college with at least `registrants` students, and those students' ids"""
+    connection = sqlite3.connect(f'file:{database}?mode=ro', uri=True)
+    try:
+        row = connection.execute(
+            'SELECT college_id FROM students GROUP BY college_id HAVING count(*) >= ? ORDER BY college_id LIMIT 1',
+            (registrants,)
+        ).fetchone()
+        if row is None:
+            raise SystemExit(f'No college in {database} has {registrants} students')
+        student_ids = [student_id for (student_id,) in connection.execute(
+            'SELECT id FROM students WHERE college_id = ? ORDER BY id', row
+        )]
+    finally:
+        connection.close()
+    return row[0], student_ids
+
+
+def worker(config, requests, start_at, results):
+    """Send each (index, method, path, payload) request from its own thread, all released at `start_at`"""
+    sys.path.insert(0, REPO_DIR)
+    from app import create_app
+
+    app = create_app(config)
+    app.test_client().get('/events?limit=1')
+    outcomes = []
+    ready = threading.Barrier(len(requests))
+
+    def send(index, method, path, payload):
+        client = app.test_client()
+        ready.wait()
+        time.sleep(max(0.0, start_at - time.time()))
+        started = time.perf_counter()
+        response = client.open(path, method=method, json=payload)
+        outcomes.append((index, (time.perf_counter() - started, response.status_code, response.get_json())))
+
+    threads = [threading.Thread(target=send, args=request) for request in requests]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(outcomes)
+
+
+def run_wave(context, config, requests, processes):
+    """Run requests concurrently across processes; returns (latency, status, body) per request, in request order"""
+    results = context.Queue()
+    start_at = time.time() + 3.0 + 0.5 * processes
+    indexed = [(index, *request) for index, request in enumerate(requests)]
+    chunks = [indexed[offset::processes] for offset in range(processes)]
+    workers = [context.Process(target=worker, args=(config, chunk, start_at, results)) for chunk in chunks if chunk]
+    for process in workers:
+        process.start()
+    outcomes = dict(outcome for _ in workers for outcome in results.get())
+    for process in workers:
+        process.join()
+    return [outcomes[index] for index in range(len(requests))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rush one capped event with concurrent registrations.')
+    parser.add_argument('--database', required=True, help='dataset built by bench.datagen, or a shard directory')
+    parser.add_argument('--shards-dir', help='per-college shard files that go with --database')
+    parser.add_argument('--registrants', type=int, default=500)
+    parser.add_argument('--capacity', type=int, default=100)
+    parser.add_argument('--cancellations', type=int, default=20)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    database = os.path.abspath(args.database)
+    if not os.path.exists(database):
+        parser.error(f'{database} does not exist; generate it with python -m bench.datagen')
+    if not 0 < args.capacity < args.registrants or args.cancellations > args.capacity:
+        parser.error('need 0 < capacity < registrants and cancellations <= capacity')
+
+    college_id, student_ids = pick_college(database, args.registrants)
+    students = random.Random(args.seed).sample(student_ids, args.registrants)
+    scratch_dir, database = copy_database(database)
+    config = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}', 'SLOW_REQUEST_MS': 60_000}
+    if args.shards_dir:
+        config['SHARDS_DIR'] = os.path.join(scratch_dir, 'shards')
+        shutil.copytree(args.shards_dir, config['SHARDS_DIR'])
+
+    failures = []
+
+    def check(condition, message):
+        if not condition:
+            failures.append(message)
+
+    try:
+        sys.path.insert(0, REPO_DIR)
+        from app import create_app
+        client = create_app(config).test_client()
+        event_id = client.post('/events', json={
+            'college_id': college_id, 'title': 'Seat rush', 'type': 'Workshop', 'date': '2030-01-01',
+            'time': '10:00', 'venue': 'Main hall', 'capacity': args.capacity
+        }).get_json()['event_id']
+
+        # Spawned, not forked, so every worker opens its own connections
+        context = multiprocessing.get_context('spawn')
+        rush = run_wave(context, config, [
+            ('POST', '/register', {'event_id': event_id, 'student_id': student_id}) for student_id in students
+        ], args.processes)
+
+        statuses = Counter(status for _, status, _ in rush)
+        positions = sorted(body['position'] for _, status, body in rush if status == 202)
+        check(statuses == Counter({201: args.capacity, 202: args.registrants - args.capacity}),
+              f'rush statuses {dict(statuses)}')
+        check(positions == list(range(1, args.registrants - args.capacity + 1)), 'waitlist positions have gaps')
+
+        registrations = client.get(f'/registrations/{event_id}').get_json()['total_registrations']
+        rollup = client.get(f'/reports/registrations/{event_id}').get_json()['total_registrations']
+        waitlist = [entry['student_id'] for entry in client.get(f'/waitlist/{event_id}').get_json()['students']]
+        check(registrations == args.capacity, f'{registrations} registrations for {args.capacity} seats')
+        check(rollup == args.capacity, f'rollup counts {rollup} registrations')
+        by_position = {body['position']: student_id for student_id, (_, status, body) in zip(students, rush)
+                       if status == 202}
+        check(waitlist == [by_position[position] for position in sorted(by_position)],
+              'waitlist order differs from the positions handed out')
+
+        # Cancel some confirmed seats at once; the head of the waitlist moves up
+        cancelled = [student_id for student_id, (_, status, _) in zip(students, rush) if status == 201]
+        cancelled = cancelled[:args.cancellations]
+        cancels = run_wave(context, config, [
+            ('DELETE', f'/registrations/{event_id}/{student_id}', None) for student_id in cancelled
+        ], args.processes)
+        promoted = sorted(student_id for _, _, body in cancels for student_id in body.get('promoted_student_ids', []))
+        check(all(status == 200 for _, status, _ in cancels), 'a cancellation failed')
+        check(promoted == sorted(waitlist[:args.cancellations]), 'promotions skipped the head of the waitlist')
+        registrations = client.get(f'/registrations/{event_id}').get_json()['total_registrations']
+        rollup = client.get(f'/reports/registrations/{event_id}').get_json()['total_registrations']
+        remaining = client.get(f'/waitlist/{event_id}').get_json()['total_waitlisted']
+        check(registrations == rollup == args.capacity, f'{registrations} registrations after cancellations')
+        check(remaining == len(waitlist) - args.cancellations, f'{remaining} students still waiting')
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    layout = 'sharded' if args.shards_dir else 'single file'
+    print(f'{layout}: {args.registrants} registrants for {args.capacity} seats from {args.processes} processes')
+    for name, outcomes in (('rush', rush), ('cancellations', cancels)):
+        latencies = sorted(latency for latency, _, _ in outcomes)
+        print(f'{name:<14} {len(outcomes):>4} requests, latency ms  '
+              f'p50 {percentile(latencies, 0.50) * 1000:.1f}  p95 {percentile(latencies, 0.95) * 1000:.1f}  '
+              f'p99 {percentile(latencies, 0.99) * 1000:.1f}  max {latencies[-1] * 1000:.1f}')
+    print(f'statuses: {dict(sorted(statuses.items()))}; {len(promoted)} promoted from the waitlist')
+    for failure in failures:
+        print(f'FAILED: {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
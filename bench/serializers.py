@@ -0,0 +1,270 @@
+"""Micro-benchmark of the read-path row serializers.
+
+    python -m bench.serializers --database bench/data/medium.db
+
+Times query plus row-to-dict serialization (no JSON encoding) for the list
+and report routes four ways:
+
+    orm         ORM entities, serialize_datetime and json.loads per row (the original handlers)
+    core        Core column selects with typed date/time columns and a hand-written loop
+    pyiso       the prebuilt statements and row mapping, with dates as typed columns
+                converted by .isoformat() in Python
+    projection  the prebuilt statements in app.py: ISO text from SQL (iso_text), cached resources, row mapping
+
+A fifth run fetches the same rows through the bare DB-API cursor. That is
+the floor every variant pays in SQLite; the table reports the CPU microseconds
+per row each variant spends above it, and the speed-up of `projection`.
+`pyiso` against `projection` is what iso_text saves over parsing each stored
+date into a date object and formatting it back.
+"""
+import argparse
+import json
+import os
+import sys
+import time as timer
+from datetime import date, datetime, time
+
+
+def serialize_datetime(obj):
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def build_cases(app_module, event_id):
+    """name -> {variant: callable returning the list of dicts}"""
+    a = app_module
+    db, read_execute = a.db, a.read_execute
+    Event, College, Student, Registration, Feedback, EventStats = (
+        a.Event, a.College, a.Student, a.Registration, a.Feedback, a.EventStats
+    )
+
+    def events_orm():
+        rows = db.session.execute(
+            db.select(Event, College.name).join(College, Event.college_id == College.id)
+            .where(Event.status == 'Completed').order_by(Event.date, Event.time, Event.id).limit(500)
+        ).all()
+        return [{
+            'id': event.id, 'title': event.title, 'description': event.description, 'type': event.type,
+            'date': serialize_datetime(event.date), 'time': serialize_datetime(event.time), 'venue': event.venue,
+            'status': event.status, 'capacity': event.capacity,
+            'resources': json.loads(event.resources) if event.resources else {},
+            'college_name': college_name
+        } for event, college_name in rows]
+
+    def raw(statement):
+        sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+        return lambda: db.session.connection().connection.driver_connection.execute(sql).fetchall()
+
+    fields = list(a.EVENT_LIST_FIELDS)
+    events_statement = (
+        db.select(*(a.EVENT_LIST_FIELDS[field].label(field) for field in fields))
+        .join(College, Event.college_id == College.id)
+        .where(Event.status == 'Completed').order_by(Event.date, Event.time, Event.id).limit(500)
+    )
+
+    def events_core():
+        rows = read_execute(events_statement).all()
+        events_list = []
+        for row in rows:
+            event_data = {}
+            for field in fields:
+                value = getattr(row, field)
+                if field in ('date', 'time'):
+                    value = serialize_datetime(value)
+                elif field == 'resources':
+                    value = json.loads(value) if value else {}
+                event_data[field] = value
+            events_list.append(event_data)
+        return events_list
+
+    events_pyiso_map = a.row_mapper(fields, {'date': isoformat, 'time': isoformat, 'resources': a.parse_resources})
+
+    def events_pyiso():
+        return [events_pyiso_map(row) for row in a.read_rows(events_statement)]
+
+    def events_projection():
+        query, to_dict = a.event_list_query(tuple(a.EVENT_LIST_FIELDS), ('status',))
+        return [to_dict(row) for row in a.read_rows(query, {'status': 'Completed', 'limit': 500})]
+
+    def registrations_orm():
+        rows = db.session.query(Registration, Student).join(Student).filter(Registration.event_id == event_id).all()
+        return [{
+            'student_id': student.id, 'name': student.name, 'srn': student.srn, 'email': student.email,
+            'registered_at': serialize_datetime(registration.registered_at)
+        } for registration, student in rows]
+
+    registrations_statement = (
+        db.select(Student.id.label('student_id'), Student.name, Student.srn, Student.email, Registration.registered_at)
+        .join(Student, Registration.student_id == Student.id).where(Registration.event_id == event_id)
+    )
+
+    def registrations_core():
+        rows = read_execute(registrations_statement).all()
+        students_list = []
+        for student_id, name, srn, email, registered_at in rows:
+            students_list.append({
+                'student_id': student_id, 'name': name, 'srn': srn, 'email': email,
+                'registered_at': serialize_datetime(registered_at)
+            })
+        return students_list
+
+    def participation_pyiso(model, columns):
+        """The statement of app.participation_list with the timestamp as a typed column, and its row mapping"""
+        statement = db.union_all(*(
+            db.select(*columns(table)).select_from(table).join(Student, table.student_id == Student.id)
+            .where(table.event_id == event_id)
+            for table in (model, a.ARCHIVE_MODELS[model])
+        ))
+        keys = [column.key for column in statement.selected_columns]
+        to_dict = a.row_mapper(keys, {keys[-1]: isoformat})
+        return lambda: [to_dict(row) for row in a.read_rows(statement)]
+
+    registrations_pyiso = participation_pyiso(Registration, lambda table: (
+        Student.id.label('student_id'), Student.name, Student.srn, Student.email, table.registered_at
+    ))
+
+    def registrations_projection():
+        rows = a.read_rows(a.REGISTRATION_LIST_QUERY, {'event_id': event_id})
+        return [a.REGISTRATION_LIST.to_dict(row) for row in rows]
+
+    def feedback_orm():
+        rows = db.session.query(Feedback, Student).join(Student).filter(Feedback.event_id == event_id).all()
+        return [{
+            'student_name': student.name, 'rating': feedback.rating, 'comment': feedback.comment,
+            'created_at': serialize_datetime(feedback.created_at)
+        } for feedback, student in rows]
+
+    feedback_statement = (
+        db.select(Student.name.label('student_name'), Feedback.rating, Feedback.comment, Feedback.created_at)
+        .join(Student, Feedback.student_id == Student.id).where(Feedback.event_id == event_id)
+    )
+
+    def feedback_core():
+        rows = read_execute(feedback_statement).all()
+        return [{
+            'student_name': student_name, 'rating': rating, 'comment': comment,
+            'created_at': serialize_datetime(created_at)
+        } for student_name, rating, comment, created_at in rows]
+
+    feedback_pyiso = participation_pyiso(Feedback, lambda table: (
+        Student.name.label('student_name'), table.rating, table.comment, table.created_at
+    ))
+
+    def feedback_projection():
+        rows = a.read_rows(a.FEEDBACK_LIST_QUERY, {'event_id': event_id})
+        return [a.FEEDBACK_LIST.to_dict(row) for row in rows]
+
+    def popularity_orm():
+        rows = db.session.execute(
+            db.select(Event, College.name, EventStats.registrations_count).select_from(EventStats)
+            .join(Event, EventStats.event_id == Event.id).join(College, Event.college_id == College.id)
+            .order_by(EventStats.registrations_count.desc())
+        ).all()
+        return [{
+            'event_id': event.id, 'title': event.title, 'type': event.type, 'date': serialize_datetime(event.date),
+            'registration_count': count, 'college_name': college_name
+        } for event, college_name, count in rows]
+
+    popularity_statement = (
+        db.select(Event.id, Event.title, Event.type, Event.date, College.name.label('college_name'),
+                  EventStats.registrations_count.label('registration_count'))
+        .select_from(EventStats).join(Event, EventStats.event_id == Event.id)
+        .join(College, Event.college_id == College.id).order_by(EventStats.registrations_count.desc())
+    )
+
+    def popularity_core():
+        rows = read_execute(popularity_statement).all()
+        return [{
+            'event_id': row.id, 'title': row.title, 'type': row.type, 'date': serialize_datetime(row.date),
+            'registration_count': row.registration_count, 'college_name': row.college_name
+        } for row in rows]
+
+    popularity_pyiso_statement = (
+        db.select(Event.id.label('event_id'), Event.title, Event.type, Event.date, College.name.label('college_name'),
+                  EventStats.registrations_count.label('registration_count'))
+        .select_from(EventStats).join(Event, EventStats.event_id == Event.id)
+        .join(College, Event.college_id == College.id).order_by(EventStats.registrations_count.desc())
+    )
+    popularity_pyiso_map = a.row_mapper(
+        [column.key for column in popularity_pyiso_statement.selected_columns], {'date': isoformat}
+    )
+
+    def popularity_pyiso():
+        return [popularity_pyiso_map(row) for row in a.read_rows(popularity_pyiso_statement)]
+
+    def popularity_projection():
+        rows = a.read_rows(a.POPULARITY_LIST_QUERY, {'limit': -1})
+        return [a.POPULARITY_LIST.to_dict(row) for row in rows]
+
+    return {
+        'events': {'raw': raw(events_statement), 'orm': events_orm, 'core': events_core,
+                   'pyiso': events_pyiso, 'projection': events_projection},
+        'registrations': {'raw': raw(registrations_statement), 'orm': registrations_orm,
+                          'core': registrations_core, 'pyiso': registrations_pyiso,
+                          'projection': registrations_projection},
+        'feedback': {'raw': raw(feedback_statement), 'orm': feedback_orm, 'core': feedback_core,
+                     'pyiso': feedback_pyiso, 'projection': feedback_projection},
+        'popularity': {'raw': raw(popularity_statement), 'orm': popularity_orm, 'core': popularity_core,
+                       'pyiso': popularity_pyiso, 'projection': popularity_projection},
+    }
+
+
+def measure(db, function, repeat):
+    """Best CPU time of `repeat` runs, each with a fresh session so the ORM identity map starts empty"""
+    best, rows = None, None
+    for _ in range(repeat):
+        db.session.remove()
+        started = timer.process_time()
+        rows = function()
+        elapsed = timer.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the read-path row serializers.')
+    parser.add_argument('--database', required=True, help='dataset built by bench.datagen')
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    database = os.path.abspath(args.database)
+    if not os.path.exists(database):
+        parser.error(f'{database} does not exist; generate it with python -m bench.datagen')
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as app_module
+
+    with app_module.create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}'}).app_context():
+        db = app_module.db
+        # The event with the most feedback has about the most registrations as well
+        event_id = db.session.scalar(
+            db.select(app_module.EventStats.event_id).order_by(app_module.EventStats.feedback_count.desc()).limit(1)
+        )
+
+        print(f'{"case":<15}{"rows":>7}{"floor":>9}{"orm":>9}{"core":>9}{"pyiso":>9}{"proj":>9}'
+              f'{"vs orm":>9}{"vs core":>9}{"vs pyiso":>9}')
+        for name, variants in build_cases(app_module, event_id).items():
+            timings = {}
+            results = {}
+            for variant, function in variants.items():
+                timings[variant], results[variant] = measure(db, function, args.repeat)
+            if not results['orm'] == results['core'] == results['pyiso'] == results['projection']:
+                raise SystemExit(f'{name}: the serializers disagree')
+            rows = len(results['projection']) or 1
+            above_floor = {variant: max(timings[variant] - timings['raw'], 1e-9) for variant in timings}
+            per_row = {variant: seconds / rows * 1e6 for variant, seconds in above_floor.items()}
+            print(f'{name:<15}{rows:>7}{timings["raw"] / rows * 1e6:>9.2f}{per_row["orm"]:>9.2f}'
+                  f'{per_row["core"]:>9.2f}{per_row["pyiso"]:>9.2f}{per_row["projection"]:>9.2f}'
+                  f'{above_floor["orm"] / above_floor["projection"]:>8.1f}x'
+                  f'{above_floor["core"] / above_floor["projection"]:>8.1f}x'
+                  f'{above_floor["pyiso"] / above_floor["projection"]:>8.1f}x')
+        print('CPU microseconds per row; floor is the bare DB-API fetch, the others are measured above it')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
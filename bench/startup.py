@@ -0,0 +1,80 @@
+"""Worker startup benchmark.
+
+    python -m bench.startup --database bench/data/medium.db
+    python -m bench.startup --database bench/data/medium.db --runs 20 --path /reports/popularity
+
+Each run starts a fresh interpreter, as a newly forked or spawned worker
+would, and times three phases: importing app.py, create_app(), and the first
+request through the test client. It also counts the SQLite connections opened
+before that first request, which should be zero: a worker that has not served
+anything yet has no reason to touch the database.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; argv is the database file and the request path
+WORKER = '''
+import json, sys, time
+connections = []
+sys.addaudithook(lambda event, args: connections.append(args) if event == 'sqlite3.connect' else None)
+started = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+app = app_module.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + sys.argv[1]})
+created = time.perf_counter()
+connections_before_request = len(connections)
+status = app.test_client().get(sys.argv[2]).status_code
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (served - created) * 1000,
+    'total_ms': (served - started) * 1000,
+    'connections_before_request': connections_before_request,
+    'status': status,
+}))
+'''
+
+PHASES = ('import_ms', 'create_app_ms', 'first_request_ms', 'total_ms')
+
+
+def run_worker(database, path):
+    output = subprocess.run(
+        [sys.executable, '-c', WORKER, database, path],
+        cwd=REPO_DIR, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time worker import, app creation and first request.')
+    parser.add_argument('--database', required=True, help='an initialized database, e.g. from bench.datagen')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--path', default='/events?limit=20', help='route of the first request')
+    args = parser.parse_args(argv)
+
+    database = os.path.abspath(args.database)
+    if not os.path.exists(database):
+        parser.error(f'{database} does not exist; generate it with python -m bench.datagen')
+
+    runs = [run_worker(database, args.path) for _ in range(args.runs)]
+    statuses = sorted({run['status'] for run in runs})
+    connections = max(run['connections_before_request'] for run in runs)
+
+    print(f'{"phase":<20}{"median":>10}{"min":>10}{"max":>10}')
+    for phase in PHASES:
+        values = [run[phase] for run in runs]
+        print(f'{phase:<20}{statistics.median(values):>10.1f}{min(values):>10.1f}{max(values):>10.1f}')
+    print(f'{args.runs} runs, first request GET {args.path} -> {statuses}; '
+          f'SQLite connections before the first request: {connections}')
+    return 1 if connections else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Micro-benchmark of request authentication.
+
+    python -m bench.tokens
+    python -m bench.tokens --budget-us 5
+
+Times, per call, the pieces AUTH_REQUIRED adds to every request:
+
+    issue             signing a token at login
+    verify cold       HMAC check and claims decoding of a token not seen before
+    verify cached     a token already in the verified-token LRU: a lookup and an expiry check
+    guard GET         the before-request hook on a GET, with the token's verification cached
+    guard student     the hook on a student's POST /register, which also reads the body's student_id
+
+No database is involved: the hook never queries one. Exits 1 when `guard
+student` takes longer than `--budget-us` microseconds.
+"""
+import argparse
+import functools
+import sys
+import timeit
+
+from bench.runner import REPO_DIR
+
+
+def per_call(function, number, repeat):
+    """Best of `repeat` runs of `number` calls, in microseconds per call"""
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time token verification and the request auth guard.')
+    parser.add_argument('--number', type=int, default=100_000, help='calls per timing run')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-us', type=float, default=10.0, help='allowed cost of the guard per request')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_DIR)
+    import app as app_module
+    from auth import TokenSigner
+
+    app = app_module.create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'AUTH_REQUIRED': True, 'SECRET_KEY': 'bench-tokens-secret'
+    })
+    signer = app.extensions['unibuzz'].token_signer
+    claims = {'student_id': 42, 'college_id': 3, 'role': 'student'}
+    token = signer.issue(claims)
+    cold_tokens = iter([signer.issue({**claims, 'student_id': number}) for number in range(args.number * args.repeat)])
+    uncached = TokenSigner(app.config['SECRET_KEY'], cache_size=0)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    results = {
+        'issue': per_call(lambda: signer.issue(claims), args.number, args.repeat),
+        'verify cold': per_call(lambda: uncached.verify(next(cold_tokens)), args.number, args.repeat),
+        'verify cached': per_call(lambda: signer.verify(token), args.number, args.repeat),
+    }
+    guard = functools.partial(app_module.authenticate_request, signer)
+    with app.test_request_context('/events/1', headers=headers):
+        app.preprocess_request()
+        results['guard GET'] = per_call(guard, args.number, args.repeat)
+    with app.test_request_context('/register', method='POST', headers=headers, json={'event_id': 1, 'student_id': 42}):
+        app.preprocess_request()
+        results['guard student'] = per_call(guard, args.number, args.repeat)
+        assert guard() is None, 'the guard rejected a valid token'
+
+    for name, microseconds in results.items():
+        print(f'{name:<15} {microseconds:8.2f} us')
+    if results['guard student'] > args.budget_us:
+        print(f'FAILED: the guard takes {results["guard student"]:.2f} us, over the {args.budget_us:g} us budget')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Concurrent registration load test.
+
+    python -m bench.writeload --database bench/data/medium.db --processes 8
+    python -m bench.writeload --database shards/directory.db --shards-dir shards/colleges --processes 8
+
+Each process builds its own app on a scratch copy of the data and posts
+/register for `--duration` seconds, the way separate server workers share one
+set of database files. A registration pairs a random event with a random
+student of the event's college. Pointing `--database` at the directory and
+`--shards-dir` at the shards of the same dataset (from `flask --app app
+split-shards`) measures the sharded layout against the single file.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import time
+from collections import Counter, defaultdict
+
+from bench.runner import REPO_DIR, copy_database, percentile
+
+
+def sample_pairs(database, sharded):
+    """(event ids by college, student ids by college) for colleges that have both"""
+    events_query = ('SELECT event_id, college_id FROM event_directory' if sharded
+                    else 'SELECT id, college_id FROM events')
+    connection = sqlite3.connect(f'file:{database}?mode=ro', uri=True)
+    try:
+        events = defaultdict(list)
+        for event_id, college_id in connection.execute(events_query):
+            events[college_id].append(event_id)
+        students = defaultdict(list)
+        for student_id, college_id in connection.execute('SELECT id, college_id FROM students'):
+            students[college_id].append(student_id)
+    finally:
+        connection.close()
+    colleges = sorted(set(events) & set(students))
+    return {college: events[college] for college in colleges}, {college: students[college] for college in colleges}
+
+
+def worker(config, events, students, seed, start_at, stop_at, results):
+    sys.path.insert(0, REPO_DIR)
+    from app import create_app
+
+    client = create_app(config).test_client()
+    rng = random.Random(seed)
+    colleges = sorted(events)
+    client.get('/events?limit=1')
+    time.sleep(max(0.0, start_at - time.time()))
+
+    latencies = []
+    statuses = Counter()
+    while time.time() < stop_at:
+        college = rng.choice(colleges)
+        payload = {'event_id': rng.choice(events[college]), 'student_id': rng.choice(students[college])}
+        started = time.perf_counter()
+        response = client.post('/register', json=payload)
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] += 1
+    results.put((latencies, dict(statuses)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure registration throughput from several processes.')
+    parser.add_argument('--database', required=True, help='dataset built by bench.datagen, or a shard directory')
+    parser.add_argument('--shards-dir', help='per-college shard files that go with --database')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of load')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    database = os.path.abspath(args.database)
+    if not os.path.exists(database):
+        parser.error(f'{database} does not exist; generate it with python -m bench.datagen')
+    if args.shards_dir and not os.path.isdir(args.shards_dir):
+        parser.error(f'{args.shards_dir} is not a directory')
+
+    events, students = sample_pairs(database, bool(args.shards_dir))
+    scratch_dir, database = copy_database(database)
+    config = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}'}
+    if args.shards_dir:
+        config['SHARDS_DIR'] = os.path.join(scratch_dir, 'shards')
+        shutil.copytree(args.shards_dir, config['SHARDS_DIR'])
+
+    try:
+        # Spawned, not forked, so every worker opens its own connections
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        start_at = time.time() + 2.0 + 0.5 * args.processes
+        stop_at = start_at + args.duration
+        processes = [
+            context.Process(target=worker, args=(config, events, students, args.seed + index, start_at, stop_at,
+                                                 results))
+            for index in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    latencies = sorted(latency for process_latencies, _ in outcomes for latency in process_latencies)
+    statuses = Counter()
+    for _, process_statuses in outcomes:
+        statuses.update(process_statuses)
+    layout = 'single file'
+    if args.shards_dir:
+        layout = f'{sum(name.endswith(".db") for name in os.listdir(args.shards_dir))} shards'
+    print(f'{layout}, {args.processes} processes, {args.duration:.0f} s')
+    print(f'{len(latencies) / args.duration:.1f} registrations/s; latency ms '
+          f'p50 {percentile(latencies, 0.50) * 1000:.2f}  p95 {percentile(latencies, 0.95) * 1000:.2f}  '
+          f'p99 {percentile(latencies, 0.99) * 1000:.2f}')
+    print('statuses: ' + ', '.join(f'{status}: {count}' for status, count in sorted(statuses.items())))
+    return 0 if set(statuses) <= {201, 409} else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
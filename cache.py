@@ -0,0 +1,210 @@
+"""Response cache: rendered responses in an in-process LRU, validated against per-tag data versions"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+logger = logging.getLogger(__name__)
+
+CachedResponse = namedtuple('CachedResponse', ['body', 'content_type', 'etag', 'versions', 'stored_at'])
+
+
+def make_etag(body):
+    """Strong validator for a response body"""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """Rendered responses by request key, each valid while the data it was built from is unchanged.
+
+    An entry depends on a tuple of tags naming the data it reads, and keeps
+    the tags' versions from before it was computed; `invalidate(tags)` bumps
+    them, so every entry built before the write stops matching. A write that
+    commits while a response is being computed therefore invalidates it too.
+    The LRU holds at most `max_entries` responses and `max_bytes` of bodies,
+    and entries older than `ttl` seconds (0 for no limit) are recomputed.
+
+    Without a `store` the versions live in this process and only its own
+    writes invalidate entries. With one, versions and entries are shared by
+    every process using the store, and the LRU saves reading bodies back.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=300.0, store=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.store = store
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def versions(self, tags):
+        """Current versions of `tags`, or None when the shared store cannot be read"""
+        if self.store is not None:
+            try:
+                return self.store.versions(tags)
+            except sqlite3.Error:
+                logger.exception('Reading cache tag versions failed')
+                return None
+        with self._lock:
+            return tuple(self._versions.get(tag, 0) for tag in tags)
+
+    def get(self, key, versions):
+        """The entry stored under `key` if it was built at `versions` and has not expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_fresh(entry, versions, now):
+                    self._entries.move_to_end(key)
+                    return entry
+                self._discard(key)
+        if self.store is None:
+            return None
+
+        try:
+            entry = self.store.get(key)
+        except sqlite3.Error:
+            logger.exception('Reading a cached response failed')
+            return None
+        if entry is None or not self._is_fresh(entry, versions, now):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def set(self, key, body, content_type, versions):
+        """Store a response body built at `versions` and return its entry"""
+        entry = CachedResponse(body, content_type, make_etag(body), tuple(versions), time.time())
+        self._remember(key, entry)
+        if self.store is not None:
+            try:
+                self.store.set(key, entry)
+            except sqlite3.Error:
+                logger.exception('Storing a cached response failed')
+        return entry
+
+    def invalidate(self, tags):
+        """Bump the versions of `tags`, retiring every entry that depends on one of them"""
+        if not tags:
+            return
+        if self.store is not None:
+            try:
+                self.store.bump(tags)
+            except sqlite3.Error:
+                # Other processes keep their entries until the TTL runs out
+                logger.exception('Invalidating cached responses failed')
+                with self._lock:
+                    self._entries.clear()
+                    self._bytes = 0
+            return
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def _is_fresh(self, entry, versions, now):
+        return entry.versions == versions and (not self.ttl or now - entry.stored_at < self.ttl)
+
+    def _remember(self, key, entry):
+        if len(entry.body) > self.max_bytes or not self.max_entries:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry.body)
+
+
+class SQLiteCacheStore:
+    """Tag versions and cached responses in a SQLite file shared by the processes of a deployment.
+
+    Each thread uses its own connection. The file holds at most `max_entries`
+    responses; the oldest are pruned every `PRUNE_EVERY` writes.
+    """
+
+    PRUNE_EVERY = 100
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS cache_tags (tag TEXT PRIMARY KEY, version INTEGER NOT NULL) WITHOUT ROWID',
+        'CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, body BLOB NOT NULL, '
+        'content_type TEXT NOT NULL, etag TEXT NOT NULL, versions TEXT NOT NULL, stored_at REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS ix_cache_entries_stored_at ON cache_entries (stored_at)'
+    )
+
+    def __init__(self, path, max_entries=10_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._writes = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with self._lock:
+                if not self._schema_ready:
+                    for statement in self.SCHEMA:
+                        connection.execute(statement)
+                    self._schema_ready = True
+            self._local.connection = connection
+        return connection
+
+    def versions(self, tags):
+        placeholders = ', '.join('?' * len(tags))
+        found = dict(self._connection().execute(
+            f'SELECT tag, version FROM cache_tags WHERE tag IN ({placeholders})', tuple(tags)
+        ).fetchall())
+        return tuple(found.get(tag, 0) for tag in tags)
+
+    def bump(self, tags):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT INTO cache_tags (tag, version) VALUES (?, 1) '
+                'ON CONFLICT (tag) DO UPDATE SET version = version + 1',
+                [(tag,) for tag in tags]
+            )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT body, content_type, etag, versions, stored_at FROM cache_entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        body, content_type, etag, versions, stored_at = row
+        return CachedResponse(body, content_type, etag, tuple(json.loads(versions)), stored_at)
+
+    def set(self, key, entry):
+        connection = self._connection()
+        connection.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, body, content_type, etag, versions, stored_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (key, entry.body, entry.content_type, entry.etag, json.dumps(entry.versions), entry.stored_at)
+        )
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            connection.execute(
+                'DELETE FROM cache_entries WHERE stored_at < '
+                '(SELECT stored_at FROM cache_entries ORDER BY stored_at DESC LIMIT 1 OFFSET ?)',
+                (self.max_entries - 1,)
+            )
@@ -0,0 +1,269 @@
+"""Gate check-in support: in-memory admission sets and a group-commit write-behind queue"""
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CheckinGate:
+    """Per-event sets of registered, checked-in and pending student ids.
+
+    `loader(event_id)` returns the (registered_ids, checked_in_ids) pair for an
+    event; it is called once per event, on preload or on the first scan. An
+    accepted scan stays pending until its attendance row is written
+    (`confirm_scans`); a scan that could not be written is forgotten
+    (`drop_scans`), so the student can scan again.
+
+    Entries do not outlive the gate: `forget(event_id)` drops a finished
+    event's sets, and sets unused for `idle_timeout` seconds are dropped
+    whenever another event loads or a flush reports back. Either waits until
+    the event's pending scans are written or dropped. A dropped event loads
+    again on its next scan.
+    """
+
+    ACCEPTED = 'accepted'
+    NOT_REGISTERED = 'not_registered'
+    ALREADY_CHECKED_IN = 'already_checked_in'
+
+    def __init__(self, loader, idle_timeout=3600, clock=time.monotonic):
+        self._loader = loader
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self._events = {}
+        self._last_used = {}
+        self._finished = set()
+        self._lock = threading.Lock()
+
+    def preload(self, event_id):
+        """Load (or reload) an event's sets and return their sizes"""
+        registered, checked_in = self._loader(event_id)
+        with self._lock:
+            # Pending scans are not in the table yet, so a reload keeps them
+            pending = self._events[event_id][2] if event_id in self._events else set()
+            self._events[event_id] = (set(registered), set(checked_in), pending)
+            self._last_used[event_id] = self._clock()
+            self._finished.discard(event_id)
+            self._evict_idle()
+            return len(registered), len(checked_in)
+
+    def is_loaded(self, event_id):
+        with self._lock:
+            return event_id in self._events
+
+    def admit(self, event_id, student_id):
+        """Check a scan against the sets and mark the student's check-in as pending"""
+        while True:
+            if not self.is_loaded(event_id):
+                self.preload(event_id)
+
+            with self._lock:
+                if event_id not in self._events:
+                    # Forgotten between the load and this scan
+                    continue
+                registered, checked_in, pending = self._events[event_id]
+                self._last_used[event_id] = self._clock()
+                if student_id in checked_in or student_id in pending:
+                    return self.ALREADY_CHECKED_IN
+                if student_id not in registered:
+                    return self.NOT_REGISTERED
+                pending.add(student_id)
+                return self.ACCEPTED
+
+    def add_registrations(self, pairs):
+        """Record (event_id, student_id) registrations for loaded events"""
+        with self._lock:
+            for event_id, student_id in pairs:
+                if event_id in self._events:
+                    self._events[event_id][0].add(student_id)
+
+    def remove_registrations(self, pairs):
+        """Forget cancelled (event_id, student_id) registrations of loaded events"""
+        with self._lock:
+            for event_id, student_id in pairs:
+                if event_id in self._events:
+                    self._events[event_id][0].discard(student_id)
+
+    def add_checkins(self, pairs):
+        """Record (event_id, student_id) check-ins made outside the gate"""
+        with self._lock:
+            for event_id, student_id in pairs:
+                if event_id in self._events:
+                    self._events[event_id][1].add(student_id)
+
+    def confirm_scans(self, scans):
+        """Mark written (event_id, student_id, ...) scans as checked in"""
+        with self._lock:
+            for event_id, student_id, *_ in scans:
+                if event_id in self._events:
+                    _, checked_in, pending = self._events[event_id]
+                    pending.discard(student_id)
+                    checked_in.add(student_id)
+            self._evict_idle()
+
+    def drop_scans(self, scans):
+        """Forget pending (event_id, student_id, ...) scans that were not written"""
+        with self._lock:
+            for event_id, student_id, *_ in scans:
+                if event_id in self._events:
+                    self._events[event_id][2].discard(student_id)
+            self._evict_idle()
+
+    def forget(self, event_id):
+        """Drop the sets of an event whose gate has closed, once its pending scans are written or dropped"""
+        with self._lock:
+            if event_id in self._events:
+                self._finished.add(event_id)
+                self._evict_idle()
+
+    def is_checked_in(self, event_id, student_id):
+        """Whether the student is checked in or has a scan waiting to be written"""
+        with self._lock:
+            sets = self._events.get(event_id)
+            return sets is not None and (student_id in sets[1] or student_id in sets[2])
+
+    def _evict_idle(self):
+        """Drop finished and idle events without pending scans; the caller holds the lock"""
+        cutoff = self._clock() - self.idle_timeout
+        evicted = [
+            event_id for event_id, (_, _, pending) in self._events.items()
+            if not pending and (event_id in self._finished or self._last_used[event_id] <= cutoff)
+        ]
+        for event_id in evicted:
+            del self._events[event_id]
+            del self._last_used[event_id]
+            self._finished.discard(event_id)
+
+
+class WriteBehindQueue:
+    """Collects accepted scans and hands them to `flush(batch)` in groups.
+
+    A background thread flushes whenever `batch_size` items are waiting or
+    `interval` seconds have passed. A failed batch is retried ahead of newer
+    items, up to `max_attempts` times; after that its items are written one
+    at a time and those that still fail are logged and dropped, so one bad
+    scan cannot stall the queue. `on_written(items)` and `on_dropped(items)`
+    are told the outcome. `close()` (registered with atexit) drains
+    everything that is still queued before the process exits.
+    """
+
+    def __init__(self, flush, interval=0.5, batch_size=200, max_attempts=5, on_written=None, on_dropped=None):
+        self._flush = flush
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._on_written = on_written
+        self._on_dropped = on_dropped
+        self._items = []
+        self._failed = []
+        self._attempts = 0
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def put(self, item):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('Check-in queue is closed')
+            self._items.append(item)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='checkin-writer', daemon=True)
+                self._thread.start()
+            if len(self._items) >= self.batch_size:
+                self._condition.notify()
+
+    def pending(self):
+        with self._condition:
+            return len(self._failed) + len(self._items)
+
+    def flush(self):
+        """Synchronously write everything queued so far; returns the item count written.
+
+        A batch that fails is kept for another attempt and the error is raised.
+        """
+        flushed = 0
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return flushed
+            flushed += self._write(batch, retry=False)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+        while True:
+            try:
+                self.flush()
+                return
+            except Exception:
+                # Already logged; the batch is retried until it is written or dropped
+                continue
+
+    def _take_batch(self):
+        with self._condition:
+            if self._failed:
+                batch, self._failed = self._failed, []
+                return batch
+            batch = self._items[:self.batch_size]
+            del self._items[:self.batch_size]
+            return batch
+
+    def _write(self, batch, retry=True):
+        """Flush a batch; returns the items written, or None when the batch is kept for another attempt"""
+        with self._flush_lock:
+            try:
+                self._flush(batch)
+            except Exception:
+                self._attempts += 1
+                if self._attempts < self.max_attempts:
+                    logger.exception('Check-in flush of %d scans failed (attempt %d of %d); retrying',
+                                     len(batch), self._attempts, self.max_attempts)
+                    with self._condition:
+                        self._failed = batch
+                    if not retry:
+                        raise
+                    return None
+                logger.exception('Check-in flush of %d scans failed %d times; writing them one at a time',
+                                 len(batch), self._attempts)
+                self._attempts = 0
+                written = self._write_each(batch)
+            else:
+                self._attempts = 0
+                written = batch
+        if written and self._on_written is not None:
+            self._on_written(written)
+        return len(written)
+
+    def _write_each(self, batch):
+        """Flush items singly, so the ones that can be written are; the rest are dropped"""
+        written, dropped = [], []
+        for item in batch:
+            try:
+                self._flush([item])
+            except Exception:
+                logger.exception('Dropping check-in %r: it could not be written', item)
+                dropped.append(item)
+            else:
+                written.append(item)
+        if dropped and self._on_dropped is not None:
+            self._on_dropped(dropped)
+        return written
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if len(self._items) < self.batch_size and not self._failed and not self._closed:
+                    self._condition.wait(self.interval)
+                if self._closed:
+                    return
+            batch = self._take_batch()
+            if batch and self._write(batch) is None:
+                # Back off before retrying a failed batch
+                with self._condition:
+                    self._condition.wait(self.interval)
@@ -0,0 +1,72 @@
+"""Background jobs: a small thread pool that runs jobs claimed from a shared table"""
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class JobRunner:
+    """Worker threads that take jobs from a queue kept outside the process.
+
+    `claim()` atomically marks the next runnable job as running and returns it,
+    or None when there is nothing to do; `run(job)` computes it and stores the
+    outcome. Because the queue lives in the database, any process can run a
+    job another process enqueued. Workers start on the first `notify()`, wake
+    up whenever a job is enqueued here and otherwise look for work every
+    `poll_interval` seconds.
+    """
+
+    def __init__(self, claim, run, workers=2, poll_interval=2.0):
+        self._claim = claim
+        self._run_job = run
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._condition = threading.Condition()
+        self._wakeups = 0
+        self._threads = []
+        self._closed = False
+        atexit.register(self.close)
+
+    def notify(self):
+        """Tell the workers a job is waiting, starting them if needed"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('Job runner is closed')
+            if not self._threads:
+                for number in range(self.workers):
+                    thread = threading.Thread(target=self._work, name=f'report-job-{number}', daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+            self._wakeups += 1
+            self._condition.notify()
+
+    def close(self):
+        """Stop taking jobs. A job that is still running is abandoned and claimed again once it goes stale."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _next_job(self):
+        try:
+            return self._claim()
+        except Exception:
+            logger.exception('Claiming a background job failed')
+            return None
+
+    def _work(self):
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                self._wakeups = max(0, self._wakeups - 1)
+            job = self._next_job()
+            if job is not None:
+                try:
+                    self._run_job(job)
+                except Exception:
+                    logger.exception('Background job %r failed', job)
+                continue
+            with self._condition:
+                if not self._wakeups and not self._closed:
+                    self._condition.wait(self.poll_interval)
@@ -0,0 +1,154 @@
+"""Live activity feed: an in-process bus that fans committed changes out to Server-Sent Events streams"""
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+Message = namedtuple('Message', ['id', 'kind', 'data', 'frame'])
+
+
+class TooManySubscribers(Exception):
+    """The bus already has its maximum number of open subscriptions"""
+
+
+def sse_frame(kind, data, message_id=None):
+    """One Server-Sent Events message carrying `data` as JSON"""
+    lines = [f'id: {message_id}'] if message_id is not None else []
+    lines += [f'event: {kind}', f'data: {json.dumps(data, separators=(",", ":"))}']
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+class _Topic:
+    def __init__(self, key, history, lock):
+        self.key = key
+        self.sequence = 0
+        self.messages = deque(maxlen=history)
+        self.condition = threading.Condition(lock)
+        self.subscribers = 0
+        self.idle_since = time.monotonic()
+
+    def message_id(self, sequence):
+        return f'{self.key}-{sequence}'
+
+
+class ChangeBus:
+    """Messages published per topic and delivered to every subscriber of that topic.
+
+    Publishing only appends to the topic's history and wakes its subscribers,
+    so it never waits on a slow reader, and each message is encoded once
+    however many streams send it. A topic keeps its last `history` messages:
+    a subscriber that comes back with the id of the last message it saw gets
+    the ones it missed. Ids name the topic's lifetime in this process, so an
+    id from another process, from before a restart or from beyond the kept
+    history is recognised as one that cannot be resumed.
+
+    Topics exist only while watched: publishing to a topic nobody subscribed
+    to is a no-op, and a topic is dropped `idle_ttl` seconds after its last
+    subscriber left. At most `max_subscribers` subscriptions are open at once.
+    """
+
+    def __init__(self, history=256, idle_ttl=300.0, max_subscribers=500):
+        self.history = history
+        self.idle_ttl = idle_ttl
+        self.max_subscribers = max_subscribers
+        self._token = os.urandom(3).hex()
+        self._lifetimes = itertools.count(1)
+        self._lock = threading.Lock()
+        self._topics = {}
+        self._subscribers = 0
+
+    def watched(self, topic):
+        """Whether a message published to `topic` now would be kept; publishers skip building it otherwise"""
+        return topic in self._topics
+
+    def publish(self, topic, kind, data):
+        """Send `data` to the subscribers of `topic` as a `kind` event; returns the message, or None if unwatched"""
+        with self._lock:
+            state = self._topics.get(topic)
+            if state is None:
+                return None
+            state.sequence += 1
+            message_id = state.message_id(state.sequence)
+            message = Message(message_id, kind, data, sse_frame(kind, data, message_id))
+            state.messages.append(message)
+            state.condition.notify_all()
+            return message
+
+    def subscribe(self, topic, last_id=None):
+        """Open a Subscription to `topic`, resuming after `last_id` when the bus still holds what followed it"""
+        with self._lock:
+            if self._subscribers >= self.max_subscribers:
+                raise TooManySubscribers(f'{self._subscribers} live feed subscribers already connected')
+            self._drop_idle_topics()
+            state = self._topics.get(topic)
+            if state is None:
+                key = f'{self._token}{next(self._lifetimes):x}'
+                state = self._topics[topic] = _Topic(key, self.history, self._lock)
+            state.subscribers += 1
+            self._subscribers += 1
+
+            cursor, resumed = state.sequence, False
+            key, _, sequence = (last_id or '').rpartition('-')
+            if key == state.key and sequence.isdigit():
+                sequence = int(sequence)
+                if state.sequence - len(state.messages) <= sequence <= state.sequence:
+                    cursor, resumed = sequence, True
+            return Subscription(self, state, cursor, resumed)
+
+    def _unsubscribe(self, state):
+        with self._lock:
+            state.subscribers -= 1
+            self._subscribers -= 1
+            if not state.subscribers:
+                state.idle_since = time.monotonic()
+
+    def _drop_idle_topics(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        for topic, state in list(self._topics.items()):
+            if not state.subscribers and state.idle_since < cutoff:
+                del self._topics[topic]
+
+
+class Subscription:
+    """One reader of a topic. `resumed` says whether it picked up after the last id it was opened with.
+
+    After `wait()`, `missed` is true when messages were dropped from the
+    history before this reader got to them, and the reader must start over
+    from the current state.
+    """
+
+    def __init__(self, bus, state, cursor, resumed):
+        self._bus = bus
+        self._state = state
+        self._cursor = cursor
+        self.resumed = resumed
+        self.missed = False
+        self._closed = False
+
+    @property
+    def last_id(self):
+        """Id of the last message handed out, the point to resume from"""
+        return self._state.message_id(self._cursor)
+
+    def wait(self, timeout):
+        """Messages published since the last call, waiting up to `timeout` seconds for one; [] on timeout"""
+        state = self._state
+        with state.condition:
+            if state.sequence == self._cursor and not self._closed:
+                state.condition.wait(timeout)
+            pending = state.sequence - self._cursor
+            self.missed = pending > len(state.messages)
+            messages = list(itertools.islice(reversed(state.messages), min(pending, len(state.messages))))
+            self._cursor = state.sequence
+        messages.reverse()
+        return messages
+
+    def close(self):
+        """Leave the topic; safe to call more than once"""
+        with self._state.condition:
+            if self._closed:
+                return
+            self._closed = True
+        self._bus._unsubscribe(self._state)
@@ -0,0 +1,178 @@
+"""Request instrumentation: per-route latency and SQL histograms, Prometheus text output and a sampling profiler"""
+import bisect
+import sys
+import threading
+import time
+from collections import Counter
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        """(le, cumulative count) pairs, ending with +Inf"""
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            cumulative += count
+            yield bound, cumulative
+
+
+class RequestTrace:
+    """SQL statements issued while serving one request"""
+
+    MAX_STATEMENTS = 100
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statement_count = 0
+        self.sql_time = 0.0
+        self.statements = []
+
+    def add(self, statement, duration):
+        self.statement_count += 1
+        self.sql_time += duration
+        if len(self.statements) < self.MAX_STATEMENTS:
+            self.statements.append((duration, statement))
+
+    def slowest(self, limit=5):
+        return sorted(self.statements, key=lambda item: item[0], reverse=True)[:limit]
+
+
+class MetricsRegistry:
+    """Thread-safe per-route request counters and histograms for one process"""
+
+    def __init__(self, prefix='unibuzz'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._requests = Counter()  # (method, route, status) -> count
+        self._latency = {}  # (method, route) -> Histogram of seconds
+        self._statements = {}  # (method, route) -> Histogram of statements per request
+        self._sql_time = Counter()  # (method, route) -> seconds
+        self._background_statements = 0
+        self._background_sql_time = 0.0
+
+    def record_request(self, method, route, status, duration, trace):
+        key = (method, route)
+        with self._lock:
+            self._requests[(method, route, str(status))] += 1
+            if key not in self._latency:
+                self._latency[key] = Histogram(LATENCY_BUCKETS)
+                self._statements[key] = Histogram(STATEMENT_BUCKETS)
+            self._latency[key].observe(duration)
+            self._statements[key].observe(trace.statement_count)
+            self._sql_time[key] += trace.sql_time
+
+    def record_background_sql(self, duration):
+        """SQL issued outside a traced request: the check-in writer, startup, streamed response bodies"""
+        with self._lock:
+            self._background_statements += 1
+            self._background_sql_time += duration
+
+    def render(self):
+        """The registry in the Prometheus text exposition format"""
+        p = self.prefix
+        lines = []
+        with self._lock:
+            lines.append(f'# HELP {p}_http_requests_total Requests served, by route and status.')
+            lines.append(f'# TYPE {p}_http_requests_total counter')
+            for (method, route, status), count in sorted(self._requests.items()):
+                lines.append(f'{p}_http_requests_total{_labels(method=method, route=route, status=status)} {count}')
+
+            self._render_histograms(lines, f'{p}_http_request_duration_seconds',
+                                    'Request latency, by route.', self._latency)
+            self._render_histograms(lines, f'{p}_http_request_sql_statements',
+                                    'SQL statements per request, by route.', self._statements)
+
+            lines.append(f'# HELP {p}_http_request_sql_seconds_total Time spent in SQL while serving requests.')
+            lines.append(f'# TYPE {p}_http_request_sql_seconds_total counter')
+            for (method, route), seconds in sorted(self._sql_time.items()):
+                lines.append(f'{p}_http_request_sql_seconds_total{_labels(method=method, route=route)} '
+                             f'{_number(seconds)}')
+
+            lines.append(f'# HELP {p}_background_sql_statements_total SQL statements issued outside a traced request.')
+            lines.append(f'# TYPE {p}_background_sql_statements_total counter')
+            lines.append(f'{p}_background_sql_statements_total {self._background_statements}')
+            lines.append(f'# HELP {p}_background_sql_seconds_total Time spent in SQL outside a traced request.')
+            lines.append(f'# TYPE {p}_background_sql_seconds_total counter')
+            lines.append(f'{p}_background_sql_seconds_total {_number(self._background_sql_time)}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_histograms(lines, name, help_text, histograms):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (method, route), histogram in sorted(histograms.items()):
+            for bound, count in histogram.samples():
+                le = bound if bound == '+Inf' else _number(bound)
+                lines.append(f'{name}_bucket{_labels(method=method, route=route, le=le)} {count}')
+            lines.append(f'{name}_sum{_labels(method=method, route=route)} {_number(histogram.sum)}')
+            lines.append(f'{name}_count{_labels(method=method, route=route)} {histogram.count}')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value))
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack at a fixed interval.
+
+    The result is in collapsed-stack form ('outer;inner;leaf count' per line),
+    which flamegraph.pl and speedscope read directly.
+    """
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({code.co_filename.rsplit("/", 1)[-1]}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+            self.samples += 1
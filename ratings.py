@@ -0,0 +1,82 @@
+"""Feedback rating distributions kept as five bucket counts: summary statistics and trend buckets"""
+import math
+from datetime import timedelta
+
+RATINGS = (1, 2, 3, 4, 5)
+RATING_COUNT_COLUMNS = tuple(f'rating_{rating}_count' for rating in RATINGS)
+SUMMARY_PERCENTILES = (10, 25, 50, 75, 90)
+TREND_BUCKETS = ('day', 'week')
+
+
+class RatingHistogram:
+    """Number of feedback entries per rating, 1 to 5.
+
+    Every statistic is computed from the five counts, so histograms summed
+    over events, shards or days give the same figures as the raw ratings.
+    """
+
+    __slots__ = ('counts',)
+
+    def __init__(self, counts=None):
+        self.counts = list(counts) if counts is not None else [0] * len(RATINGS)
+
+    @classmethod
+    def from_row(cls, row):
+        """The histogram of a mapping holding the rating_1_count to rating_5_count columns"""
+        return cls(row[name] or 0 for name in RATING_COUNT_COLUMNS)
+
+    def add(self, other):
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        return self
+
+    @property
+    def total(self):
+        return sum(self.counts)
+
+    @property
+    def rating_sum(self):
+        return sum(rating * count for rating, count in zip(RATINGS, self.counts))
+
+    def mean(self):
+        total = self.total
+        return round(self.rating_sum / total, 2) if total > 0 else 0
+
+    def percentile(self, percent):
+        """Nearest-rank percentile: the smallest rating at or above `percent`% of the entries, None when empty"""
+        total = self.total
+        if total == 0:
+            return None
+        rank = max(1, math.ceil(percent / 100 * total))
+        cumulative = 0
+        for rating, count in zip(RATINGS, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return rating
+        return RATINGS[-1]
+
+    def summary(self, percentiles=SUMMARY_PERCENTILES):
+        return {
+            'total_feedback': self.total,
+            'average_rating': self.mean(),
+            'median_rating': self.percentile(50),
+            'percentiles': {f'p{percent}': self.percentile(percent) for percent in percentiles},
+            'histogram': {str(rating): count for rating, count in zip(RATINGS, self.counts)}
+        }
+
+
+def bucket_start(day, bucket):
+    """First day of the trend bucket holding `day`; weeks start on Monday"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def rating_trend(rows, bucket='day'):
+    """[(bucket start, RatingHistogram)] in date order, from rows with a `day` and the rating count columns"""
+    if bucket not in TREND_BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(TREND_BUCKETS)}")
+    buckets = {}
+    for row in rows:
+        start = bucket_start(row['day'], bucket)
+        buckets.setdefault(start, RatingHistogram()).add(RatingHistogram.from_row(row))
+    return sorted(buckets.items())
@@ -0,0 +1,64 @@
+"""Per-college database shards: lazily created engines and the event-to-college map"""
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+Shard = namedtuple('Shard', ['college_id', 'engine', 'read_engine'])
+
+
+class ShardRouter:
+    """One SQLite file per college under `shards_dir`.
+
+    `make_engines(url)` returns the (write, read-only) engine pair for a shard
+    database; engines are created on first use and never connect before that.
+    `lookup_college(event_id)` asks the directory which college holds an
+    event. Events never move between colleges, so its answers are cached.
+    """
+
+    EVENT_CACHE_SIZE = 100_000
+
+    def __init__(self, shards_dir, make_engines, lookup_college):
+        self.shards_dir = shards_dir
+        self._make_engines = make_engines
+        self._lookup_college = lookup_college
+        self._shards = {}
+        self._event_colleges = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, college_id):
+        return os.path.join(self.shards_dir, f'college_{college_id}.db')
+
+    def shard(self, college_id, create=False):
+        """The shard of one college; unless `create` is set its database file must already exist"""
+        with self._lock:
+            shard = self._shards.get(college_id)
+            if shard is not None:
+                return shard
+
+            path = self.path(college_id)
+            if create:
+                os.makedirs(self.shards_dir, exist_ok=True)
+            elif not os.path.exists(path):
+                raise LookupError(f'No shard database for college {college_id}')
+            engine, read_engine = self._make_engines(f'sqlite:///{path}')
+            shard = self._shards[college_id] = Shard(college_id, engine, read_engine)
+            return shard
+
+    def college_for_event(self, event_id):
+        """College id of an event, or None when the directory does not know it"""
+        with self._lock:
+            if event_id in self._event_colleges:
+                self._event_colleges.move_to_end(event_id)
+                return self._event_colleges[event_id]
+
+        college_id = self._lookup_college(event_id)
+        if college_id is not None:
+            self.remember_event(event_id, college_id)
+        return college_id
+
+    def remember_event(self, event_id, college_id):
+        with self._lock:
+            self._event_colleges[event_id] = college_id
+            self._event_colleges.move_to_end(event_id)
+            if len(self._event_colleges) > self.EVENT_CACHE_SIZE:
+                self._event_colleges.popitem(last=False)
@@ -0,0 +1,59 @@
+import pytest
+
+from app import create_app, db, init_db, seed_demo_data, Student
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build an app on a fresh seeded database in tmp_path; `config` overrides the defaults"""
+    def make(**config):
+        database = tmp_path / f'campus-{len(list(tmp_path.iterdir()))}.db'
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}',
+            'REPORT_JOB_WORKERS': 0,
+            **config,
+        })
+        with app.app_context():
+            init_db()
+            seed_demo_data()
+        return app
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def add_students(app):
+    """Add `count` students to college 1; returns their ids"""
+    def add(count):
+        with app.app_context():
+            first = db.session.scalar(db.select(db.func.count(Student.id)))
+            students = [
+                Student(college_id=1, name=f'Student {number}', srn=f'TST{number:03}',
+                        email=f'student{number}@example.com')
+                for number in range(first + 1, first + count + 1)
+            ]
+            db.session.add_all(students)
+            db.session.commit()
+            return [student.id for student in students]
+    return add
+
+
+@pytest.fixture
+def create_event(client):
+    """Create an event in college 1 through the API; returns its id"""
+    def create(**fields):
+        event = {'college_id': 1, 'title': 'Test Event', 'type': 'Seminar', 'date': '2030-05-01', 'time': '14:00',
+                 'venue': 'Hall 1', **fields}
+        response = client.post('/events', json=event)
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()['event_id']
+    return create
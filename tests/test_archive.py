@@ -0,0 +1,73 @@
+"""Archiving old events moves their participation rows without changing what the API returns"""
+from datetime import date
+
+from app import db, archive_events, ARCHIVE_MODELS, Registration
+
+
+def participation_responses(client, event_id):
+    paths = [f'/registrations/{event_id}', f'/attendance/{event_id}', f'/feedback/{event_id}',
+             f'/reports/registrations/{event_id}', f'/reports/attendance/{event_id}', f'/reports/feedback/{event_id}']
+    responses = {}
+    for path in paths:
+        response = client.get(path)
+        assert response.status_code == 200, (path, response.get_json())
+        responses[path] = response.get_json()
+    return responses
+
+
+def finished_event(client, create_event, student_ids):
+    """A Completed event in 2020 that every student registered for, attended and rated"""
+    event_id = create_event(date='2020-03-01')
+    for rating, student_id in enumerate(student_ids, 3):
+        assert client.post('/register', json={'event_id': event_id, 'student_id': student_id}).status_code == 201
+        assert client.post('/attendance', json={'event_id': event_id, 'student_id': student_id}).status_code == 201
+        response = client.post('/feedback', json={'event_id': event_id, 'student_id': student_id, 'rating': rating})
+        assert response.status_code == 201
+    assert client.put(f'/events/{event_id}', json={'status': 'Completed'}).status_code == 200
+    return event_id
+
+
+def archive_count(cutoff):
+    return archive_events(cutoff)['events']
+
+
+def test_archive_keeps_lists_and_reports(app, client, add_students, create_event):
+    student_ids = add_students(3)
+    event_id = finished_event(client, create_event, student_ids)
+    before = participation_responses(client, event_id)
+
+    result = app.test_cli_runner().invoke(args=['archive', '--before', '2021-01-01'])
+    assert result.exit_code == 0, result.output
+    assert 'archived 1 events' in result.output
+
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.count(Registration.id))) == 0
+        archived = db.session.scalar(db.select(db.func.count()).select_from(ARCHIVE_MODELS[Registration]))
+        assert archived == len(student_ids)
+    assert participation_responses(client, event_id) == before
+
+
+def test_archived_event_refuses_new_participation(app, client, add_students, create_event):
+    *student_ids, latecomer = add_students(3)
+    event_id = finished_event(client, create_event, student_ids)
+    with app.app_context():
+        assert archive_count(date(2021, 1, 1)) == 1
+
+    response = client.post('/register', json={'event_id': event_id, 'student_id': latecomer})
+    assert response.status_code == 409
+    assert response.get_json()['message'] == 'Event is archived'
+    response = client.post('/attendance', json={'event_id': event_id, 'student_id': student_ids[0]})
+    assert response.status_code == 409
+
+
+def test_archive_skips_recent_and_active_events(app, client, add_students, create_event):
+    student_ids = add_students(2)
+    finished_event(client, create_event, student_ids)
+    active_id = create_event(date='2020-03-01')
+    client.post('/register', json={'event_id': active_id, 'student_id': student_ids[0]})
+
+    with app.app_context():
+        assert archive_count(date(2020, 1, 1)) == 0
+        assert archive_count(date(2021, 1, 1)) == 1
+        assert archive_count(date(2021, 1, 1)) == 0
+        assert db.session.scalar(db.select(db.func.count(Registration.id))) == 1
@@ -0,0 +1,77 @@
+"""Token authentication with AUTH_REQUIRED: login, bearer checks and what a student token may write"""
+import pytest
+
+from app import create_app, issue_token, DEFAULT_SECRET_KEY
+
+SECRET_KEY = 'test-secret-key'
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(AUTH_REQUIRED=True, SECRET_KEY=SECRET_KEY)
+
+
+def login(client, email='john@example.com', password='password'):
+    return client.post('/auth/login', json={'email': email, 'password': password})
+
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_refuses_to_start_with_the_placeholder_secret_key():
+    with pytest.raises(RuntimeError, match='SECRET_KEY'):
+        create_app({'AUTH_REQUIRED': True, 'SECRET_KEY': DEFAULT_SECRET_KEY})
+
+
+def test_login_returns_a_working_token(client):
+    response = login(client)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['token_type'] == 'Bearer'
+    assert body['user']['email'] == 'john@example.com'
+
+    assert client.get('/events', headers=bearer(body['token'])).status_code == 200
+
+
+@pytest.mark.parametrize('email, password', [
+    ('john@example.com', 'wrong'),
+    ('nobody@example.com', 'password'),
+    ('john@example.com', ''),
+])
+def test_login_rejects_bad_credentials(client, email, password):
+    response = login(client, email, password)
+    assert response.status_code == 401
+    assert response.get_json()['message'] == 'Invalid credentials'
+
+
+def test_requests_without_a_valid_token_are_rejected(app, client):
+    token = login(client).get_json()['token']
+    # Jane's claims under John's signature
+    forged = login(client, 'jane@example.com').get_json()['token'].partition('.')[0] + token[token.index('.'):]
+    with app.app_context():
+        expired = issue_token(1, 1, 'student', ttl=-1)
+    other_app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'AUTH_REQUIRED': True, 'SECRET_KEY': 'other'})
+    with other_app.app_context():
+        foreign = issue_token(1, 1, 'student')
+
+    assert client.get('/events').status_code == 401
+    assert client.get('/events', headers={'Authorization': f'Basic {token}'}).status_code == 401
+    assert client.get('/events', headers=bearer(forged)).status_code == 401
+    assert client.get('/events', headers=bearer(expired)).status_code == 401
+    assert client.get('/events', headers=bearer(foreign)).status_code == 401
+
+
+def test_student_token_writes_only_for_its_student(client):
+    body = login(client).get_json()
+    student_id, headers = body['user']['id'], bearer(body['token'])
+    other_id = login(client, 'jane@example.com').get_json()['user']['id']
+
+    response = client.post('/register', json={'event_id': 1, 'student_id': other_id}, headers=headers)
+    assert response.status_code == 403
+    assert response.get_json()['message'] == 'Not allowed for this token'
+    response = client.post('/events', json={'college_id': 1, 'title': 'Mine'}, headers=headers)
+    assert response.status_code == 403
+
+    assert client.post('/register', json={'event_id': 1, 'student_id': student_id}, headers=headers).status_code == 201
+    assert client.delete(f'/registrations/1/{student_id}', headers=headers).status_code == 200
@@ -0,0 +1,69 @@
+"""POST /register/bulk: one status per requested pair, and a summary that counts them"""
+import collections
+from datetime import date
+
+from app import archive_events, MAX_BULK_REGISTRATIONS
+
+
+def bulk(client, payload):
+    response = client.post('/register/bulk', json=payload)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def student_ids(client, path):
+    return [student['student_id'] for student in client.get(path).get_json()['students']]
+
+
+def test_every_status_is_reported(app, client, add_students, create_event):
+    s1, s2, s3, s4 = add_students(4)
+    open_event = create_event()
+    full_event = create_event(capacity=1)
+    archived_event = create_event(date='2020-01-10', status='Completed')
+    with app.app_context():
+        assert archive_events(date(2021, 1, 1))['events'] == 1
+    assert client.post('/register', json={'event_id': open_event, 'student_id': s4}).status_code == 201
+
+    pairs = [
+        (open_event, s1, 'created'),
+        (open_event, s1, 'already_registered'),
+        (open_event, s4, 'already_registered'),
+        (open_event, 99999, 'unknown_student'),
+        (99999, s1, 'unknown_event'),
+        (full_event, s2, 'created'),
+        (full_event, s3, 'waitlisted'),
+        (archived_event, s1, 'archived_event'),
+    ]
+    body = bulk(client, {'registrations': [{'event_id': e, 'student_id': s} for e, s, _ in pairs]})
+
+    assert [(r['event_id'], r['student_id'], r['status']) for r in body['results']] == pairs
+    counts = collections.Counter(status for _, _, status in pairs)
+    assert body['summary'] == {status: counts[status] for status in body['summary']}
+    assert set(body['summary']) == {'created', 'already_registered', 'waitlisted', 'unknown_student',
+                                    'unknown_event', 'archived_event'}
+
+    assert all(result['registration_id'] for result in body['results'] if result['status'] == 'created')
+    assert sorted(student_ids(client, f'/registrations/{open_event}')) == [s1, s4]
+    assert student_ids(client, f'/registrations/{full_event}') == [s2]
+    assert student_ids(client, f'/waitlist/{full_event}') == [s3]
+    assert client.get(f'/reports/registrations/{open_event}').get_json()['total_registrations'] == 2
+
+
+def test_student_ids_for_one_event(client, add_students, create_event):
+    students = add_students(3)
+    event_id = create_event()
+
+    body = bulk(client, {'event_id': event_id, 'student_ids': students + students[:1]})
+    assert [result['status'] for result in body['results']] == ['created'] * 3 + ['already_registered']
+    assert body['summary']['created'] == 3
+    assert body['summary']['already_registered'] == 1
+
+    body = bulk(client, {'event_id': event_id, 'student_ids': students})
+    assert body['summary']['already_registered'] == 3
+
+
+def test_too_many_pairs_are_refused(client):
+    student_ids = list(range(1, MAX_BULK_REGISTRATIONS + 2))
+    response = client.post('/register/bulk', json={'event_id': 1, 'student_ids': student_ids})
+    assert response.status_code == 400
+    assert str(MAX_BULK_REGISTRATIONS) in response.get_json()['message']
@@ -0,0 +1,142 @@
+"""Gate check-in: scans are pending until written, and unwritable batches are retried a bounded number of times"""
+import pytest
+
+from checkin import CheckinGate, WriteBehindQueue
+
+
+def test_scan_is_written_on_flush(app, client, add_students, create_event):
+    student_id, = add_students(1)
+    event_id = create_event()
+    client.post('/register', json={'event_id': event_id, 'student_id': student_id})
+    assert client.post(f'/events/{event_id}/checkin/preload').get_json()['registered'] == 1
+
+    scan = {'event_id': event_id, 'student_id': student_id}
+    assert client.post('/attendance/checkin', json=scan).status_code == 202
+    assert client.post('/attendance/checkin', json=scan).status_code == 409
+    assert client.post('/attendance', json=scan).status_code == 409
+
+    assert client.post('/attendance/checkin/flush').get_json()['flushed'] == 1
+    students = client.get(f'/attendance/{event_id}').get_json()['students']
+    assert [student['student_id'] for student in students] == [student_id]
+    assert client.post('/attendance/checkin', json=scan).status_code == 409
+
+
+@pytest.fixture
+def gate():
+    gate = CheckinGate(lambda event_id: ([1, 2, 3], []))
+    gate.preload(7)
+    return gate
+
+
+def queue_for(gate, flush, **options):
+    queue = WriteBehindQueue(flush, interval=60, on_written=gate.confirm_scans, on_dropped=gate.drop_scans, **options)
+    for student_id in (1, 2, 3):
+        assert gate.admit(7, student_id) == CheckinGate.ACCEPTED
+        queue._items.append((7, student_id, None))
+    return queue
+
+
+def test_pending_scan_is_checked_in_only_once_written(gate):
+    attempts = []
+
+    def flush(batch):
+        attempts.append(batch)
+        if len(attempts) == 1:
+            raise OSError('database is locked')
+
+    queue = queue_for(gate, flush)
+    with pytest.raises(OSError):
+        queue.flush()
+    assert queue.pending() == 3
+    assert gate.admit(7, 1) == CheckinGate.ALREADY_CHECKED_IN
+    assert gate.is_checked_in(7, 1)
+
+    assert queue.flush() == 3
+    assert queue.pending() == 0
+    assert gate.admit(7, 1) == CheckinGate.ALREADY_CHECKED_IN
+
+
+def test_poison_scan_is_dropped_after_max_attempts(gate):
+    written = []
+
+    def flush(batch):
+        if any(student_id == 2 for _, student_id, _ in batch):
+            raise ValueError('bad scan')
+        written.extend(batch)
+
+    queue = queue_for(gate, flush, max_attempts=3)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            queue.flush()
+    assert queue.flush() == 2
+    assert queue.pending() == 0
+    assert [student_id for _, student_id, _ in written] == [1, 3]
+
+    assert gate.is_checked_in(7, 1) and gate.is_checked_in(7, 3)
+    assert not gate.is_checked_in(7, 2)
+    assert gate.admit(7, 2) == CheckinGate.ACCEPTED
+
+
+def test_close_drains_past_a_poison_scan(gate):
+    written = []
+
+    def flush(batch):
+        if any(student_id == 2 for _, student_id, _ in batch):
+            raise ValueError('bad scan')
+        written.extend(batch)
+
+    queue = queue_for(gate, flush, max_attempts=2)
+    queue.close()
+    assert queue.pending() == 0
+    assert [student_id for _, student_id, _ in written] == [1, 3]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_idle_events_are_evicted_once_their_scans_drain():
+    clock = Clock()
+    gate = CheckinGate(lambda event_id: ([1, 2], []), idle_timeout=60, clock=clock)
+    gate.preload(7)
+    assert gate.admit(8, 1) == CheckinGate.ACCEPTED
+
+    clock.now = 61
+    gate.preload(9)
+    assert not gate.is_loaded(7)
+    # A scan of event 8 is still on its way to the table
+    assert gate.is_loaded(8)
+
+    gate.confirm_scans([(8, 1, None)])
+    assert not gate.is_loaded(8)
+    assert gate.is_loaded(9)
+
+    # An evicted event loads again on its next scan
+    assert gate.admit(7, 2) == CheckinGate.ACCEPTED
+
+
+def test_forgotten_event_is_dropped_after_its_pending_scans():
+    gate = CheckinGate(lambda event_id: ([1, 2], []))
+    assert gate.admit(7, 1) == CheckinGate.ACCEPTED
+
+    gate.forget(7)
+    assert gate.is_checked_in(7, 1)
+    gate.drop_scans([(7, 1, None)])
+    assert not gate.is_loaded(7)
+
+
+def test_completing_an_event_drops_its_gate_sets(app, client, create_event):
+    event_id = create_event()
+    other_id = create_event()
+    for loaded in (event_id, other_id):
+        assert client.post(f'/events/{loaded}/checkin/preload').status_code == 200
+    gate = app.extensions['unibuzz'].checkin_gate
+
+    assert client.put(f'/events/{event_id}', json={'status': 'Completed'}).status_code == 200
+    assert client.delete(f'/events/{other_id}').status_code == 200
+    assert not gate.is_loaded(event_id)
+    assert not gate.is_loaded(other_id)
@@ -0,0 +1,77 @@
+"""GET /events: keyset pagination in (date, time, id) order and `fields=` projection"""
+import base64
+import json
+
+import pytest
+
+# Several events share a date, and some a date and time, so the id breaks the ties
+SCHEDULE = [
+    ('2030-03-02', '09:00'), ('2030-03-01', '14:00'), ('2030-03-01', '09:00'), ('2030-03-01', '14:00'),
+    ('2030-03-02', '09:00'), ('2030-03-01', '09:00'), ('2030-03-02', '09:00'), ('2030-02-28', '18:30'),
+]
+
+
+@pytest.fixture
+def event_ids(create_event):
+    return [create_event(date=day, time=start, type='Talk') for day, start in SCHEDULE]
+
+
+def walk(client, query, limit):
+    """Every event across the pages of `query`, and the number of pages"""
+    events, pages, cursor = [], 0, None
+    while True:
+        url = f'/events?{query}&limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(url)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        events += body['events']
+        pages += 1
+        cursor = body['next_cursor']
+        if cursor is None:
+            return events, pages
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 8, 50])
+def test_pages_cover_every_event_once_in_order(client, event_ids, limit):
+    events, pages = walk(client, 'type=Talk', limit)
+
+    keys = [(event['date'], event['time'], event['id']) for event in events]
+    assert keys == sorted(keys)
+    assert sorted(event['id'] for event in events) == sorted(event_ids)
+    assert pages == max(1, -(-len(event_ids) // limit))
+
+
+def test_pages_continue_across_filters(client, event_ids):
+    everything = client.get('/events?limit=500').get_json()['events']
+    events, _ = walk(client, 'status=Active', 2)
+    assert [event['id'] for event in events] == [event['id'] for event in everything]
+    assert len(events) == len(event_ids) + 1
+
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', base64.urlsafe_b64encode(b'[1, 2]').decode(),
+                                    base64.urlsafe_b64encode(json.dumps(['2030-13-01', '09:00', 1]).encode()).decode()])
+def test_bad_cursor_is_rejected(client, cursor):
+    response = client.get(f'/events?cursor={cursor}')
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Invalid cursor'
+
+
+def test_non_positive_limit_is_rejected(client):
+    assert client.get('/events?limit=0').status_code == 400
+
+
+def test_fields_select_the_returned_keys(client, event_ids):
+    events = client.get('/events?type=Talk&fields=title,college_name&limit=3').get_json()['events']
+    assert [set(event) for event in events] == [{'title', 'college_name'}] * 3
+    assert events[0]['college_name'] == 'Engineering College A'
+
+    # The cursor still comes from the sort key, which is selected even when not requested
+    body = client.get('/events?type=Talk&fields=title&limit=3').get_json()
+    rest = client.get(f"/events?type=Talk&fields=id&limit=500&cursor={body['next_cursor']}").get_json()['events']
+    assert len(rest) == len(event_ids) - 3
+
+
+def test_unknown_field_is_rejected(client):
+    response = client.get('/events?fields=title,password')
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Unknown fields: password'
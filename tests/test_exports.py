@@ -0,0 +1,75 @@
+"""?format=csv and ?format=ndjson on the per-event lists stream the same rows as the JSON responses"""
+import csv
+import io
+import json
+from datetime import date
+
+import pytest
+
+import app as app_module
+
+# The JSON key holding each list's rows
+LISTS = {'registrations': 'students', 'attendance': 'students', 'feedback': 'feedback'}
+
+
+def participate(client, event_id, student_ids):
+    for rating, student_id in enumerate(student_ids, 1):
+        for path, payload in (('/register', {}), ('/attendance', {}), ('/feedback', {
+            'rating': rating, 'comment': f'Good, said "student {student_id}"\nthen left'
+        })):
+            response = client.post(path, json={'event_id': event_id, 'student_id': student_id, **payload})
+            assert response.status_code == 201, response.get_json()
+
+
+def exported(client, path, export_format):
+    response = client.get(f'{path}?format={export_format}')
+    assert response.status_code == 200
+    assert response.mimetype == app_module.EXPORT_FORMATS[export_format]
+    assert response.headers['Content-Disposition'].endswith(f'.{export_format}')
+    body = response.get_data(as_text=True)
+    if export_format == 'csv':
+        return list(csv.DictReader(io.StringIO(body)))
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def as_csv_values(rows):
+    return [{key: '' if value is None else str(value) for key, value in row.items()} for row in rows]
+
+
+@pytest.fixture(params=['live', 'archived'])
+def event_id(request, app, client, add_students, create_event, monkeypatch):
+    """An event with three students' rows, in the live tables or moved to the archive tables"""
+    # Batches of two, so a list spans several batches
+    monkeypatch.setattr(app_module, 'EXPORT_BATCH_SIZE', 2)
+    event_id = create_event(date='2020-04-01')
+    participate(client, event_id, add_students(3))
+    if request.param == 'archived':
+        assert client.put(f'/events/{event_id}', json={'status': 'Completed'}).status_code == 200
+        with app.app_context():
+            assert app_module.archive_events(date(2021, 1, 1))['registrations'] == 3
+    return event_id
+
+
+@pytest.mark.parametrize('name', LISTS)
+@pytest.mark.parametrize('export_format', app_module.EXPORT_FORMATS)
+def test_export_matches_the_json_list(client, event_id, name, export_format):
+    path = f'/{name}/{event_id}'
+    rows = client.get(path).get_json()[LISTS[name]]
+    assert len(rows) == 3
+
+    exported_rows = exported(client, path, export_format)
+    assert exported_rows == (as_csv_values(rows) if export_format == 'csv' else rows)
+
+
+def test_empty_list_exports_only_the_header(client, create_event):
+    event_id = create_event()
+    assert exported(client, f'/registrations/{event_id}', 'csv') == []
+    body = client.get(f'/registrations/{event_id}?format=csv').get_data(as_text=True)
+    assert body.strip() == 'student_id,name,srn,email,registered_at'
+    assert exported(client, f'/registrations/{event_id}', 'ndjson') == []
+
+
+def test_unknown_format_is_rejected(client):
+    response = client.get('/registrations/1?format=xml')
+    assert response.status_code == 400
+    assert "Unknown format 'xml'" in response.get_json()['message']
@@ -0,0 +1,121 @@
+"""Rating histograms and GET /reports/feedback-analytics over a known distribution of ratings"""
+from datetime import date, datetime
+
+import pytest
+
+import app as app_module
+from ratings import RatingHistogram, rating_trend
+
+# Ratings 1, 3, 3, 4, 4, 4, 5, 5, 5, 5
+COUNTS = [1, 0, 2, 3, 4]
+
+
+def test_histogram_statistics():
+    histogram = RatingHistogram(COUNTS)
+    assert (histogram.total, histogram.rating_sum, histogram.mean()) == (10, 39, 3.9)
+    summary = histogram.summary()
+    assert summary['median_rating'] == 4
+    assert summary['percentiles'] == {'p10': 1, 'p25': 3, 'p50': 4, 'p75': 5, 'p90': 5}
+    assert summary['histogram'] == {'1': 1, '2': 0, '3': 2, '4': 3, '5': 4}
+    assert histogram.percentile(0) == 1
+    assert histogram.percentile(100) == 5
+
+    empty = RatingHistogram()
+    assert (empty.mean(), empty.percentile(50)) == (0, None)
+    assert empty.add(histogram).counts == COUNTS
+    row = {'rating_1_count': 2, 'rating_2_count': None, 'rating_3_count': 0, 'rating_4_count': 0, 'rating_5_count': 1}
+    assert RatingHistogram.from_row(row).counts == [2, 0, 0, 0, 1]
+
+
+def trend_row(day, **counts):
+    return {'day': day, **{f'rating_{rating}_count': counts.get(f'r{rating}', 0) for rating in range(1, 6)}}
+
+
+def test_rating_trend_buckets():
+    # 2030-01-06 is a Sunday; the next two days fall in the week starting Monday 2030-01-07
+    rows = [trend_row(date(2030, 1, 9), r5=1), trend_row(date(2030, 1, 6), r1=2), trend_row(date(2030, 1, 7), r3=1)]
+    days = rating_trend(rows, 'day')
+    assert [(start, histogram.counts) for start, histogram in days] == [
+        (date(2030, 1, 6), [2, 0, 0, 0, 0]), (date(2030, 1, 7), [0, 0, 1, 0, 0]), (date(2030, 1, 9), [0, 0, 0, 0, 1])
+    ]
+    weeks = rating_trend(rows, 'week')
+    assert [(start, histogram.counts) for start, histogram in weeks] == [
+        (date(2029, 12, 31), [2, 0, 0, 0, 0]), (date(2030, 1, 7), [0, 0, 1, 0, 1])
+    ]
+    with pytest.raises(ValueError, match='bucket must be one of day, week'):
+        rating_trend(rows, 'month')
+
+
+@pytest.fixture
+def rated_events(client, monkeypatch, add_students, create_event):
+    """Two seminars and a workshop; the seminars' ratings are COUNTS, given on 2030-01-06, 07 and 09"""
+    clock = {'now': None}
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return clock['now']
+
+    seminars = [create_event(), create_event()]
+    workshop = create_event(type='Workshop')
+    students = add_students(12)
+    ratings = [1, 3, 3, 4, 4, 4, 5, 5, 5, 5]
+    days = [6, 6, 7, 7, 7, 9, 9, 9, 9, 9]
+    for number, student_id in enumerate(students):
+        event_id = seminars[number % 2] if number < len(ratings) else workshop
+        assert client.post('/register', json={'event_id': event_id, 'student_id': student_id}).status_code == 201
+        assert client.post('/attendance', json={'event_id': event_id, 'student_id': student_id}).status_code == 201
+        if number < len(ratings):
+            clock['now'] = datetime(2030, 1, days[number], 12)
+            monkeypatch.setattr(app_module, 'datetime', FrozenDatetime)
+            feedback = {'event_id': event_id, 'student_id': student_id, 'rating': ratings[number]}
+            assert client.post('/feedback', json=feedback).status_code == 201
+            monkeypatch.setattr(app_module, 'datetime', datetime)
+    return seminars, workshop
+
+
+def analytics(client, **query):
+    response = client.get('/reports/feedback-analytics', query_string=query)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_analytics_of_a_known_distribution(client, rated_events):
+    seminars, workshop = rated_events
+    body = analytics(client, ids=','.join(str(event_id) for event_id in [*seminars, workshop, 999]))
+    assert body['not_found'] == [999]
+    summary = body['summary']
+    assert summary['total_events'] == 3
+    assert summary['histogram'] == {'1': 1, '2': 0, '3': 2, '4': 3, '5': 4}
+    assert (summary['total_feedback'], summary['average_rating'], summary['median_rating']) == (10, 3.9, 4)
+    assert summary['percentiles'] == {'p10': 1, 'p25': 3, 'p50': 4, 'p75': 5, 'p90': 5}
+    assert (summary['total_attended'], summary['response_rate']) == (12, 83.33)
+
+    types = {row['event_type']: row for row in body['event_types']}
+    assert (types['Seminar']['total_events'], types['Seminar']['response_rate']) == (2, 100.0)
+    assert (types['Workshop']['total_feedback'], types['Workshop']['median_rating']) == (0, None)
+    events = {row['event_id']: row for row in body['events']}
+    # Even-numbered students rated the first seminar: 1, 3, 4, 5, 5
+    assert events[seminars[0]]['histogram'] == {'1': 1, '2': 0, '3': 1, '4': 1, '5': 2}
+    assert events[seminars[0]]['median_rating'] == 4
+
+
+def test_analytics_trend_by_day_and_week(client, rated_events):
+    body = analytics(client, type='Seminar', bucket='day')
+    assert body['bucket'] == 'day'
+    assert [(row['start'], row['total_feedback']) for row in body['trend']] == [
+        ('2030-01-06', 2), ('2030-01-07', 3), ('2030-01-09', 5)
+    ]
+    assert body['trend'][0]['histogram'] == {'1': 1, '2': 0, '3': 1, '4': 0, '5': 0}
+
+    body = analytics(client, type='Seminar')
+    assert body['bucket'] == 'week'
+    assert [(row['start'], row['total_feedback'], row['median_rating']) for row in body['trend']] == [
+        ('2029-12-31', 2, 1), ('2030-01-07', 8, 4)
+    ]
+
+
+def test_unknown_bucket_is_rejected(client, rated_events):
+    response = client.get('/reports/feedback-analytics', query_string={'bucket': 'month'})
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'bucket must be one of day, week'
@@ -0,0 +1,84 @@
+"""Roster imports: valid rows are created, invalid and duplicate rows are reported by row number"""
+import io
+import json
+
+STUDENTS_CSV = b"""name,srn,email
+Asha Rao,ENG100,asha@example.com
+Duplicate John,ENG001,john2@example.com
+Ben Ito,ENG101,ben@example.com
+Ben Again,ENG101,ben.again@example.com
+No Email,ENG102,not-an-email
+,ENG103,nameless@example.com
+Cara Diaz,ENG104,cara@example.com
+"""
+
+
+def import_students(client, body, query='format=csv', college_id=1):
+    return client.post(f'/colleges/{college_id}/students/import?{query}', data=body)
+
+
+def student_srns(client):
+    students = client.get('/reports/students?college_id=1').get_json()['students']
+    return {student['srn'] for student in students}
+
+
+def test_student_import_reports_rejected_rows(client):
+    response = import_students(client, STUDENTS_CSV)
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report['imported'] == 3
+    assert report['failed'] == 4
+    assert report['errors_truncated'] is False
+    assert [error['row'] for error in report['errors']] == [2, 4, 5, 6]
+    messages = {error['row']: error['message'] for error in report['errors']}
+    assert messages[2] == "srn 'ENG001' already exists"
+    assert messages[4] == "srn 'ENG101' already exists"
+    assert 'email' in messages[5]
+    assert 'name' in messages[6]
+
+    assert student_srns(client) >= {'ENG100', 'ENG101', 'ENG104'}
+    assert 'ENG102' not in student_srns(client)
+
+
+def test_student_import_is_idempotent_for_existing_rows(client):
+    import_students(client, STUDENTS_CSV)
+    report = import_students(client, STUDENTS_CSV).get_json()
+    assert report['imported'] == 0
+    assert report['failed'] == 7
+
+
+def test_student_import_rejects_bad_requests(client):
+    assert import_students(client, STUDENTS_CSV, college_id=99).status_code == 404
+    response = import_students(client, STUDENTS_CSV, query='')
+    assert response.status_code == 400
+    response = import_students(client, b'name,email\nAsha,asha@example.com\n')
+    assert response.status_code == 400
+    assert 'srn' in response.get_json()['message']
+
+
+def test_student_import_takes_a_multipart_upload(client):
+    upload = {'file': (io.BytesIO(STUDENTS_CSV), 'roster.csv')}
+    response = client.post('/colleges/1/students/import', data=upload)
+    assert response.status_code == 200
+    assert response.get_json()['imported'] == 3
+
+
+def test_event_import_from_ndjson(client):
+    rows = [
+        {'college_id': 1, 'title': 'Robotics Meetup', 'type': 'Meetup', 'date': '2030-02-01', 'time': '18:00',
+         'venue': 'Lab 2'},
+        {'college_id': 99, 'title': 'Nowhere', 'type': 'Meetup', 'date': '2030-02-02', 'time': '18:00', 'venue': 'X'},
+        {'college_id': 2, 'title': 'Poetry Evening', 'type': 'Meetup', 'date': '2030-02-03', 'time': '19:00',
+         'venue': 'Hall B'},
+    ]
+    body = '\n'.join(json.dumps(row) for row in rows).encode() + b'\n{not json}\n'
+    response = client.post('/events/import', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report['imported'] == 2
+    assert [error['row'] for error in report['errors']] == [2, 4]
+    assert report['errors'][0]['message'] == 'College 99 not found'
+    assert report['errors'][1]['message'].startswith('Invalid JSON')
+
+    events = client.get('/events?type=Meetup').get_json()['events']
+    assert [event['title'] for event in events] == ['Robotics Meetup', 'Poetry Evening']
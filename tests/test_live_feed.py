@@ -0,0 +1,98 @@
+"""Live activity feed: ChangeBus delivery and resuming GET /events/<id>/stream with Last-Event-ID"""
+import json
+
+import pytest
+
+from livefeed import ChangeBus
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(LIVE_FEED_HEARTBEAT=0.05)
+
+
+def open_stream(client, event_id, last_id=None):
+    response = client.get(f'/events/{event_id}/stream', headers={'Last-Event-ID': last_id} if last_id else {})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    return response, iter(response.response)
+
+
+def next_messages(chunks):
+    """The messages of the next chunk that is not a keepalive, as (id, event, data) tuples"""
+    for chunk in chunks:
+        messages = []
+        for frame in chunk.decode().split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in frame.splitlines() if not line.startswith(':'))
+            if 'event' in fields:
+                messages.append((fields.get('id'), fields['event'], json.loads(fields['data'])))
+        if messages:
+            return messages
+
+
+def register(client, event_id, student_id):
+    assert client.post('/register', json={'event_id': event_id, 'student_id': student_id}).status_code == 201
+
+
+def test_reconnecting_replays_only_the_missed_messages(client, add_students, create_event):
+    first, second, third = add_students(3)
+    event_id = create_event()
+    response, chunks = open_stream(client, event_id)
+    assert next(chunks) == b'retry: 3000\n\n'
+    [(_, kind, snapshot)] = next_messages(chunks)
+    assert kind == 'snapshot'
+    assert snapshot['counts']['registrations_count'] == 0
+
+    register(client, event_id, first)
+    [(seen_id, kind, data)] = next_messages(chunks)
+    assert kind == 'registration'
+    assert data['student']['student_id'] == first
+    response.close()
+
+    # Published while the client was away; the topic is kept for it
+    register(client, event_id, second)
+    register(client, event_id, third)
+    response, chunks = open_stream(client, event_id, seen_id)
+    assert next(chunks) == b'retry: 3000\n\n'
+    missed = next_messages(chunks)
+    assert [kind for _, kind, _ in missed] == ['registration', 'registration']
+    assert [data['student']['student_id'] for _, _, data in missed] == [second, third]
+    assert missed[-1][2]['counts']['registrations_count'] == 3
+    response.close()
+
+
+def test_unknown_last_id_starts_from_a_snapshot(client, add_students, create_event):
+    (student_id,) = add_students(1)
+    event_id = create_event()
+    register(client, event_id, student_id)
+    response, chunks = open_stream(client, event_id, 'elsewhere-7')
+    next(chunks)
+    [(_, kind, snapshot)] = next_messages(chunks)
+    assert kind == 'snapshot'
+    assert snapshot['counts']['registrations_count'] == 1
+    response.close()
+
+
+def test_bus_delivers_to_every_subscriber_and_resumes():
+    bus = ChangeBus(history=2)
+    assert bus.publish(1, 'registration', {'n': 0}) is None
+    first, second = bus.subscribe(1), bus.subscribe(1)
+    bus.publish(1, 'registration', {'n': 1})
+    bus.publish(2, 'registration', {'n': 99})
+    for subscription in (first, second):
+        assert [message.data for message in subscription.wait(0)] == [{'n': 1}]
+    assert first.wait(0) == []
+
+    resume_from = first.last_id
+    first.close()
+    bus.publish(1, 'attendance', {'n': 2})
+    resumed = bus.subscribe(1, resume_from)
+    assert resumed.resumed
+    assert [(message.kind, message.data) for message in resumed.wait(0)] == [('attendance', {'n': 2})]
+
+    # Beyond the kept history the reader is told it missed messages
+    for n in range(3, 6):
+        bus.publish(1, 'registration', {'n': n})
+    assert [message.data for message in second.wait(0)] == [{'n': 4}, {'n': 5}]
+    assert second.missed
+    assert not bus.subscribe(1, resume_from).resumed
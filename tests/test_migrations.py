@@ -0,0 +1,103 @@
+"""Upgrading databases created by earlier versions of the app with `migrate` and `init-db`"""
+import sqlite3
+
+import pytest
+
+from app import create_app, MIGRATIONS
+
+# The schema and demo rows of the original app, before any migration existed
+BASELINE_SCHEMA = """
+CREATE TABLE colleges (
+    id INTEGER NOT NULL, name VARCHAR(255) NOT NULL, created_at DATETIME,
+    PRIMARY KEY (id), UNIQUE (name)
+);
+CREATE TABLE students (
+    id INTEGER NOT NULL, college_id INTEGER NOT NULL, name VARCHAR(255) NOT NULL, srn VARCHAR(50) NOT NULL,
+    email VARCHAR(255) NOT NULL, created_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(college_id) REFERENCES colleges (id), UNIQUE (srn), UNIQUE (email)
+);
+CREATE TABLE events (
+    id INTEGER NOT NULL, college_id INTEGER NOT NULL, title VARCHAR(255) NOT NULL, description TEXT,
+    type VARCHAR(100) NOT NULL, date DATE NOT NULL, time TIME NOT NULL, venue VARCHAR(255) NOT NULL,
+    status VARCHAR(20), resources TEXT, created_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(college_id) REFERENCES colleges (id)
+);
+CREATE TABLE registrations (
+    id INTEGER NOT NULL, event_id INTEGER NOT NULL, student_id INTEGER NOT NULL, registered_at DATETIME,
+    PRIMARY KEY (id), CONSTRAINT unique_event_student_registration UNIQUE (event_id, student_id),
+    FOREIGN KEY(event_id) REFERENCES events (id), FOREIGN KEY(student_id) REFERENCES students (id)
+);
+CREATE TABLE attendance (
+    id INTEGER NOT NULL, event_id INTEGER NOT NULL, student_id INTEGER NOT NULL, attended_at DATETIME,
+    PRIMARY KEY (id), CONSTRAINT unique_event_student_attendance UNIQUE (event_id, student_id),
+    FOREIGN KEY(event_id) REFERENCES events (id), FOREIGN KEY(student_id) REFERENCES students (id)
+);
+CREATE TABLE feedback (
+    id INTEGER NOT NULL, event_id INTEGER NOT NULL, student_id INTEGER NOT NULL, rating INTEGER NOT NULL,
+    comment TEXT, created_at DATETIME,
+    PRIMARY KEY (id), CONSTRAINT unique_event_student_feedback UNIQUE (event_id, student_id),
+    CONSTRAINT check_rating_range CHECK (rating >= 1 AND rating <= 5),
+    FOREIGN KEY(event_id) REFERENCES events (id), FOREIGN KEY(student_id) REFERENCES students (id)
+);
+INSERT INTO colleges VALUES (1, 'Engineering College A', '2025-09-07 04:02:13.670131');
+INSERT INTO students VALUES
+    (1, 1, 'John Doe', 'ENG001', 'john@example.com', '2025-09-07 04:02:13.680863'),
+    (2, 1, 'Jane Smith', 'ENG002', 'jane@example.com', '2025-09-07 04:02:13.680863');
+INSERT INTO events VALUES
+    (1, 1, 'Python Workshop', 'Learn Python programming basics', 'Workshop', '2024-12-15', '10:00:00.000000',
+     'Lab 1', 'Active', '{}', '2025-09-07 04:02:13.691143'),
+    (2, 1, 'AI/ML Workshop', 'Introduction to Machine Learning', 'Workshop', '2024-12-20', '14:00:00.000000',
+     'Main Auditorium', 'Active', '{}', '2025-09-07 04:14:59.654412');
+INSERT INTO registrations VALUES (1, 1, 1, '2025-09-07 04:17:12.677353'), (2, 1, 2, '2025-09-07 04:17:13.000000');
+INSERT INTO attendance VALUES (1, 1, 1, '2025-09-07 04:17:33.108930');
+INSERT INTO feedback VALUES (1, 1, 1, 5, 'Excellent workshop!', '2025-09-07 04:17:50.015188');
+"""
+
+# event_stats as the write endpoints kept it before the report rollups had migrations
+# or rating histograms, with counters that had drifted
+EARLY_EVENT_STATS = """
+CREATE TABLE event_stats (
+    event_id INTEGER NOT NULL, registrations_count INTEGER NOT NULL, attendance_count INTEGER NOT NULL,
+    feedback_count INTEGER NOT NULL, rating_sum INTEGER NOT NULL,
+    PRIMARY KEY (event_id), FOREIGN KEY(event_id) REFERENCES events (id)
+);
+INSERT INTO event_stats VALUES (1, 7, 0, 0, 0), (2, 0, 0, 0, 0);
+"""
+
+
+@pytest.fixture(params=['baseline', 'early rollups'])
+def old_database(request, tmp_path):
+    path = tmp_path / 'old.db'
+    connection = sqlite3.connect(path)
+    connection.executescript(BASELINE_SCHEMA + (EARLY_EVENT_STATS if request.param == 'early rollups' else ''))
+    connection.close()
+    return path
+
+
+@pytest.mark.parametrize('command', ['migrate', 'init-db'])
+def test_upgrades_an_old_database(old_database, command):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{old_database}', 'REPORT_JOB_WORKERS': 0})
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=[command])
+    assert result.exit_code == 0, result.output
+    assert str([version for version, _, _ in MIGRATIONS]) in result.output
+    result = runner.invoke(args=[command])
+    assert result.exit_code == 0, result.output
+    assert 'up to date' in result.output
+
+    client = app.test_client()
+    report = client.get('/reports/attendance/1').get_json()
+    assert (report['total_registered'], report['total_attended']) == (2, 1)
+    report = client.get('/reports/feedback/1').get_json()
+    assert (report['total_feedback'], report['average_rating'], report['histogram']['5']) == (1, 5, 1)
+    assert client.get('/reports/event-types').get_json()['event_types'][0]['total_events'] == 2
+    assert [event['id'] for event in client.get('/events').get_json()['events']] == [1, 2]
+    assert [event['id'] for event in client.get('/events/search?q=python').get_json()['events']] == [1]
+
+    # The upgraded schema takes the newer writes
+    assert client.put('/events/2', json={'capacity': 1}).status_code == 200
+    assert client.post('/register', json={'event_id': 2, 'student_id': 1}).status_code == 201
+    assert client.post('/register', json={'event_id': 2, 'student_id': 2}).status_code == 202
+    response = client.post('/feedback', json={'event_id': 1, 'student_id': 2, 'rating': 4})
+    assert response.status_code == 403
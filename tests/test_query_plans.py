@@ -0,0 +1,407 @@
+"""Query-plan regression check.
+
+Builds a synthetic dataset in a temporary database and, for every route in
+the app's URL map, sends the requests listed for it in ROUTE_REQUESTS,
+captures each SQL statement they issue and runs EXPLAIN QUERY PLAN on it. A
+route fails when a statement falls back to a full table scan, or sorts with
+a temporary b-tree, unless the route is explicitly allowed to, and when it
+has no requests listed at all, so a new route cannot go unchecked.
+
+    python -m pytest tests/test_query_plans.py
+"""
+import re
+
+import pytest
+from sqlalchemy import event as sa_event
+from werkzeug.security import generate_password_hash
+
+from app import (create_app, db, get_read_engine, init_db, claim_report_job, run_report_job, Attendance, Feedback,
+                 Registration, Student, rebuild_report_rollups)
+from bench.datagen import populate
+
+# Tables a request may scan in full, with the reason. Anything else is a regression.
+ALLOWED_SCANS = {
+    # The type and month rollups are small and returned whole
+    '/reports/event-types': {'event_type_stats'},
+    # One student's registrations and attendance, gathered through their student_id indexes
+    '/students/1/feed': {'feed_entries', 'attended_events'},
+    '/students/1/feed?from=2024-01-01&to=2024-12-31&limit=5': {'feed_entries', 'attended_events'},
+    # The monthly job reads the month rollup of one status, a row per month
+    'report job worker': {'monthly_stats'},
+}
+
+# Requests allowed to sort their result with a temporary b-tree
+ALLOWED_TEMP_SORTS = {
+    # Only the events of one type are sorted
+    '/reports/popularity?type=Workshop',
+    '/reports/event-types',
+    # The batched event report sorts at most MAX_REPORT_IDS events, or one college's
+    '/reports/events?ids=1,2',
+    '/reports/events?college_id=1&from=2024-01-01&to=2024-12-31',
+    # A student's feed sorts only their own events
+    '/students/1/feed',
+    '/students/1/feed?from=2024-01-01&to=2024-12-31&limit=5',
+}
+
+# Routes that issue no SQL, with the reason
+NO_SQL_ROUTES = {
+    'static': 'serves files from disk',
+}
+
+# Plain table scans only; 'SCAN t USING INDEX' and 'SCAN n CONSTANT ROWS' are fine
+SCAN_PATTERN = re.compile(r'^SCAN ([A-Za-z_]\w*)(?: AS \w+)?$')
+
+# Step of a route's requests standing for a report job worker's poll: claim the next job and run it
+WORKER = 'WORKER'
+
+CONFIG = {'REPORT_JOB_WORKERS': 0, 'RESPONSE_CACHE_ENABLED': False}
+
+
+class PlanContext:
+    """The app under test, ids that exist in its dataset, and helpers for setting up a route's requests"""
+
+    def __init__(self, app, client, event_id, student_id, free_student_ids, login_email, cursor):
+        self.app = app
+        self.client = client
+        self.event_id = event_id
+        self.student_id = student_id
+        self.login_email = login_email
+        self.cursor = cursor
+        self._free_student_ids = list(free_student_ids)
+
+    def free_student(self):
+        """A student registered for nothing and on no waitlist, handed out once"""
+        return self._free_student_ids.pop()
+
+    def new_event(self, capacity=None):
+        """Create an event of college 1 without going through the plan check; returns its id"""
+        response = self.client.post('/events', json={
+            'college_id': 1, 'title': 'Plan Check Event', 'type': 'Workshop', 'date': '2026-03-14', 'time': '10:30',
+            'venue': 'Lab 1', 'capacity': capacity
+        })
+        assert response.status_code == 201, response.get_data(as_text=True)
+        return response.get_json()['event_id']
+
+    def register(self, event_id, student_id):
+        response = self.client.post('/register', json={'event_id': event_id, 'student_id': student_id})
+        assert response.status_code in (201, 202), response.get_data(as_text=True)
+        return response
+
+
+def build_dataset():
+    """Create the schema and load a small deterministic synthetic campus into the app's database.
+
+    Returns an (event_id, student_id) attendance pair that has no feedback yet.
+    """
+    init_db()
+    connection = db.engine.raw_connection()
+    try:
+        populate(connection.driver_connection, colleges=10, students=5000, events=1000, registrations=20000)
+    finally:
+        connection.close()
+    rebuild_report_rollups()
+    db.session.commit()
+
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql('ANALYZE')
+
+    pair = db.session.execute(
+        db.select(Attendance.event_id, Attendance.student_id)
+        .where(~db.select(Feedback.id).where(Feedback.event_id == Attendance.event_id,
+                                             Feedback.student_id == Attendance.student_id).exists())
+        .order_by(Attendance.id).limit(1)
+    ).one()
+    db.session.commit()
+    return pair
+
+
+def run_report_worker(app):
+    """One poll of a JobRunner worker: claim the next report job and run it"""
+    job = claim_report_job(app)
+    if job is not None:
+        run_report_job(app, job)
+    # The worker committed in its own session; end this one's read so later requests see the job's outcome
+    db.session.commit()
+
+
+def events_requests(ctx):
+    yield 'GET', '/events', None
+    yield 'GET', '/events?type=Workshop', None
+    yield 'GET', '/events?date=2024-06-01', None
+    yield 'GET', '/events?status=Completed&fields=id,title,date,venue', None
+    yield 'GET', f'/events?cursor={ctx.cursor}', None
+
+
+def update_event_requests(ctx):
+    # A seat added to a full event promotes the head of its waitlist
+    event_id = ctx.new_event(capacity=1)
+    for _ in range(3):
+        ctx.register(event_id, ctx.free_student())
+    yield 'PUT', f'/events/{event_id}', {'venue': 'Lab 2'}
+    yield 'PUT', f'/events/{event_id}', {'capacity': 2}
+    yield 'PUT', f'/events/{event_id}', {'capacity': None}
+
+
+def cancel_registration_requests(ctx):
+    event_id = ctx.new_event(capacity=1)
+    registered, promoted, waiting = ctx.free_student(), ctx.free_student(), ctx.free_student()
+    for student_id in (registered, promoted, waiting):
+        ctx.register(event_id, student_id)
+    # Frees the seat for the head of the waitlist, then leaves the waitlist
+    yield 'DELETE', f'/registrations/{event_id}/{registered}', None
+    yield 'DELETE', f'/registrations/{event_id}/{waiting}', None
+
+
+def waitlist_requests(ctx):
+    event_id = ctx.new_event(capacity=1)
+    for _ in range(3):
+        ctx.register(event_id, ctx.free_student())
+    yield 'GET', f'/waitlist/{event_id}', None
+
+
+def mark_attendance_requests(ctx):
+    student_id = ctx.free_student()
+    ctx.register(ctx.event_id, student_id)
+    yield 'POST', '/attendance', {'event_id': ctx.event_id, 'student_id': student_id}
+
+
+def checkin_requests(ctx):
+    student_id = ctx.free_student()
+    ctx.register(ctx.event_id, student_id)
+    ctx.client.post(f'/events/{ctx.event_id}/checkin/preload')
+    yield 'POST', '/attendance/checkin', {'event_id': ctx.event_id, 'student_id': student_id}
+
+
+def delete_event_requests(ctx):
+    yield 'DELETE', f'/events/{ctx.new_event()}', None
+
+
+# Every job test asks for the same report, so the worker only ever finds this one job
+REPORT_JOB = {'report': 'monthly', 'params': {'status': 'Completed'}}
+
+
+def report_job_requests(ctx):
+    # The second request finds the first one's job
+    yield 'POST', '/reports/jobs', REPORT_JOB
+    yield 'POST', '/reports/jobs', REPORT_JOB
+
+
+def report_job_status_requests(ctx):
+    job_id = ctx.client.post('/reports/jobs', json=REPORT_JOB).get_json()['job']['id']
+    yield 'GET', f'/reports/jobs/{job_id}', None
+
+
+def report_job_result_requests(ctx):
+    job_id = ctx.client.post('/reports/jobs', json=REPORT_JOB).get_json()['job']['id']
+    yield WORKER, 'report job worker', None
+    yield WORKER, 'idle report job worker', None
+    yield 'GET', f'/reports/jobs/{job_id}/result', None
+
+
+def login_requests(ctx):
+    yield 'POST', '/auth/login', {'email': ctx.login_email, 'password': 'password'}
+
+
+# (method, rule) -> function of a PlanContext yielding the (method, path, payload) requests to check.
+# A payload is sent as JSON, or as the raw body when it is bytes. Requests the
+# function makes itself through ctx are setup and are not checked.
+ROUTE_REQUESTS = {
+    ('POST', '/auth/login'): login_requests,
+    ('GET', '/events'): events_requests,
+    ('POST', '/events'): lambda ctx: [('POST', '/events', {
+        'college_id': 1, 'title': 'Planned Workshop', 'type': 'Workshop', 'date': '2026-03-14', 'time': '10:30',
+        'venue': 'Lab 1'
+    })],
+    ('GET', '/events/search'): lambda ctx: [
+        ('GET', '/events/search?q=python workshop', None),
+        ('GET', '/events/search?q=hal&prefix=1&status=', None),
+    ],
+    ('GET', '/events/<int:event_id>'): lambda ctx: [('GET', f'/events/{ctx.event_id}', None)],
+    ('PUT', '/events/<int:event_id>'): update_event_requests,
+    ('DELETE', '/events/<int:event_id>'): delete_event_requests,
+    ('GET', '/events/<int:event_id>/stream'): lambda ctx: [('GET', f'/events/{ctx.event_id}/stream', None)],
+    ('POST', '/events/import'): lambda ctx: [('POST', '/events/import?format=csv', (
+        b'college_id,title,type,date,time,venue\n1,Imported Workshop,Workshop,2026-03-14,10:30,Lab 1\n'
+    ))],
+    # One new student, and one repeating the srn of a datagen student
+    ('POST', '/colleges/<int:college_id>/students/import'): lambda ctx: [(
+        'POST', '/colleges/1/students/import?format=csv',
+        b'name,srn,email\nNew Student,NEW0000001,new1@campus.example.edu\n'
+        b'Copy Student,SRN0000001,copy1@campus.example.edu\n'
+    )],
+    ('POST', '/register'): lambda ctx: [
+        ('POST', '/register', {'event_id': ctx.event_id, 'student_id': ctx.free_student()}),
+    ],
+    ('POST', '/register/bulk'): lambda ctx: [('POST', '/register/bulk', {
+        'event_id': ctx.event_id, 'student_ids': [ctx.free_student() for _ in range(3)]
+    })],
+    ('GET', '/registrations/<int:event_id>'): lambda ctx: [
+        ('GET', f'/registrations/{ctx.event_id}', None),
+        ('GET', f'/registrations/{ctx.event_id}?format=csv', None),
+    ],
+    ('DELETE', '/registrations/<int:event_id>/<int:student_id>'): cancel_registration_requests,
+    ('GET', '/waitlist/<int:event_id>'): waitlist_requests,
+    ('POST', '/attendance'): mark_attendance_requests,
+    ('GET', '/attendance/<int:event_id>'): lambda ctx: [('GET', f'/attendance/{ctx.event_id}', None)],
+    ('POST', '/events/<int:event_id>/checkin/preload'): lambda ctx: [
+        ('POST', f'/events/{ctx.event_id}/checkin/preload', None),
+    ],
+    ('POST', '/attendance/checkin'): checkin_requests,
+    ('POST', '/attendance/checkin/flush'): lambda ctx: [('POST', '/attendance/checkin/flush', None)],
+    ('POST', '/feedback'): lambda ctx: [
+        ('POST', '/feedback', {'event_id': ctx.event_id, 'student_id': ctx.student_id, 'rating': 4}),
+    ],
+    ('GET', '/feedback/<int:event_id>'): lambda ctx: [('GET', f'/feedback/{ctx.event_id}', None)],
+    ('GET', '/reports/registrations/<int:event_id>'): lambda ctx: [
+        ('GET', f'/reports/registrations/{ctx.event_id}', None),
+    ],
+    ('GET', '/reports/attendance/<int:event_id>'): lambda ctx: [
+        ('GET', f'/reports/attendance/{ctx.event_id}', None),
+    ],
+    ('GET', '/reports/feedback/<int:event_id>'): lambda ctx: [('GET', f'/reports/feedback/{ctx.event_id}', None)],
+    ('GET', '/reports/popularity'): lambda ctx: [
+        ('GET', '/reports/popularity', None),
+        ('GET', '/reports/popularity?type=Workshop', None),
+    ],
+    ('GET', '/reports/participation/<int:student_id>'): lambda ctx: [
+        ('GET', f'/reports/participation/{ctx.student_id}', None),
+    ],
+    ('GET', '/reports/top-students'): lambda ctx: [('GET', '/reports/top-students', None)],
+    ('GET', '/reports/event-types'): lambda ctx: [('GET', '/reports/event-types', None)],
+    ('GET', '/reports/monthly'): lambda ctx: [('GET', '/reports/monthly', None)],
+    ('GET', '/reports/events'): lambda ctx: [
+        ('GET', '/reports/events?ids=1,2', None),
+        ('GET', '/reports/events?college_id=1&from=2024-01-01&to=2024-12-31', None),
+    ],
+    ('GET', '/reports/students'): lambda ctx: [
+        ('GET', f'/reports/students?ids={ctx.student_id},1', None),
+        ('GET', '/reports/students?college_id=1', None),
+    ],
+    ('GET', '/reports/feedback-analytics'): lambda ctx: [
+        ('GET', f'/reports/feedback-analytics?ids={ctx.event_id},{ctx.event_id + 1}&bucket=day', None),
+        ('GET', '/reports/feedback-analytics?college_id=1&from=2024-01-01&to=2024-12-31', None),
+    ],
+    ('POST', '/reports/jobs'): report_job_requests,
+    ('GET', '/reports/jobs/<int:job_id>'): report_job_status_requests,
+    ('GET', '/reports/jobs/<int:job_id>/result'): report_job_result_requests,
+    ('GET', '/students/<int:student_id>/feed'): lambda ctx: [
+        ('GET', '/students/1/feed', None),
+        ('GET', '/students/1/feed?from=2024-01-01&to=2024-12-31&limit=5', None),
+    ],
+    ('GET', '/metrics'): lambda ctx: [('GET', '/metrics', None)],
+}
+
+
+def app_routes():
+    """(method, rule, endpoint) of every route the app serves"""
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', **CONFIG})
+    return sorted(
+        (method, rule.rule, rule.endpoint)
+        for rule in app.url_map.iter_rules() for method in rule.methods - {'HEAD', 'OPTIONS'}
+    )
+
+
+def explain(connection, statement, parameters):
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+    return [row[-1] for row in rows]
+
+
+def plan_problems(path, plan):
+    problems = []
+    allowed_scans = ALLOWED_SCANS.get(path, set())
+    for detail in plan:
+        match = SCAN_PATTERN.match(detail)
+        if match and match.group(1) not in allowed_scans:
+            problems.append(f'full table scan: {detail}')
+        if detail.startswith('USE TEMP B-TREE FOR ORDER BY') and path not in ALLOWED_TEMP_SORTS:
+            problems.append(f'temporary sort: {detail}')
+    return problems
+
+
+@pytest.fixture(scope='module')
+def plans(tmp_path_factory):
+    # No report job workers: their whole-table scans would land in whichever route happens to be running.
+    # No response cache either, so a route requested twice still issues its statements.
+    database = tmp_path_factory.mktemp('plans') / 'plans.db'
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}', **CONFIG})
+    with app.app_context():
+        event_id, student_id = build_dataset()
+        free_student_ids = db.session.scalars(
+            db.select(Student.id).where(~db.select(Registration.id).where(Registration.student_id == Student.id)
+                                        .exists()).order_by(Student.id).limit(50)
+        ).all()
+        login_email = db.session.execute(
+            db.update(Student).where(Student.id == 1).values(password_hash=generate_password_hash('password'))
+            .returning(Student.email)
+        ).scalar()
+        db.session.commit()
+        client = app.test_client()
+        cursor = client.get('/events?limit=5').get_json()['next_cursor']
+        yield PlanContext(app, client, event_id, student_id, free_student_ids, login_email, cursor)
+
+
+@pytest.fixture
+def captured(plans):
+    """The SQL statements issued on any engine while the test runs"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'INSERT', 'UPDATE', 'DELETE')):
+            statements.append((statement, parameters))
+
+    engines = set(db.engines.values())
+    for engine in engines:
+        sa_event.listen(engine, 'before_cursor_execute', capture)
+    yield statements
+    for engine in engines:
+        sa_event.remove(engine, 'before_cursor_execute', capture)
+
+
+def send(client, method, path, payload):
+    """Status and body of a request; a stream is closed once its response starts"""
+    if isinstance(payload, bytes):
+        response = client.open(path, method=method, data=payload, buffered=False)
+    else:
+        response = client.open(path, method=method, json=payload, buffered=False)
+    try:
+        body = '' if response.mimetype == 'text/event-stream' else response.get_data(as_text=True)
+    finally:
+        response.close()
+    return response.status_code, body
+
+
+ROUTES = app_routes()
+
+
+@pytest.mark.parametrize('method, rule, endpoint', ROUTES, ids=[f'{method} {rule}' for method, rule, _ in ROUTES])
+def test_query_plans(plans, captured, method, rule, endpoint):
+    if endpoint in NO_SQL_ROUTES:
+        pytest.skip(NO_SQL_ROUTES[endpoint])
+    requests = ROUTE_REQUESTS.get((method, rule))
+    assert requests is not None, f'no requests listed for {method} {rule}; add them to ROUTE_REQUESTS'
+    adapter = plans.app.url_map.bind('localhost')
+
+    problems = []
+    checked = 0
+    for step_method, path, payload in requests(plans):
+        captured.clear()
+        if step_method == WORKER:
+            run_report_worker(plans.app)
+        else:
+            assert adapter.match(path.partition('?')[0], method=step_method)[0] == endpoint, \
+                f'{step_method} {path} is not served by {endpoint}'
+            status, body = send(plans.client, step_method, path, payload)
+            # A failed request runs only part of its statements, so it would hide regressions
+            assert status < 400, f'{step_method} {path} failed with {status}: {body[:200]}'
+            checked += 1
+        # EXPLAIN on the read engine: a write-engine transaction would take
+        # the write lock and block the next write route
+        with get_read_engine().connect() as connection:
+            for statement, parameters in list(captured):
+                plan = explain(connection, statement, parameters)
+                problems += [
+                    f'{step_method} {path}: {problem}\n  {" ".join(statement.split())}\n    ' + '\n    '.join(plan)
+                    for problem in plan_problems(path, plan)
+                ]
+    assert checked, f'no request for {method} {rule} was sent'
+    assert not problems, '\n'.join(problems)
@@ -0,0 +1,95 @@
+"""Background report jobs: deduplication, result expiry and reclaiming abandoned jobs, run by hand with no workers"""
+from datetime import datetime, timedelta
+
+from app import claim_report_job, db, run_report_job, ReportJob
+
+
+def post_job(client, report='monthly', params=None):
+    response = client.post('/reports/jobs', json={'report': report, 'params': params or {}})
+    assert response.status_code in (200, 202), response.get_json()
+    return response.get_json()
+
+
+def run_next(app):
+    job = claim_report_job(app)
+    assert job is not None
+    run_report_job(app, job)
+    return job
+
+
+def test_identical_requests_share_a_job(app, client):
+    first = post_job(client, params={'status': 'Active'})
+    assert not first['deduplicated']
+    assert first['job']['status'] == 'queued'
+
+    again = post_job(client, params={'status': 'Active'})
+    assert again['deduplicated']
+    assert again['job']['id'] == first['job']['id']
+    # Other params, or another report, are a different job
+    assert not post_job(client, params={'status': 'Completed'})['deduplicated']
+    assert not post_job(client, report='event-types')['deduplicated']
+
+    run_next(app)
+    response = client.post('/reports/jobs', json={'report': 'monthly', 'params': {'status': 'Active'}})
+    assert response.status_code == 200
+    assert response.get_json()['deduplicated']
+    assert response.get_json()['job']['result_url'] == f"/reports/jobs/{first['job']['id']}/result"
+
+    result = client.get(f"/reports/jobs/{first['job']['id']}/result").get_json()
+    assert result['report'] == 'monthly'
+    assert result['params'] == {'status': 'Active'}
+
+
+def test_finished_jobs_expire(make_app):
+    app = make_app(REPORT_JOB_TTL=0)
+    client = app.test_client()
+    job_id = post_job(client)['job']['id']
+    run_next(app)
+
+    assert client.get(f'/reports/jobs/{job_id}').status_code == 404
+    assert client.get(f'/reports/jobs/{job_id}/result').status_code == 404
+    # An expired result is not reused; queuing its replacement deletes it
+    again = post_job(client)
+    assert not again['deduplicated']
+    assert again['job']['id'] != job_id
+    with app.app_context():
+        assert db.session.get(ReportJob, job_id) is None
+
+
+def test_abandoned_running_job_is_claimed_again(app, client):
+    job_id = post_job(client, report='event-types')['job']['id']
+    abandoned = claim_report_job(app)
+    assert abandoned[0] == job_id
+    assert client.get(f'/reports/jobs/{job_id}').get_json()['job']['status'] == 'running'
+    # A job that is still running within REPORT_JOB_TIMEOUT belongs to its worker
+    assert claim_report_job(app) is None
+
+    with app.app_context():
+        started = datetime.utcnow() - timedelta(seconds=app.config['REPORT_JOB_TIMEOUT'] + 1)
+        db.session.execute(db.update(ReportJob).where(ReportJob.id == job_id).values(started_at=started))
+        db.session.commit()
+    reclaimed = claim_report_job(app)
+    assert reclaimed == abandoned
+    run_report_job(app, reclaimed)
+    assert client.get(f'/reports/jobs/{job_id}').get_json()['job']['status'] == 'done'
+
+    # The first worker finishing late does not overwrite the stored outcome
+    with app.app_context():
+        finished_at = db.session.get(ReportJob, job_id).finished_at
+    run_report_job(app, abandoned)
+    with app.app_context():
+        assert db.session.get(ReportJob, job_id).finished_at == finished_at
+    assert claim_report_job(app) is None
+
+
+def test_failed_job_keeps_its_error(app, client):
+    job_id = post_job(client, report='student-participation', params={'college_id': 1})['job']['id']
+    job = claim_report_job(app)
+    run_report_job(app, (job[0], job[1], '{"unknown": 1}'))
+
+    job = client.get(f'/reports/jobs/{job_id}').get_json()['job']
+    assert job['status'] == 'failed'
+    assert 'unknown' in job['error']
+    response = client.get(f'/reports/jobs/{job_id}/result')
+    assert response.status_code == 409
+    assert response.get_json()['status'] == 'failed'
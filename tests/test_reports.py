@@ -0,0 +1,64 @@
+"""GET /reports/events: listed ids with the ones not found, and filter selections a page at a time"""
+import pytest
+
+from app import MAX_REPORT_IDS
+
+
+def report(client, **query):
+    response = client.get('/reports/events', query_string=query)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_listed_ids_report_the_ones_not_found(client, create_event):
+    event_id = create_event()
+    body = report(client, ids=f'{event_id},999,1,999')
+    assert [row['event_id'] for row in body['events']] == [1, event_id]
+    assert body['not_found'] == [999]
+    assert body['totals']['total_events'] == 2
+    assert 'next_cursor' not in body
+
+    assert report(client, ids='998,999')['not_found'] == [998, 999]
+    # The other filters narrow the listed ids, and what they exclude counts as not found
+    assert report(client, ids=f'1,{event_id}', status='Active', type='Seminar')['not_found'] == [1]
+
+
+def test_filter_selection_is_paged(client, create_event):
+    event_ids = [create_event(date=day) for day in ('2030-01-02', '2030-01-01', '2030-01-02', '2030-01-03')]
+    expected = [event_ids[1], event_ids[0], event_ids[2], event_ids[3]]
+
+    pages, cursor = [], None
+    while True:
+        query = {'college_id': 1, 'from': '2030-01-01', 'limit': 3, **({'cursor': cursor} if cursor else {})}
+        body = report(client, **query)
+        assert 'not_found' not in body
+        pages.append([row['event_id'] for row in body['events']])
+        assert body['totals']['total_events'] == len(pages[-1])
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert pages == [expected[:3], expected[3:]]
+
+    whole = report(client, **{'from': '2030-01-01'})
+    assert [row['event_id'] for row in whole['events']] == expected
+    assert whole['next_cursor'] is None
+
+
+def test_unfiltered_report_is_capped(client, monkeypatch, create_event):
+    for _ in range(3):
+        create_event()
+    monkeypatch.setattr('app.MAX_REPORT_IDS', 2)
+    body = report(client, limit=50)
+    assert len(body['events']) == 2
+    assert body['next_cursor'] is not None
+
+
+@pytest.mark.parametrize('query, message', [
+    ({'cursor': 'not-a-cursor'}, 'Invalid cursor'),
+    ({'limit': 0}, 'limit must be a positive integer'),
+    ({'ids': ','.join(str(n) for n in range(MAX_REPORT_IDS + 1))}, f'At most {MAX_REPORT_IDS} ids per request'),
+])
+def test_bad_requests(client, query, message):
+    response = client.get('/reports/events', query_string=query)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == message
@@ -0,0 +1,80 @@
+"""Response cache: hits, ETag revalidation, and invalidation by the writes that change a response"""
+from app import create_app
+
+
+def fetch(client, path, etag=None):
+    return client.get(path, headers={'If-None-Match': f'"{etag}"'} if etag else {})
+
+
+def test_repeat_reads_hit_and_revalidate(client, create_event):
+    event_id = create_event()
+    first = fetch(client, f'/events/{event_id}')
+    assert first.headers['X-Cache'] == 'MISS'
+    assert first.headers['Cache-Control'] == 'no-cache'
+    etag = first.get_etag()[0]
+
+    second = fetch(client, f'/events/{event_id}')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_etag()[0] == etag
+    assert second.get_data() == first.get_data()
+
+    unchanged = fetch(client, f'/events/{event_id}', etag)
+    assert unchanged.status_code == 304
+    assert unchanged.get_data() == b''
+    assert unchanged.get_etag()[0] == etag
+
+
+def test_event_update_invalidates_its_detail(client, create_event):
+    event_id = create_event()
+    other_id = create_event(title='Other Event')
+    etag = fetch(client, f'/events/{event_id}').get_etag()[0]
+    other_etag = fetch(client, f'/events/{other_id}').get_etag()[0]
+
+    assert client.put(f'/events/{event_id}', json={'title': 'Renamed'}).status_code == 200
+    changed = fetch(client, f'/events/{event_id}', etag)
+    assert changed.status_code == 200
+    assert changed.headers['X-Cache'] == 'MISS'
+    assert changed.get_etag()[0] != etag
+    assert changed.get_json()['event']['title'] == 'Renamed'
+    # Another event's detail did not change and stays cached
+    assert fetch(client, f'/events/{other_id}', other_etag).status_code == 304
+
+
+def test_registration_invalidates_the_event_reports(client, add_students, create_event):
+    (student_id,) = add_students(1)
+    event_id = create_event()
+    path = f'/reports/registrations/{event_id}'
+    before = fetch(client, path)
+    assert before.get_json()['total_registrations'] == 0
+    assert fetch(client, path).headers['X-Cache'] == 'HIT'
+
+    assert client.post('/register', json={'event_id': event_id, 'student_id': student_id}).status_code == 201
+    after = fetch(client, path, before.get_etag()[0])
+    assert after.status_code == 200
+    assert after.get_json()['total_registrations'] == 1
+    assert after.get_etag()[0] != before.get_etag()[0]
+
+
+def test_failed_write_keeps_the_cache(client, add_students, create_event):
+    (student_id,) = add_students(1)
+    event_id = create_event()
+    assert client.post('/register', json={'event_id': event_id, 'student_id': student_id}).status_code == 201
+    path = f'/reports/registrations/{event_id}'
+    etag = fetch(client, path).get_etag()[0]
+
+    assert client.post('/register', json={'event_id': event_id, 'student_id': student_id}).status_code == 409
+    assert fetch(client, path, etag).status_code == 304
+
+
+def test_shared_store_carries_writes_between_processes(make_app, tmp_path):
+    config = {'RESPONSE_CACHE_DB': str(tmp_path / 'response-cache.db')}
+    writer = make_app(**config)
+    reader = create_app({**writer.config, **config})
+    reader_client = reader.test_client()
+    etag = fetch(reader_client, '/events/1').get_etag()[0]
+    assert fetch(reader_client, '/events/1', etag).status_code == 304
+
+    assert writer.test_client().put('/events/1', json={'title': 'Renamed'}).status_code == 200
+    changed = fetch(reader_client, '/events/1', etag)
+    assert changed.status_code == 200
+    assert changed.get_json()['event']['title'] == 'Renamed'
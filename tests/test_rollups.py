@@ -0,0 +1,84 @@
+"""The report rollups follow every write: they match a recompute from the participation tables"""
+import pytest
+
+from app import db, EventStats, EventTypeStats, FeedbackDailyStats, MonthlyStats, StudentStats
+
+ROLLUPS = (EventStats, StudentStats, EventTypeStats, MonthlyStats, FeedbackDailyStats)
+
+
+@pytest.fixture
+def app(make_app):
+    # Uncached, so each report is read from the rollups again after the rebuild
+    return make_app(RESPONSE_CACHE_ENABLED=False)
+
+
+def rollup_rows(app):
+    """Every rollup row by table, leaving out rows of zero counters, which read the same as no row"""
+    with app.app_context():
+        tables = {}
+        for model in ROLLUPS:
+            keys = model.__table__.primary_key.columns
+            counters = [column for column in model.__table__.columns if not column.primary_key]
+            rows = db.session.execute(db.select(*keys, *counters).order_by(*keys))
+            tables[model.__tablename__] = [tuple(row) for row in rows if any(row[len(keys):])]
+        return tables
+
+
+def reports(client, event_ids, student_ids):
+    """The responses of every report route backed by the rollups"""
+    ids = ','.join(map(str, event_ids))
+    paths = [f'/reports/{report}/{event_id}' for event_id in event_ids
+             for report in ('registrations', 'attendance', 'feedback')]
+    paths += [f'/reports/participation/{student_id}' for student_id in student_ids]
+    paths += ['/reports/popularity', '/reports/top-students', '/reports/event-types', '/reports/monthly',
+              '/reports/monthly?status=Active', '/reports/monthly?status=Cancelled', f'/reports/events?ids={ids}',
+              '/reports/students?college_id=1', f'/reports/feedback-analytics?ids={ids}&bucket=day']
+    responses = {}
+    for path in paths:
+        response = client.get(path)
+        assert response.status_code == 200, (path, response.get_json())
+        responses[path] = response.get_json()
+    return responses
+
+
+def test_rollups_match_a_rebuild_after_writes(app, client, add_students, create_event):
+    s1, s2, s3, s4, s5 = add_students(5)
+    workshop = create_event(type='Workshop', capacity=2, date='2030-01-10')
+    talk = create_event(type='Talk', date='2030-01-20')
+    small = create_event(type='Talk', capacity=1, date='2030-02-05')
+
+    def post(path, payload, status):
+        response = client.post(path, json=payload)
+        assert response.status_code == status, (path, payload, response.get_json())
+
+    for student_id in (s1, s2, s3):
+        post('/register', {'event_id': workshop, 'student_id': student_id}, 201 if student_id != s3 else 202)
+    post('/register/bulk', {'event_id': talk, 'student_ids': [s1, s2, s3, s4]}, 200)
+    post('/attendance', {'event_id': workshop, 'student_id': s1}, 201)
+    post('/attendance', {'event_id': workshop, 'student_id': s2}, 201)
+    post('/attendance/checkin', {'event_id': talk, 'student_id': s1}, 202)
+    post('/attendance/checkin/flush', {}, 200)
+    post('/feedback', {'event_id': workshop, 'student_id': s1, 'rating': 4}, 201)
+    post('/feedback', {'event_id': workshop, 'student_id': s2, 'rating': 2}, 201)
+    post('/feedback', {'event_id': talk, 'student_id': s1, 'rating': 5}, 201)
+
+    # Cancellations, one of them promoting from the waitlist
+    assert client.delete(f'/registrations/{talk}/{s3}').status_code == 200
+    post('/register', {'event_id': small, 'student_id': s4}, 201)
+    post('/register', {'event_id': small, 'student_id': s5}, 202)
+    assert client.delete(f'/registrations/{small}/{s4}').get_json()['promoted_student_ids'] == [s5]
+
+    # Moving an event to another type and month, and cancelling one
+    assert client.put(f'/events/{talk}', json={'type': 'Seminar', 'date': '2030-03-01'}).status_code == 200
+    assert client.put(f'/events/{workshop}', json={'status': 'Completed'}).status_code == 200
+    assert client.delete(f'/events/{small}').status_code == 200
+
+    event_ids, student_ids = [1, workshop, talk, small], [s1, s2, s3, s4, s5]
+    maintained_rows, maintained_reports = rollup_rows(app), reports(client, event_ids, student_ids)
+    assert maintained_reports[f'/reports/attendance/{workshop}']['total_registered'] == 2
+    assert maintained_reports[f'/reports/registrations/{talk}']['total_registrations'] == 3
+
+    result = app.test_cli_runner().invoke(args=['rebuild-rollups'])
+    assert result.exit_code == 0, result.output
+    assert rollup_rows(app) == maintained_rows
+    assert reports(client, event_ids, student_ids) == maintained_reports
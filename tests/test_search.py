@@ -0,0 +1,81 @@
+"""GET /events/search: BM25 ranking with column weights, prefix matching, paging and index upkeep"""
+import pytest
+
+from app import db, Event
+
+
+def search(client, query, **params):
+    response = client.get('/events/search', query_string={'q': query, **params})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def titles(body):
+    return [event['title'] for event in body['events']]
+
+
+@pytest.fixture
+def events(create_event):
+    return {
+        'venue': create_event(title='Maker Night', description='Bring a project', venue='Robotics Lab'),
+        'title': create_event(title='Robotics Bootcamp', description='Build a line follower'),
+        'description': create_event(title='Engineering Expo', description='Stalls on robotics and drones'),
+    }
+
+
+def test_title_matches_rank_above_venue_and_description(client, events):
+    body = search(client, 'robotics')
+    assert titles(body) == ['Robotics Bootcamp', 'Maker Night', 'Engineering Expo']
+    scores = [event['score'] for event in body['events']]
+    assert scores == sorted(scores, reverse=True)
+    assert '<mark>Robotics</mark>' in body['events'][0]['snippet']
+
+
+def test_every_word_must_match(client, events):
+    assert titles(search(client, 'robotics drones')) == ['Engineering Expo']
+    assert titles(search(client, 'robotics welding')) == []
+
+
+def test_prefix_mode_matches_the_last_word_as_a_prefix(client, events):
+    assert titles(search(client, 'robo')) == []
+    assert len(search(client, 'robo', prefix='1')['events']) == 3
+    assert titles(search(client, 'line fol', prefix='true')) == ['Robotics Bootcamp']
+
+
+def test_pages_follow_next_offset(client, events):
+    first = search(client, 'robotics', limit=2)
+    assert len(first['events']) == 2
+    assert first['next_offset'] == 2
+    second = search(client, 'robotics', limit=2, offset=first['next_offset'])
+    assert second['next_offset'] is None
+    assert titles(first) + titles(second) == titles(search(client, 'robotics'))
+
+
+@pytest.mark.parametrize('query', ['', '?!', '"* -'])
+def test_query_without_words_is_rejected(client, query):
+    response = client.get('/events/search', query_string={'q': query})
+    assert response.status_code == 400
+    assert 'at least one word' in response.get_json()['message']
+
+
+def test_fts_operators_are_taken_literally(client, events):
+    assert titles(search(client, 'robotics OR NEAR("x")')) == []
+    assert titles(search(client, 'bootcamp)')) == ['Robotics Bootcamp']
+
+
+def test_index_follows_updates_and_deletes(app, client, events):
+    event_id = events['title']
+    assert client.put(f'/events/{event_id}', json={'title': 'Drone Racing'}).status_code == 200
+    assert titles(search(client, 'bootcamp')) == []
+    assert titles(search(client, 'racing')) == ['Drone Racing']
+    # The description was not changed and is still indexed
+    assert titles(search(client, 'follower')) == ['Drone Racing']
+
+    assert client.delete(f'/events/{event_id}').status_code == 200
+    assert titles(search(client, 'racing')) == []
+    assert titles(search(client, 'racing', status='Cancelled')) == ['Drone Racing']
+
+    with app.app_context():
+        db.session.execute(db.delete(Event).where(Event.id == event_id))
+        db.session.commit()
+    assert titles(search(client, 'racing', status='')) == []
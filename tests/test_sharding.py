@@ -0,0 +1,111 @@
+"""SHARDS_DIR: each college's events and activity live in their own file, and reads merge the shards"""
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def shards_dir(tmp_path):
+    return tmp_path / 'shards'
+
+
+@pytest.fixture
+def app(make_app, shards_dir):
+    return make_app(SHARDS_DIR=str(shards_dir))
+
+
+def rows(path, sql):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(sql).fetchall()
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def events(client, create_event):
+    """Events of both colleges whose dates interleave, three of them at the same date and time"""
+    schedule = [(1, '2030-01-01'), (2, '2030-01-01'), (1, '2030-01-02'), (2, '2030-01-01'), (2, '2030-01-03')]
+    return [(college_id, create_event(college_id=college_id, date=day, type=f'Type{college_id}'), day)
+            for college_id, day in schedule]
+
+
+def test_writes_land_on_their_colleges_shard(app, client, shards_dir, events):
+    for _, event_id, _ in events:
+        assert client.post('/register', json={'event_id': event_id, 'student_id': 1}).status_code == 201
+
+    for college_id in (1, 2):
+        shard = shards_dir / f'college_{college_id}.db'
+        expected = sorted(event_id for owner, event_id, _ in events if owner == college_id)
+        if college_id == 1:
+            expected = [1] + expected
+        assert [event_id for event_id, in rows(shard, 'SELECT id FROM events ORDER BY id')] == expected
+        registered = rows(shard, 'SELECT event_id FROM registrations ORDER BY event_id')
+        assert [event_id for event_id, in registered] == [event_id for event_id in expected if event_id != 1]
+        # The student of college 1 was copied into college 2's shard when it first registered there
+        assert rows(shard, 'SELECT id FROM students WHERE id = 1') == [(1,)]
+
+    directory = app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///')
+    assert rows(directory, 'SELECT COUNT(*) FROM events') == [(0,)]
+    assert rows(directory, 'SELECT COUNT(*) FROM registrations') == [(0,)]
+    assert sorted(rows(directory, 'SELECT event_id, college_id FROM event_directory')) == sorted(
+        [(1, 1)] + [(event_id, college_id) for college_id, event_id, _ in events]
+    )
+
+
+@pytest.mark.parametrize('limit', [1, 2, 500])
+def test_event_pages_merge_the_shards(client, events, limit):
+    listed, cursor = [], None
+    while True:
+        body = client.get('/events', query_string={'limit': limit, **({'cursor': cursor} if cursor else {})}).get_json()
+        listed += body['events']
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+
+    keys = [(event['date'], event['time'], event['id']) for event in listed]
+    assert keys == sorted(keys)
+    assert sorted(event['id'] for event in listed) == sorted([1] + [event_id for _, event_id, _ in events])
+    assert {event['college_name'] for event in listed} == {'Engineering College A', 'Arts & Science College B'}
+
+
+def test_reports_sum_over_the_shards(client, events):
+    college_1_events = [event_id for college_id, event_id, _ in events if college_id == 1]
+    college_2_events = [event_id for college_id, event_id, _ in events if college_id == 2]
+    for event_id in college_1_events + college_2_events:
+        client.post('/register', json={'event_id': event_id, 'student_id': 1})
+    for event_id in college_2_events:
+        client.post('/register', json={'event_id': event_id, 'student_id': 2})
+        client.post('/attendance', json={'event_id': event_id, 'student_id': 2})
+
+    types = {row['event_type']: row for row in client.get('/reports/event-types').get_json()['event_types']}
+    assert (types['Type1']['total_events'], types['Type1']['total_registrations']) == (2, 2)
+    assert (types['Type2']['total_events'], types['Type2']['total_registrations']) == (3, 6)
+    assert types['Type2']['total_attendance'] == 3
+
+    participation = client.get('/reports/participation/2').get_json()
+    assert (participation['events_registered'], participation['events_attended']) == (3, 3)
+    assert client.get('/reports/participation/1').get_json()['events_registered'] == len(events)
+
+    ids = ','.join(str(event_id) for _, event_id, _ in events)
+    report = client.get('/reports/events', query_string={'ids': ids}).get_json()
+    assert report['totals']['total_registrations'] == len(events) + 3
+    assert [row['event_id'] for row in report['events']] == [
+        event_id for _, event_id, _ in sorted(events, key=lambda event: (event[2], event[1]))
+    ]
+    assert report['not_found'] == []
+    assert client.get(f'/reports/registrations/{college_2_events[0]}').get_json()['total_registrations'] == 2
+
+
+def test_report_pages_merge_the_shards(client, events):
+    expected = [event_id for _, event_id, _ in sorted(events, key=lambda event: (event[2], event[1]))]
+    seen, cursor = [], None
+    while True:
+        query = {'from': '2030-01-01', 'limit': 2, **({'cursor': cursor} if cursor else {})}
+        page = client.get('/reports/events', query_string=query).get_json()
+        assert len(page['events']) <= 2
+        seen += [row['event_id'] for row in page['events']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == expected
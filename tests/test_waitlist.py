@@ -0,0 +1,73 @@
+"""A full event puts students on its waitlist, and freed seats go to the head of the line"""
+
+
+def register(client, event_id, student_id):
+    return client.post('/register', json={'event_id': event_id, 'student_id': student_id})
+
+
+def waitlist(client, event_id):
+    students = client.get(f'/waitlist/{event_id}').get_json()['students']
+    return [(student['student_id'], student['position']) for student in students]
+
+
+def registered(client, event_id):
+    return [student['student_id'] for student in client.get(f'/registrations/{event_id}').get_json()['students']]
+
+
+def test_full_event_waitlists_in_order(client, add_students, create_event):
+    first, second, third = add_students(3)
+    event_id = create_event(capacity=1)
+
+    assert register(client, event_id, first).status_code == 201
+    response = register(client, event_id, second)
+    assert response.status_code == 202
+    assert response.get_json()['waitlisted'] is True
+    assert response.get_json()['position'] == 1
+    assert register(client, event_id, third).get_json()['position'] == 2
+
+    assert registered(client, event_id) == [first]
+    assert waitlist(client, event_id) == [(second, 1), (third, 2)]
+    response = register(client, event_id, second)
+    assert response.status_code == 409
+    assert 'waitlist' in response.get_json()['message']
+
+
+def test_cancellation_promotes_the_head_of_the_waitlist(client, add_students, create_event):
+    first, second, third = add_students(3)
+    event_id = create_event(capacity=1)
+    for student_id in (first, second, third):
+        register(client, event_id, student_id)
+
+    response = client.delete(f'/registrations/{event_id}/{first}')
+    assert response.status_code == 200
+    assert response.get_json()['promoted_student_ids'] == [second]
+
+    assert registered(client, event_id) == [second]
+    assert waitlist(client, event_id) == [(third, 1)]
+    assert client.get(f'/reports/registrations/{event_id}').get_json()['total_registrations'] == 1
+
+
+def test_leaving_the_waitlist_moves_the_line_up(client, add_students, create_event):
+    first, second, third = add_students(3)
+    event_id = create_event(capacity=1)
+    for student_id in (first, second, third):
+        register(client, event_id, student_id)
+
+    response = client.delete(f'/registrations/{event_id}/{second}')
+    assert response.status_code == 200
+    assert response.get_json()['message'] == 'Removed from the waitlist'
+
+    assert registered(client, event_id) == [first]
+    assert waitlist(client, event_id) == [(third, 1)]
+
+
+def test_raising_capacity_promotes_waiting_students(client, add_students, create_event):
+    first, second, third = add_students(3)
+    event_id = create_event(capacity=1)
+    for student_id in (first, second, third):
+        register(client, event_id, student_id)
+
+    assert client.put(f'/events/{event_id}', json={'capacity': 3}).status_code == 200
+
+    assert registered(client, event_id) == [first, second, third]
+    assert waitlist(client, event_id) == []